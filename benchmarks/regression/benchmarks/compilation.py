@@ -0,0 +1,156 @@
+"""
+Compile-time regression benchmarks.
+
+For a representative set of Operators (the forward propagators of the seismic
+examples), track how long it takes to generate code -- overall and for each
+lowering/specialization pass, as recorded by `timed_pass` -- how long it takes
+to JIT-compile it, how big the generated code is, and how fast it runs.
+"""
+
+from os import path
+import shutil
+import sys
+
+from devito import switchconfig
+
+try:
+    from mpi4py import MPI  # noqa
+except ImportError:
+    MPI = None
+
+# The examples aren't installed along with Devito. The repository root goes at
+# the end of `sys.path`, so that the benchmarked Devito is still the installed one
+sys.path.append(path.abspath(path.join(path.dirname(__file__), '..', '..', '..')))
+
+from examples.seismic.acoustic import acoustic_setup  # noqa
+from examples.seismic.tti import tti_setup  # noqa
+from examples.seismic.elastic import elastic_setup  # noqa
+from examples.seismic.viscoelastic import viscoelastic_setup  # noqa
+
+
+# Problem -> (setup function, `op_fwd` positional arguments, as used by `forward`)
+problems = {
+    'acoustic': (acoustic_setup, (None,)),
+    'tti': (tti_setup, ('centered', False)),
+    'elastic': (elastic_setup, (None,)),
+    'viscoelastic': (viscoelastic_setup, (None,)),
+}
+
+space_orders = [4, 8, 12]
+
+modes = {
+    'noop': {'openmp': False, 'mpi': False},
+    'openmp': {'openmp': True, 'mpi': False},
+    'mpi': {'openmp': False, 'mpi': True},
+}
+
+shape = (50, 50, 50)
+spacing = (20., 20., 20.)
+nbl = 10
+tn = 100.
+
+# The outermost `timed_pass`es, i.e. the lowering and specialization stages
+passes = ['lowering.Expressions', 'lowering.Clusters.Schedule',
+          'lowering.Clusters.Analysis', 'specializing.Clusters',
+          'lowering.ScheduleTree', 'lowering.IET', 'specializing.IET']
+
+
+def measure(problem, space_order, mode):
+    """
+    Build, JIT-compile and run the forward Operator of ``problem``, returning
+    the recorded compile-time and run-time metrics.
+    """
+    setup, args = problems[problem]
+
+    # As in `benchmarks/user`, the advanced profiler is needed for the flop count
+    @switchconfig(**modes[mode], build_cache=False, profiling='advanced')
+    def _measure():
+        solver = setup(shape=shape, spacing=spacing, tn=tn, nbl=nbl,
+                       space_order=space_order)
+
+        op = solver.op_fwd(*args)
+        timings = dict(op._profiler.py_timers)
+
+        # Drop the shared object from the JIT cache, so that we time an
+        # actual compilation, not a cache lookup
+        soname = op._soname
+        shutil.rmtree(op._compiler.get_codepy_dir().joinpath(soname[:7]),
+                      ignore_errors=True)
+        op._jit_compile()
+        jit = op._profiler.py_timers['jit-compile']
+
+        # `forward` picks up the same (memoized) Operator
+        summary = solver.forward()[-1]
+        ops = sum(v.ops or 0 for v in summary.input.values())
+        time = sum(v.time for v in summary.input.values())
+
+        return {
+            'lowering': timings.pop('op-compile'),
+            'passes': {k: v['total'] for k, v in timings.items()
+                       if isinstance(v, dict)},
+            'jit': jit,
+            'code-size': len(str(op.ccode)),
+            'gflopss': float(ops)/10**9/time,
+        }
+
+    return _measure()
+
+
+class Compilation(object):
+
+    params = (list(problems), space_orders, list(modes))
+    param_names = ['problem', 'space_order', 'mode']
+
+    # Building all of the Operators may take a while
+    timeout = 3600
+
+    def setup_cache(self):
+        data = {}
+        for problem in problems:
+            for space_order in space_orders:
+                for mode in modes:
+                    if mode == 'mpi' and MPI is None:
+                        # mpi4py/MPI not installed
+                        continue
+                    data[(problem, space_order, mode)] = measure(problem,
+                                                                 space_order, mode)
+        return data
+
+    def setup(self, data, problem, space_order, mode):
+        if (problem, space_order, mode) not in data:
+            # Tells asv to skip this combination
+            raise NotImplementedError
+
+    def track_lowering(self, data, *params):
+        return data[params]['lowering']
+    track_lowering.unit = 'seconds'
+
+    def track_jit(self, data, *params):
+        return data[params]['jit']
+    track_jit.unit = 'seconds'
+
+    def track_code_size(self, data, *params):
+        return data[params]['code-size']
+    track_code_size.unit = 'bytes'
+
+    def track_gflopss(self, data, *params):
+        return data[params]['gflopss']
+    track_gflopss.unit = 'GFlops/s'
+
+
+class Passes(object):
+
+    params = Compilation.params + (passes,)
+    param_names = Compilation.param_names + ['name']
+
+    timeout = Compilation.timeout
+
+    setup_cache = Compilation.setup_cache
+
+    def setup(self, data, problem, space_order, mode, name):
+        Compilation.setup(self, data, problem, space_order, mode)
+
+    def track_pass(self, data, problem, space_order, mode, name):
+        # Not all passes are run by all backends (e.g., `specializing.Clusters`)
+        return data[(problem, space_order, mode)]['passes'].get(name, 0.)
+    track_pass.unit = 'seconds'
@@ -10,7 +10,8 @@ from devito.builtins import *  # noqa
 from devito.data.allocators import *  # noqa
 from devito.finite_differences import *  # noqa
 from devito.mpi import MPI  # noqa
-from devito.types import _SymbolCache, NODE, CELL, Buffer, SubDomain, SubDomainSet  # noqa
+from devito.types import (_SymbolCache, NODE, CELL, Buffer, Stream, SubDomain,  # noqa
+                          SubDomainSet)
 from devito.types.dimension import *  # noqa
 from devito.types.equation import *  # noqa
 from devito.types.tensor import *  # noqa
@@ -54,6 +55,21 @@ configuration.add('log-level', 'INFO', list(logger_registry),
 # and will instead use the custom kernel
 configuration.add('jit-backdoor', 0, [0, 1], lambda i: bool(i), False)
 
+# Should Devito store the lowered Operators in a persistent, on-disk cache? Upon
+# re-building an Operator out of the same symbolic input, possibly in a different
+# process, the whole lowering pipeline is then bypassed
+configuration.add('build-cache', 0, [0, 1], lambda i: bool(i), False)
+
+# With MPI, should the Operators be JIT-compiled by a single rank, which then
+# broadcasts the shared object to the other ranks? The broadcast may be over the
+# whole communicator ('comm', or simply 1), or over the ranks within a node
+# ('node'), in which case one rank per node performs the JIT compilation. Using a
+# node-local jit directory (e.g., `TMPDIR=/dev/shm`) is recommended
+def _jit_bcast_callback(val):  # noqa
+    return 'comm' if val == 1 else (val or False)
+configuration.add('jit-broadcast', 0, [0, 1, 'comm', 'node'],  # noqa
+                  callback=_jit_bcast_callback, impacts_jit=False)
+
 # Enable/disable automatic padding for allocated data
 configuration.add('autopadding', False, [False, True])
 
@@ -64,9 +80,18 @@ def _reinit_compiler(val):  # noqa
                                        mpi=configuration['mpi'])
     return bool(val) if isinstance(val, int) else val
 configuration.add('openmp', 0, [0, 1], callback=_reinit_compiler)  # noqa
-configuration.add('mpi', 0, [0, 1, 'basic', 'diag', 'overlap', 'overlap2', 'full'],
+configuration.add('mpi', 0, [0, 1, 'basic', 'diag', 'overlap', 'overlap2', 'full',
+                             'deep', 'persistent'],
                   callback=_reinit_compiler)
 
+# In `deep` MPI mode, the halos of the Functions are this many times deeper than
+# usual, so that halo exchanges may be performed only once every few timesteps
+configuration.add('mpi-halo-depth', 2, list(range(1, 9)))
+
+# When set, the MPI processes are arranged so as to minimize the halo volume
+# exchanged across nodes first, and then the total halo volume
+configuration.add('mpi-node-aware', 0, [0, 1], lambda i: bool(i), False)
+
 # Autotuning setup
 at_levels = ['off', 'basic', 'aggressive', 'max']
 at_modes = ['preemptive', 'destructive', 'runtime']
@@ -84,6 +109,10 @@ def _at_callback(val):  # noqa
 configuration.add('autotuning', 'off', at_accepted, callback=_at_callback,  # noqa
                   impacts_jit=False)
 
+# Should the autotuning results be stored in, and fetched from, a persistent
+# on-disk database? With a hit, autotuning is skipped altogether
+configuration.add('autotuning-db', 0, [0, 1], lambda i: bool(i), False)
+
 # Should Devito emit the JIT compilation commands?
 configuration.add('debug-compiler', 0, [0, 1], lambda i: bool(i), False)
 
@@ -1,5 +1,6 @@
 """Collection of utilities to detect properties of the underlying architecture."""
 
+from pathlib import Path
 from subprocess import PIPE, Popen
 
 import numpy as np
@@ -114,6 +115,22 @@ def get_cpu_info():
                 physical = 1
     cpu_info['physical'] = physical
 
+    # Detect the size, in bytes, of the data caches (per level)
+    cache = {}
+    try:
+        for i in Path('/sys/devices/system/cpu/cpu0/cache').glob('index*'):
+            if i.joinpath('type').read_text().strip() == 'Instruction':
+                continue
+            level = int(i.joinpath('level').read_text())
+            size = i.joinpath('size').read_text().strip()
+            units = {'K': 2**10, 'M': 2**20, 'G': 2**30}
+            if size[-1] in units:
+                size = int(size[:-1])*units[size[-1]]
+            cache[level] = int(size)
+    except (OSError, ValueError):
+        pass
+    cpu_info['cache'] = cache
+
     return cpu_info
 
 
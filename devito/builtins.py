@@ -2,16 +2,106 @@
 Built-in Operators provided by Devito.
 """
 
+from collections import OrderedDict
+
 from sympy import Abs, Pow
 import numpy as np
 
 import devito as dv
-from devito.tools import as_tuple, as_list
+from devito.symbolics import retrieve_functions
+from devito.tools import as_tuple, as_list, filter_sorted, flatten
 
 __all__ = ['assign', 'smooth', 'gaussian_smooth', 'initialize_function', 'norm',
            'sumall', 'inner', 'mmin', 'mmax']
 
 
+class BuiltinCache(OrderedDict):
+
+    """
+    A least-recently-used cache for the objects (Operators, reduction buffers,
+    ...) built by the builtins. This way, repeated invocations of a builtin,
+    e.g. within an optimization loop, pay for code generation and JIT
+    compilation only once.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The maximum number of cached objects. Defaults to 128.
+    """
+
+    def __init__(self, maxsize=128):
+        super(BuiltinCache, self).__init__()
+        self.maxsize = maxsize
+
+    def fetch(self, key, make):
+        """
+        Retrieve the object associated with ``key``; on a cache miss, build it
+        through the callable ``make``.
+        """
+        try:
+            v = self.pop(key)
+        except KeyError:
+            v = make()
+            while len(self) >= self.maxsize:
+                self.popitem(last=False)
+        self[key] = v
+        return v
+
+
+_cache = BuiltinCache()
+
+
+def _signature(f):
+    """The features of a Function ``f`` impacting code generation."""
+    return (type(f).__base__, f.dtype, f.grid, f.dimensions, f.shape, f.halo,
+            f.padding, f.staggered, getattr(f, 'coefficients', None),
+            getattr(f, 'space_order', None), getattr(f, 'time_order', None),
+            getattr(f, '_time_buffering', None))
+
+
+def _proxy(f):
+    """
+    A data-less replica of the Function ``f``. An Operator built on proxies
+    may be run on any Function structurally identical to ``f``, as it doesn't
+    keep any data alive.
+    """
+    args, kwargs = f.__getnewargs_ex__()
+    # Proxies never carry data
+    kwargs.pop('initializer', None)
+    kwargs.pop('coordinates_data', None)
+    return f._pickle_reconstruct(*args, **kwargs)
+
+
+def _cached_operator(key, functions, make):
+    """
+    Retrieve from the builtins cache, or build through ``make``, an Operator
+    computing over ``functions``.
+
+    Parameters
+    ----------
+    key : hashable
+        Anything, other than ``functions``, determining the Operator.
+    functions : list of Function
+        The Functions the Operator computes over.
+    make : callable
+        Build the Operator, given a proxy for each of the ``functions``.
+
+    Returns
+    -------
+    The Operator and the runtime arguments binding it to ``functions``.
+    """
+    key = (key, tuple(_signature(f) for f in functions),
+           dv.configuration._signature_items())
+
+    def build():
+        proxies = [_proxy(f) for f in functions]
+        return make(*proxies), proxies
+
+    op, proxies = _cache.fetch(key, build)
+
+    return op, {p.name: f for p, f in zip(proxies, functions)}
+
+
 def assign(f, rhs=0, options=None, name='assign', **kwargs):
     """
     Assign a list of RHSs to a list of Functions.
@@ -66,7 +156,32 @@ def assign(f, rhs=0, options=None, name='assign', **kwargs):
     else:
         for i, j in zip(as_list(f), rhs):
             eqs.append(dv.Eq(i, j))
-    dv.Operator(eqs, name=name, **kwargs)()
+
+    # The Functions appearing in user-provided coefficients can't be replaced
+    # by proxies, so the Operator is bound to them
+    bound = flatten([c.function for c in e.substitutions.coefficients]
+                    for e in eqs if e.substitutions is not None)
+    terms = flatten(retrieve_functions(e) for e in eqs)
+    functions = filter_sorted(i.function for i in terms if i.function not in bound)
+
+    # The Constants are passed as runtime arguments, so they may differ across calls
+    constants = filter_sorted(i for e in eqs for i in e.free_symbols
+                              if isinstance(i, dv.Constant))
+
+    def make(*proxies):
+        mapper = dict(zip(functions, proxies))
+        subs = {i: mapper[i.function].func(*i.args) for i in terms
+                if i.function in mapper}
+        processed = [dv.Eq(e.lhs.xreplace(subs), e.rhs.xreplace(subs),
+                           subdomain=e.subdomain, coefficients=e.substitutions,
+                           implicit_dims=e.implicit_dims) for e in eqs]
+        return dv.Operator(processed, name=name, **kwargs)
+
+    key = ('assign', name, str(eqs), str(options), str(sorted(kwargs.items())),
+           tuple(bound), tuple((c.name, c.dtype) for c in constants))
+    op, args = _cached_operator(key, functions, make)
+    args.update({c.name: c for c in constants})
+    op.apply(**args)
 
 
 def smooth(f, g, axis=None):
@@ -95,7 +210,10 @@ def smooth(f, g, axis=None):
     else:
         if axis is None:
             axis = g.dimensions[-1]
-        dv.Operator(dv.Eq(f, g.avg(dims=axis)), name='smoother')()
+        op, args = _cached_operator(('smoother', as_tuple(axis)), (f, g),
+                                    lambda f, g: dv.Operator(dv.Eq(f, g.avg(dims=axis)),
+                                                             name='smoother'))
+        op.apply(**args)
 
 
 def gaussian_smooth(f, sigma=1, truncate=4.0, mode='reflect'):
@@ -167,36 +285,51 @@ def gaussian_smooth(f, sigma=1, truncate=4.0, mode='reflect'):
         raise ValueError("`sigma` must be an integer or a tuple of length" +
                          " `f.ndim`.")
 
-    # Create the padded grid:
-    objective_domain = ObjectiveDomain(lw)
-    shape_padded = tuple([np.array(s) + 2*l for s, l in zip(shape, lw)])
-    grid = dv.Grid(shape=shape_padded, subdomains=objective_domain)
+    def make_grid():
+        # Create the padded grid
+        objective_domain = ObjectiveDomain(lw)
+        shape_padded = tuple([np.array(s) + 2*l for s, l in zip(shape, lw)])
+        return dv.Grid(shape=shape_padded, subdomains=objective_domain)
 
-    f_c = dv.Function(name='f_c', grid=grid, space_order=2*max(lw),
-                      coefficients='symbolic', dtype=dtype)
-    f_o = dv.Function(name='f_o', grid=grid, dtype=dtype)
+    def make(f_c, f_o):
+        grid = f_c.grid
+        weights = create_gaussian_weights(sigma, lw)
+
+        mapper = {}
+        for d, l, w in zip(f_c.dimensions, lw, weights):
+            lhs = []
+            rhs = []
+            options = []
 
-    weights = create_gaussian_weights(sigma, lw)
+            lhs.append(f_o)
+            rhs.append(dv.generic_derivative(f_c, d, 2*l, 1))
+            coeffs = dv.Coefficient(1, f_c, d, w)
+            options.append({'coefficients': dv.Substitutions(coeffs),
+                            'subdomain': grid.subdomains['objective_domain']})
 
-    mapper = {}
-    for d, l, w in zip(f_c.dimensions, lw, weights):
-        lhs = []
-        rhs = []
-        options = []
+            lhs.append(f_c)
+            rhs.append(f_o)
+            options.append({'subdomain': grid.subdomains['objective_domain']})
 
-        lhs.append(f_o)
-        rhs.append(dv.generic_derivative(f_c, d, 2*l, 1))
-        coeffs = dv.Coefficient(1, f_c, d, w)
-        options.append({'coefficients': dv.Substitutions(coeffs),
-                        'subdomain': grid.subdomains['objective_domain']})
+            mapper[d] = {'lhs': lhs, 'rhs': rhs, 'options': options}
 
-        lhs.append(f_c)
-        rhs.append(f_o)
-        options.append({'subdomain': grid.subdomains['objective_domain']})
+        lhs, rhs, options = _padding_eqs(f_c, lw, mapper=mapper, mode='reflect')
+        eqs = [dv.Eq(i, j, **(k or {})) for i, j, k in zip(lhs, rhs, options)]
+        return dv.Operator(eqs, name='smooth')
 
-        mapper[d] = {'lhs': lhs, 'rhs': rhs, 'options': options}
+    # The padded grid is reused across calls, so that the smoothing Operator,
+    # built on proxies of the work Functions, is built only once. The work
+    # Functions themselves are allocated at each call
+    key = ('gaussian_smooth', shape, np.dtype(dtype), lw, sigma)
+    grid = _cache.fetch(key, make_grid)
+
+    f_c = dv.Function(name='f_c', grid=grid, space_order=2*max(lw),
+                      coefficients='symbolic', dtype=dtype)
+    f_o = dv.Function(name='f_o', grid=grid, dtype=dtype)
 
-    initialize_function(f_c, f, lw, mapper=mapper, mode='reflect', name='smooth')
+    op, args = _cached_operator(('gaussian_smooth', lw, sigma), (f_c, f_o), make)
+    _pad(f_c, f, lw, 'reflect')
+    op.apply(**args)
 
     fset(f, f_c)
     return f
@@ -280,23 +413,34 @@ def initialize_function(function, data, nbl, mapper=None, mode='constant',
             function.data[:] = data[:]
         return
 
+    nbl = _pad(function, data, nbl, mode)
+
+    lhs, rhs, options = _padding_eqs(function, nbl, mapper=mapper, mode=mode)
+
+    if all(options is None for i in options):
+        options = None
+
+    assign(lhs, rhs, options=options, name=name)
+
+
+def _pad(function, data, nbl, mode):
+    """
+    Set the data of ``function``, except for the ``nbl`` outer layers, to
+    ``data``. Return ``nbl`` as a tuple of length ``function.ndim``.
+    """
     if len(as_tuple(nbl)) == 1 and len(as_tuple(nbl)) < function.ndim:
         nbl = function.ndim*(as_tuple(nbl)[0], )
     elif len(as_tuple(nbl)) == function.ndim:
-        pass
+        nbl = as_tuple(nbl)
     else:
         raise ValueError("nbl must be an integer or tuple of integers of length" +
                          " function.shape.")
 
-    slices = tuple([slice(n, -n) for _, n in zip(range(function.grid.dim),
-                                                 as_tuple(nbl))])
+    slices = tuple([slice(n, -n) for _, n in zip(range(function.grid.dim), nbl)])
     if isinstance(data, dv.Function):
         function.data[slices] = data.data[:]
     else:
         function.data[slices] = data
-    lhs = []
-    rhs = []
-    options = []
 
     if mode == 'reflect' and function.grid.distributor.is_parallel:
         # Check that HALO size is appropriate
@@ -310,6 +454,18 @@ def initialize_function(function, data, nbl, mapper=None, mode='constant',
         if any(np.array(b) < 0):
             raise ValueError("Function `%s` halo is not sufficiently thick." % function)
 
+    return nbl
+
+
+def _padding_eqs(function, nbl, mapper=None, mode='constant'):
+    """
+    The LHSs, RHSs and options of the equations filling the ``nbl`` outer
+    layers of ``function``, followed by those in ``mapper``. See
+    ``initialize_function`` for more info.
+    """
+    lhs = []
+    rhs = []
+    options = []
     for d, n in zip(function.space_dimensions, as_tuple(nbl)):
         dim_l = dv.SubDimension.left(name='abc_%s_l' % d.name, parent=d, thickness=n)
         dim_r = dv.SubDimension.right(name='abc_%s_r' % d.name, parent=d, thickness=n)
@@ -339,10 +495,7 @@ def initialize_function(function, data, nbl, mapper=None, mode='constant',
             else:
                 options.extend([options_extra])
 
-    if all(options is None for i in options):
-        options = None
-
-    assign(lhs, rhs, options=options, name=name)
+    return lhs, rhs, options
 
 
 # Reduction-inducing builtins
@@ -369,9 +522,13 @@ class MPIReduction(object):
         self.op = op
 
     def __enter__(self):
-        i = dv.Dimension(name='i',)
-        self.n = dv.Function(name='n', shape=(1,), dimensions=(i,),
-                             grid=self.grid, dtype=self.dtype)
+        def make():
+            i = dv.Dimension(name='i',)
+            return dv.Function(name='n', shape=(1,), dimensions=(i,),
+                               grid=self.grid, dtype=self.dtype)
+
+        # The reduction buffer is reused across reductions
+        self.n = _cache.fetch(('MPIReduction', self.grid, self.dtype), make)
         self.n.data[0] = 0
         return self
 
@@ -400,14 +557,16 @@ def norm(f, order=2):
     if f.is_TimeFunction and f._time_buffering:
         kwargs[f.time_dim.max_name] = f._time_size - 1
 
-    # Protect SparseFunctions from accessing duplicated (out-of-domain) data,
-    # otherwise we would eventually be summing more than expected
-    p, eqns = f.guard() if f.is_SparseFunction else (f, [])
+    def make(f, n):
+        # Protect SparseFunctions from accessing duplicated (out-of-domain) data,
+        # otherwise we would eventually be summing more than expected
+        p, eqns = f.guard() if f.is_SparseFunction else (f, [])
+        return dv.Operator(eqns + [dv.Inc(n[0], Abs(Pow(p, order)))],
+                           name='norm%d' % order)
 
     with MPIReduction(f) as mr:
-        op = dv.Operator(eqns + [dv.Inc(mr.n[0], Abs(Pow(p, order)))],
-                         name='norm%d' % order)
-        op.apply(**kwargs)
+        op, args = _cached_operator(('norm', order), (f, mr.n), make)
+        op.apply(**args, **kwargs)
 
     v = Pow(mr.v, 1/order)
 
@@ -427,13 +586,15 @@ def sumall(f):
     if f.is_TimeFunction and f._time_buffering:
         kwargs[f.time_dim.max_name] = f._time_size - 1
 
-    # Protect SparseFunctions from accessing duplicated (out-of-domain) data,
-    # otherwise we would eventually be summing more than expected
-    p, eqns = f.guard() if f.is_SparseFunction else (f, [])
+    def make(f, n):
+        # Protect SparseFunctions from accessing duplicated (out-of-domain) data,
+        # otherwise we would eventually be summing more than expected
+        p, eqns = f.guard() if f.is_SparseFunction else (f, [])
+        return dv.Operator(eqns + [dv.Inc(n[0], p)], name='sum')
 
     with MPIReduction(f) as mr:
-        op = dv.Operator(eqns + [dv.Inc(mr.n[0], p)], name='sum')
-        op.apply(**kwargs)
+        op, args = _cached_operator('sum', (f, mr.n), make)
+        op.apply(**args, **kwargs)
 
     return np.float(mr.v)
 
@@ -476,13 +637,15 @@ def inner(f, g):
     if f.is_TimeFunction and f._time_buffering:
         kwargs[f.time_dim.max_name] = f._time_size - 1
 
-    # Protect SparseFunctions from accessing duplicated (out-of-domain) data,
-    # otherwise we would eventually be summing more than expected
-    rhs, eqns = f.guard(f*g) if f.is_SparseFunction else (f*g, [])
+    def make(f, g, n):
+        # Protect SparseFunctions from accessing duplicated (out-of-domain) data,
+        # otherwise we would eventually be summing more than expected
+        rhs, eqns = f.guard(f*g) if f.is_SparseFunction else (f*g, [])
+        return dv.Operator(eqns + [dv.Inc(n[0], rhs)], name='inner')
 
     with MPIReduction(f, g) as mr:
-        op = dv.Operator(eqns + [dv.Inc(mr.n[0], rhs)], name='inner')
-        op.apply(**kwargs)
+        op, args = _cached_operator('inner', (f, g, mr.n), make)
+        op.apply(**args, **kwargs)
 
     return np.float(mr.v)
 
@@ -0,0 +1,386 @@
+"""
+Checkpointing of time-marching Operators, to run adjoint computations over
+arbitrarily long time ranges with bounded memory footprint and recompute cost.
+
+The forward and adjoint (reverse) Operators are driven through the optimal
+binomial checkpointing schedule ("revolve", see Griewank and Walther, ACM TOMS,
+2000), with the state of the forward computation snapshotted into a pool of
+preallocated buffers living in RAM and, optionally, in memory-mapped files.
+"""
+
+from collections import namedtuple
+from math import ceil, sqrt
+import os
+
+import numpy as np
+
+from devito.logger import perf
+from devito.tools import as_tuple, make_tempdir, prod
+
+__all__ = ['Checkpointer', 'revolve', 'revolve_cost']
+
+
+Action = namedtuple('Action', 'type start end')
+Action.__doc__ = """
+A checkpointing action.
+
+* ``('advance', t0, t1)``: run the forward Operator over the steps [t0, t1).
+* ``('takeshot', t, t)``: snapshot the forward state at step t.
+* ``('restore', t, t)``: load the forward state at step t from its snapshot.
+* ``('free', t, t)``: release the snapshot of step t.
+* ``('reverse', t, t + 1)``: run the forward and then the reverse Operator over
+  the step t.
+"""
+
+
+def beta(s, r):
+    """The maximum number of steps reversible with s snapshots and r repetitions."""
+    if r < 0:
+        return 0
+    ret = 1
+    for i in range(1, s + 1):
+        ret = ret*(r + i)//i
+    return ret
+
+
+def nrepetitions(nsteps, nfree):
+    r = 0
+    while beta(nfree + 1, r) < nsteps:
+        r += 1
+    return r
+
+
+def revolve_cost(nsteps, nsnaps):
+    """
+    The number of forward steps, including those performed within the
+    ``('reverse', ...)`` actions, required to reverse ``nsteps`` steps with
+    ``nsnaps`` snapshots under the optimal checkpointing schedule.
+    """
+    nfree = nsnaps - 1
+    if nfree == 0:
+        return nsteps*(nsteps + 1)//2
+    r = nrepetitions(nsteps, nfree)
+    return (r + 1)*nsteps - beta(nfree + 2, r - 1)
+
+
+def revolve(nsteps, nsnaps):
+    """
+    Generate the optimal checkpointing schedule to reverse ``nsteps`` steps with
+    at most ``nsnaps`` snapshots, including that of the initial state.
+
+    Parameters
+    ----------
+    nsteps : int
+        The number of steps.
+    nsnaps : int
+        The maximum number of snapshots simultaneously held.
+
+    Returns
+    -------
+    A generator of Actions.
+
+    Notes
+    -----
+    The snapshots are taken and freed in a last-in-first-out fashion.
+    """
+    if nsnaps < 1:
+        raise ValueError("At least one snapshot is required")
+    if nsteps < 1:
+        return
+    yield Action('takeshot', 0, 0)
+    yield from _revolve(0, nsteps, min(nsnaps, nsteps) - 1)
+    yield Action('free', 0, 0)
+
+
+def _revolve(start, end, nfree):
+    # Precondition: the forward state at `start` is in the workspace as well as
+    # in a snapshot
+    nsteps = end - start
+    if nsteps == 1:
+        yield Action('reverse', start, end)
+    elif nfree == 0:
+        for t in range(end - 1, start - 1, -1):
+            if t < end - 1:
+                yield Action('restore', start, start)
+            if t > start:
+                yield Action('advance', start, t)
+            yield Action('reverse', t, t + 1)
+    else:
+        # Any split in [lo, hi] is optimal
+        r = nrepetitions(nsteps, nfree)
+        hi = min(nsteps - beta(nfree, r - 1), beta(nfree + 1, r - 1), nsteps - 1)
+        split = start + max(hi, 1)
+
+        yield Action('advance', start, split)
+        yield Action('takeshot', split, split)
+        yield from _revolve(split, end, nfree - 1)
+        yield Action('free', split, split)
+        yield Action('restore', start, start)
+        yield from _revolve(start, split, nfree)
+
+
+class SnapshotPool(object):
+
+    """
+    A pool of preallocated snapshots of the state of some TimeFunctions.
+
+    The state consists of the ``time_order`` time slices a TimeFunction must
+    hold to advance in time. The first ``ndisk`` snapshots are backed by a
+    memory-mapped file, the remaining ``nram`` ones by RAM.
+
+    Parameters
+    ----------
+    functions : list of TimeFunction
+        The buffered TimeFunctions whose state is snapshotted.
+    offset : int
+        The time index written by the forward Operator at step 0.
+    nram : int
+        The number of snapshots in RAM.
+    ndisk : int, optional
+        The number of snapshots on disk. Defaults to 0.
+    path : str, optional
+        The directory of the memory-mapped file. Defaults to a temporary
+        directory.
+    """
+
+    def __init__(self, functions, offset, nram, ndisk=0, path=None):
+        dtypes = {f.dtype for f in functions}
+        if len(dtypes) != 1:
+            raise ValueError("The checkpointed TimeFunctions must have the same dtype")
+        self.dtype = dtypes.pop()
+
+        self.functions = functions
+        self.offset = offset
+
+        # Where each TimeFunction's time slice is located within a snapshot
+        self.layout = []
+        size = 0
+        for f in functions:
+            shape = f._data_allocated.shape[1:]
+            for i in range(f.time_order):
+                self.layout.append((f, i, size, shape))
+                size += prod(shape)
+        self.size = size
+
+        self.ndisk = ndisk
+        self.nram = nram
+        self.ram = np.empty((nram, size), dtype=self.dtype)
+        if ndisk > 0:
+            path = path or str(make_tempdir('checkpoints'))
+            self.filename = os.path.join(path, 'snapshots-%d-%d' % (os.getpid(),
+                                                                    id(self)))
+            self.disk = np.memmap(self.filename, dtype=self.dtype, mode='w+',
+                                  shape=(ndisk, size))
+        else:
+            self.filename = None
+            self.disk = None
+
+    def __del__(self):
+        if self.filename is not None:
+            self.disk = None
+            try:
+                os.remove(self.filename)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return self.ndisk + self.nram
+
+    @property
+    def nbytes(self):
+        """The amount of memory, in bytes, taken by a single snapshot."""
+        return self.size*np.dtype(self.dtype).itemsize
+
+    def _snapshot(self, slot):
+        if slot < self.ndisk:
+            return self.disk[slot]
+        else:
+            return self.ram[slot - self.ndisk]
+
+    def _slices(self, slot, t):
+        # Yield pairs (snapshot region, time slice) for the state at step `t`
+        snapshot = self._snapshot(slot)
+        for f, i, start, shape in self.layout:
+            index = (t + self.offset - i) % f._time_size
+            yield (snapshot[start:start + prod(shape)].reshape(shape),
+                   f._data_allocated[index])
+
+    def save(self, slot, t):
+        for snap, data in self._slices(slot, t):
+            np.copyto(snap, data)
+
+    def load(self, slot, t):
+        for snap, data in self._slices(slot, t):
+            np.copyto(data, snap)
+
+
+class Checkpointer(object):
+
+    """
+    Run an adjoint computation, which requires the forward state in reverse
+    time order, through checkpointing.
+
+    Parameters
+    ----------
+    fwd_op : Operator
+        The forward Operator, using buffered TimeFunctions.
+    rev_op : Operator
+        The reverse (adjoint) Operator, reading the forward TimeFunctions.
+    functions : list of TimeFunction
+        The forward TimeFunctions whose state must be checkpointed.
+    nsteps : int
+        The number of timesteps.
+    fwd_args : dict, optional
+        The runtime arguments of ``fwd_op``, as expected by ``Operator.apply``.
+    rev_args : dict, optional
+        The runtime arguments of ``rev_op``, as expected by ``Operator.apply``.
+    nsnaps : int, optional
+        The number of snapshots. Defaults to as many as fit in ``memory``, or
+        to the square root of ``nsteps`` if no ``memory`` is provided.
+    memory : int, optional
+        The RAM budget, in bytes, for the snapshots.
+    disk : int, optional
+        The disk budget, in bytes, for additional snapshots, backed by
+        memory-mapped files. Defaults to 0.
+    path : str, optional
+        The directory of the memory-mapped files.
+
+    Notes
+    -----
+    The runtime arguments of the two Operators are computed only once. Step
+    ``i`` is the iteration ``time_m + i`` of the forward Operator, where
+    ``time_m`` is its default (or user-provided) minimum time iteration.
+
+    Examples
+    --------
+    The gradient computation of a seismic inversion problem, storing at most
+    ten forward wavefields at once, would look like
+
+    >>> cp = Checkpointer(fwd_op, rev_op, [u], nt - 2, nsnaps=10,
+    ...                   fwd_args={'u': u, 'src': src},
+    ...                   rev_args={'u': u, 'v': v, 'rec': rec})  # doctest: +SKIP
+    >>> cp.apply_forward()  # doctest: +SKIP
+    >>> summary = cp.apply_reverse()  # doctest: +SKIP
+    """
+
+    def __init__(self, fwd_op, rev_op, functions, nsteps, fwd_args=None,
+                 rev_args=None, nsnaps=None, memory=None, disk=0, path=None):
+        self.fwd_op = fwd_op
+        self.rev_op = rev_op
+        self.functions = as_tuple(functions)
+        self.nsteps = nsteps
+
+        # Compute the runtime arguments once and for all
+        self.fwd_kwargs = dict(fwd_args or {})
+        self.rev_kwargs = dict(rev_args or {})
+        self.fwd_args, self.fwd_offset = self._arguments(fwd_op, self.fwd_kwargs)
+        self.rev_args, self.rev_offset = self._arguments(rev_op, self.rev_kwargs)
+
+        # Size the snapshot pool
+        snapsize = sum(f.time_order*prod(f._data_allocated.shape[1:])
+                       for f in self.functions)
+        snapsize *= np.dtype(self.functions[0].dtype).itemsize
+        if nsnaps is None:
+            if memory is not None:
+                nsnaps = int(memory // snapsize) + int(disk // snapsize)
+            else:
+                nsnaps = int(ceil(sqrt(nsteps)))
+        nsnaps = max(min(nsnaps, nsteps), 1)
+        ndisk = min(int(disk // snapsize), nsnaps)
+        if memory is not None and (nsnaps - ndisk)*snapsize > memory:
+            raise ValueError("Cannot fit %d snapshots of %d bytes within the memory "
+                             "budget" % (nsnaps - ndisk, snapsize))
+        self.pool = SnapshotPool(self.functions, self.fwd_offset, nsnaps - ndisk,
+                                 ndisk, path)
+
+        self.schedule = revolve(nsteps, nsnaps)
+        self.pending = None
+
+        # The snapshots are used in a last-in-first-out fashion
+        self.slots = {}
+
+        perf("Checkpointer: %d steps, %d snapshots (%d on disk) of %d bytes, "
+             "recompute ratio %.2f" % (nsteps, nsnaps, ndisk, snapsize,
+                                       revolve_cost(nsteps, nsnaps)/nsteps))
+
+    def _arguments(self, op, kwargs):
+        # The default `time_m` only depends on the time Dimension, so the
+        # arguments need processing only once, with both time bounds
+        time_dim = [d for d in op.dimensions if d.min_name == 'time_m'].pop()
+        offset = time_dim._arg_values({}, op._dspace[time_dim], None, **kwargs)['time_m']
+        kwargs = dict(kwargs, time_m=offset, time_M=offset + self.nsteps - 1)
+        return op.arguments(**kwargs), offset
+
+    def _run(self, op, args, offset, start, end):
+        args['time_m'] = start + offset
+        args['time_M'] = end - 1 + offset
+        op._invoke(args)
+
+    def _advance(self, start, end):
+        self._run(self.fwd_op, self.fwd_args, self.fwd_offset, start, end)
+
+    def _reverse(self, start, end):
+        self._run(self.rev_op, self.rev_args, self.rev_offset, start, end)
+
+    def _process(self, action):
+        if action.type == 'advance':
+            self._advance(action.start, action.end)
+        elif action.type == 'takeshot':
+            slot = self.slots[action.start] = len(self.slots)
+            self.pool.save(slot, action.start)
+        elif action.type == 'restore':
+            self.pool.load(self.slots[action.start], action.start)
+        elif action.type == 'free':
+            self.slots.pop(action.start)
+        elif action.type == 'reverse':
+            self._advance(action.start, action.end)
+            self._reverse(action.start, action.end)
+        else:
+            raise ValueError("Unknown action `%s`" % str(action))
+
+    def apply_forward(self):
+        """
+        Run the forward Operator over all timesteps, taking snapshots along
+        the way.
+
+        Returns
+        -------
+        The performance summary of the forward Operator.
+        """
+        with self.fwd_op._profiler.timer_on('apply', comm=self.fwd_args.comm):
+            for action in self.schedule:
+                if action.type == 'reverse':
+                    # The last forward step; the reverse one is left to
+                    # `apply_reverse`
+                    self._advance(action.start, action.end)
+                    self.pending = action
+                    break
+                self._process(action)
+
+        self.fwd_args['time_m'] = self.fwd_offset
+        self.fwd_args['time_M'] = self.fwd_offset + self.nsteps - 1
+        self.fwd_op._postprocess_arguments(self.fwd_args, **self.fwd_kwargs)
+        return self.fwd_op._emit_apply_profiling(self.fwd_args)
+
+    def apply_reverse(self):
+        """
+        Run the reverse Operator over all timesteps, in reverse order,
+        recomputing the forward state from the snapshots as needed. Must be
+        called after ``apply_forward``.
+
+        Returns
+        -------
+        The performance summary of the reverse Operator.
+        """
+        if self.pending is None:
+            raise RuntimeError("`apply_forward` must be called first")
+
+        with self.rev_op._profiler.timer_on('apply', comm=self.rev_args.comm):
+            self._reverse(self.pending.start, self.pending.end)
+            for action in self.schedule:
+                self._process(action)
+
+        self.rev_args['time_m'] = self.rev_offset
+        self.rev_args['time_M'] = self.rev_offset + self.nsteps - 1
+        self.rev_op._postprocess_arguments(self.rev_args, **self.rev_kwargs)
+        return self.rev_op._emit_apply_profiling(self.rev_args)
@@ -1,8 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from hashlib import sha1
-from os import environ, path
+from os import environ, path, replace
 from distutils import version
 from subprocess import DEVNULL, CalledProcessError, check_output, check_call
+from tempfile import NamedTemporaryFile
+from time import time as seq_time
 import platform
 import warnings
 import sys
@@ -16,7 +19,7 @@ from devito.exceptions import CompilationError
 from devito.logger import debug, warning, error
 from devito.parameters import configuration
 from devito.tools import (as_tuple, change_directory, filter_ordered,
-                          memoized_meth, make_tempdir)
+                          memoized_func, memoized_meth, make_tempdir)
 
 __all__ = ['GNUCompiler']
 
@@ -213,11 +216,39 @@ class Compiler(GCCToolchain):
             debug("%s: `%s` was not saved in `%s` as it already exists"
                   % (self, sofile.name, self.get_jit_dir()))
         else:
-            with open(str(sofile), 'wb') as f:
+            # Other processes (e.g., co-located MPI ranks) may be saving, or
+            # even loading, the same shared object, so it must appear atomically
+            with NamedTemporaryFile(dir=str(sofile.parent), prefix=sofile.name,
+                                    delete=False) as f:
                 f.write(binary)
+            replace(f.name, str(sofile))
             debug("%s: `%s` successfully saved in `%s`"
                   % (self, sofile.name, self.get_jit_dir()))
 
+    def bcast(self, soname, comm, root=0):
+        """
+        Broadcast a compiled shared object from the ``root`` rank to all other
+        ranks in ``comm``, which store it within their own jit directory.
+
+        Parameters
+        ----------
+        soname : str
+            Name of the .so file (w/o the suffix).
+        comm : MPI communicator
+            The processes over which the shared object is broadcast.
+        root : int, optional
+            The rank holding the shared object. Defaults to 0.
+        """
+        if comm.rank == root:
+            sofile = self.get_jit_dir().joinpath(soname).with_suffix(self.so_ext)
+            with open(str(sofile), 'rb') as f:
+                binary = f.read()
+        else:
+            binary = None
+        binary = comm.bcast(binary, root=root)
+        if comm.rank != root:
+            self.save(soname, binary)
+
     def make(self, loc, args):
         """Invoke the ``make`` command from within ``loc`` with arguments ``args``."""
         hash_key = sha1((loc + str(args)).encode()).hexdigest()
@@ -298,6 +329,38 @@ class Compiler(GCCToolchain):
 
         return recompiled, src_file
 
+    def jit_compile_async(self, soname, code, executor=None):
+        """
+        Asynchronously JIT compile some source code given as a string.
+
+        This function returns immediately. Since the actual work is carried out
+        by a compiler process, several compilations may proceed in parallel.
+
+        Parameters
+        ----------
+        soname : str
+            Name of the .so file (w/o the suffix).
+        code : str
+            The source code to be JIT compiled.
+        executor : concurrent.futures.Executor, optional
+            The pool performing the compilation. Defaults to a thread pool
+            shared by all JIT compilations.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolving to the values returned by ``jit_compile``, plus the time,
+            in seconds, the compilation took.
+        """
+        def _jit_compile():
+            tic = seq_time()
+            recompiled, src_file = self.jit_compile(soname, code)
+            toc = seq_time()
+            return recompiled, src_file, toc - tic
+
+        executor = executor or jit_executor()
+        return executor.submit(_jit_compile)
+
     def __lookup_cmds__(self):
         self.CC = 'unknown'
         self.CXX = 'unknown'
@@ -461,6 +524,12 @@ class CustomCompiler(Compiler):
         self.MPICXX = environ.get('MPICXX', 'mpicxx')
 
 
+@memoized_func
+def jit_executor():
+    """The default pool of threads performing asynchronous JIT compilations."""
+    return ThreadPoolExecutor()
+
+
 compiler_registry = {
     'custom': CustomCompiler,
     'gnu': GNUCompiler,
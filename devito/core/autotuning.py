@@ -1,17 +1,22 @@
 from collections import OrderedDict
 from itertools import combinations, product
 from functools import total_ordering
+from math import ceil, log2
+import json
+import os
 import resource
+from time import time as seq_time
 
-from devito.archinfo import KNL, KNL7210
+from devito.archinfo import KNL, KNL7210, get_cpu_info
 from devito.ir import Backward, retrieve_iteration_tree
 from devito.logger import perf, warning as _warning
 from devito.mpi.distributed import MPI, MPINeighborhood
-from devito.mpi.routines import MPIMsgEnriched
+from devito.mpi.routines import MPIMsgEnriched, MPIMsgPersistent
 from devito.parameters import configuration
-from devito.passes import BlockDimension
+from devito.passes import (BlockDimension, HaloSteps, NThreadsNested, OmpScheduleKind,
+                           OmpScheduleChunk)
 from devito.symbolics import evaluate
-from devito.tools import filter_ordered, flatten, prod
+from devito.tools import Signer, filter_ordered, flatten, make_tempdir, prod
 
 __all__ = ['autotune']
 
@@ -41,6 +46,30 @@ def autotune(operator, args, level, mode):
         raise ValueError("The accepted `(level, mode)` combinations are `%s`; "
                          "provided `%s` instead" % (accepted, key))
 
+    # Attempt fetching the tuned arguments from the autotuning database
+    if configuration['autotuning-db']:
+        db = TuningDB(operator, args, level)
+        tuned, warmstart = db.lookup()
+        # In `runtime` mode, the autotuning runs perform halo exchanges, so all
+        # MPI ranks must perform the same number of them. However, the MPI ranks
+        # may disagree on whether the database hits (e.g., their local extents
+        # fall in different buckets), so either all skip autotuning or none does.
+        # For the same reason, warm-starting, which prunes the block shapes
+        # based on a per-rank record, isn't used
+        comm = args.comm
+        if comm is not MPI.COMM_NULL and mode == 'runtime':
+            if not comm.allreduce(tuned is not None, op=MPI.LAND):
+                tuned = None
+            warmstart = None
+        if tuned is not None:
+            log("fetched <%s> from database" %
+                ','.join('%s=%s' % i for i in tuned.items()))
+            args.update(tuned)
+            return args, {'runs': 0, 'tpr': 0, 'tuned': tuned}
+    else:
+        db = None
+        warmstart = None
+
     # We get passed all the arguments, but the cfunction only requires a subset
     at_args = OrderedDict([(p.name, args[p.name]) for p in operator.parameters])
 
@@ -55,6 +84,9 @@ def autotune(operator, args, level, mode):
         at_args.update({k: output[k]._C_make_dataobj(v) for k, v in copies.items()})
 
     # Disable halo exchanges through MPI_PROC_NULL
+    # WARNING: `msgs` keeps references to the persistent requests, which must
+    # remain alive throughout autotuning
+    msgs = []
     if mode in ['preemptive', 'destructive']:
         for p in operator.parameters:
             if isinstance(p, MPINeighborhood):
@@ -66,13 +98,24 @@ def autotune(operator, args, level, mode):
                 for i in at_args[p.name]:
                     i.fromrank = MPI.PROC_NULL
                     i.torank = MPI.PROC_NULL
+            elif isinstance(p, MPIMsgPersistent):
+                msgs.append(MPIMsgPersistent(p.name, p.function, p.halos, p.fixed))
+                at_args.update(msgs[-1]._arg_defaults(procnull=True))
 
     roots = [operator.body] + [i.root for i in operator._func_table.values()]
-    trees = filter_ordered(retrieve_iteration_tree(roots), key=lambda i: i.root)
+    # One Iteration tree per root, preferably the one with the most BlockDimensions
+    trees = retrieve_iteration_tree(roots)
+    trees = [max([i for i in trees if i.root is root],
+                 key=lambda i: len([j for j in i if isinstance(j.dim, BlockDimension)]))
+             for root in filter_ordered(i.root for i in trees)]
 
     # Detect the time-stepping Iteration; shrink its iteration range so that
-    # each autotuning run only takes a few iterations
-    steppers = {i for i in flatten(trees) if i.dim.is_Time}
+    # each autotuning run only takes a few iterations. With temporal blocking,
+    # the time Iteration is split into a loop over time tiles and loops within
+    # the time tiles, which all share the same iteration range
+    steppers = filter_ordered([i for i in flatten(trees) if i.dim.is_Time],
+                              key=lambda i: (i.dim.root, i.direction))
+    steppers = set(steppers)
     if len(steppers) == 0:
         stepper = None
         timesteps = 1
@@ -85,6 +128,14 @@ def autotune(operator, args, level, mode):
         warning("cannot perform autotuning unless there is one time loop; skipping")
         return args, {}
 
+    # The search strategy through which the tunable arguments are explored
+    try:
+        search = search_strategies[options['strategy']]
+    except KeyError:
+        raise ValueError("Unknown autotuning strategy `%s`; accepted: `%s`"
+                         % (options['strategy'], list(search_strategies)))
+    budget = Budget(options['budget-runs'], options['budget-time'])
+
     # Perform autotuning
     timings = {}
     for n, tree in enumerate(trees):
@@ -93,9 +144,14 @@ def autotune(operator, args, level, mode):
         # Tunable arguments
         try:
             tunable = []
-            tunable.append(generate_block_shapes(blockable, args, level))
+            block_shapes = generate_block_shapes(blockable, args, level, timesteps)
+            if warmstart:
+                block_shapes = neighbour_block_shapes(block_shapes, warmstart)
+            tunable.append(block_shapes)
             tunable.append(generate_nthreads(operator.nthreads, args, level))
-            tunable = list(product(*tunable))
+            tunable.append(generate_parallel_knobs(operator, args, level))
+            tunable.append(generate_halo_steps(operator, args, level, mode))
+            tunable = [(bs, nt + pk + hs) for bs, nt, pk, hs in product(*tunable)]
         except ValueError:
             # Some arguments are compulsory, otherwise autotuning is skipped
             continue
@@ -103,17 +159,29 @@ def autotune(operator, args, level, mode):
         # Symbolic number of loop-blocking blocks per thread
         nblocks_per_thread = calculate_nblocks(tree, blockable) / operator.nthreads
 
-        for bs, nt in tunable:
+        # Cache footprint model, used by the search strategies to prune the
+        # tunable arguments
+        footprint = Footprint(operator, tree, blockable, args)
+
+        explored = {}
+        for bs, nt in search(tunable, explored, footprint):
             # Can we safely autotune over the given time range?
             if not check_time_bounds(stepper, at_args, args, mode):
                 break
 
+            # Stop if the autotuning budget has been exhausted
+            if budget.exhausted:
+                warning("budget exhausted; stopping")
+                break
+
             # Update `at_args` to use the new tunable arguments
             run = [(k, v) for k, v in bs + nt if k in at_args]
             at_args.update(dict(run))
 
-            # Drop run if not at least one block per thread
-            if not configuration['develop-mode'] and nblocks_per_thread.subs(at_args) < 1:
+            # Drop run if not at least one block per thread, unless the blocks
+            # are run sequentially, as with temporal blocking
+            if not configuration['develop-mode'] and not tree[0].is_Sequential and \
+                    nblocks_per_thread.subs(at_args) < 1:
                 continue
 
             # Make sure we remain within stack bounds, otherwise skip run
@@ -132,6 +200,8 @@ def autotune(operator, args, level, mode):
             elapsed = operator._profiler.timer.total
 
             timings.setdefault(nt, OrderedDict()).setdefault(n, {})[bs] = elapsed
+            explored[(bs, nt)] = elapsed
+            budget.consume()
             log("run <%s> took %f (s) in %d timesteps" %
                 (','.join('%s=%s' % i for i in run), elapsed, timesteps))
 
@@ -162,6 +232,10 @@ def autotune(operator, args, level, mode):
     # Update the argument list with the tuned arguments
     args.update(best)
 
+    # Make the tuned arguments available to future runs, even across processes
+    if db is not None:
+        db.store(best)
+
     # In `runtime` mode, some timesteps have been executed already, so we must
     # adjust the time range
     finalize_time_bounds(stepper, at_args, args, mode)
@@ -269,7 +343,13 @@ def calculate_nblocks(tree, blockable):
     return nblocks
 
 
-def generate_block_shapes(blockable, args, level):
+def generate_block_shapes(blockable, args, level, timesteps=None):
+    if not blockable:
+        raise ValueError
+
+    # The time tiles, if any, are tuned along with the space blocks
+    tiles = [d for d in blockable if d.root.is_Time]
+    blockable = [d for d in blockable if d not in tiles]
     if not blockable:
         raise ValueError
 
@@ -331,9 +411,26 @@ def generate_block_shapes(blockable, args, level):
     # Normalize
     ret = [tuple((k.name, v) for k, v in bs) for bs in ret]
 
+    # Generate the time tiles, which mustn't exceed the timesteps per run
+    if tiles:
+        sizes = [v for v in options['blocksize-time'] if v <= (timesteps or v)]
+        sizes = sizes or [min(options['blocksize-time'])]
+        ret = [bs + tuple((d.step.name, v) for d in tiles)
+               for bs, v in product(ret, sizes)]
+
     return ret
 
 
+def neighbour_block_shapes(block_shapes, tuned):
+    """
+    Restrict ``block_shapes`` to those within a factor two, along each
+    Dimension, from the block shape in ``tuned``.
+    """
+    ret = [bs for bs in block_shapes
+           if all(k in tuned and v // 2 <= tuned[k] <= v * 2 for k, v in bs)]
+    return ret or block_shapes
+
+
 def generate_nthreads(nthreads, args, level):
     if nthreads == 1:
         return [((None, 1),)]
@@ -366,11 +463,260 @@ def generate_nthreads(nthreads, args, level):
     return ret
 
 
+class Footprint(object):
+
+    """
+    A model for the amount of data, in bytes, that a thread accesses when
+    computing a single block, given the (level-0) block shape.
+
+    The block is assumed to be enlarged by the stencil radius, as given by the
+    halo of the Functions, along each side of each space Dimension. Space
+    Dimensions that are not blocked contribute with their entire extent.
+    """
+
+    def __init__(self, operator, tree, blockable, args):
+        functions = [i for i in operator.input if i.is_Function]
+        self.nfunctions = len(functions)
+        self.itemsize = operator._dtype().itemsize
+        self.radius = max([max(h) for i in functions
+                           for d, h in zip(i.dimensions, i.halo) if d.is_Space] or [0])
+
+        self.extents = {}
+        for i in tree:
+            d = i.dim.root
+            if d.is_Space and d.max_name in args and d.min_name in args:
+                self.extents[d] = args[d.max_name] - args[d.min_name] + 1
+        self.mapper = {d.step.name: d.root for d in blockable
+                       if d.root.is_Space and not isinstance(d.parent, BlockDimension)}
+
+    def __call__(self, candidate):
+        bs, _ = candidate
+        extents = dict(self.extents)
+        for k, v in bs:
+            if k in self.mapper:
+                d = self.mapper[k]
+                extents[d] = min(v, extents.get(d, v))
+        npoints = prod(v + 2*self.radius for v in extents.values())
+        return int(self.nfunctions*npoints*self.itemsize)
+
+
+class Budget(object):
+
+    """
+    The autotuning budget, expressed as a maximum number of runs and/or
+    a maximum amount of time, in seconds. None stands for unlimited.
+    """
+
+    def __init__(self, runs=None, time=None):
+        self.runs = runs
+        self.time = time
+        self.consumed = 0
+        self.start = seq_time()
+
+    def consume(self):
+        self.consumed += 1
+
+    @property
+    def exhausted(self):
+        if self.runs is not None and self.consumed >= self.runs:
+            return True
+        if self.time is not None and seq_time() - self.start >= self.time:
+            return True
+        return False
+
+
+def search_exhaustive(candidates, explored, footprint):
+    """
+    Try all of the candidate tunable arguments, in order.
+    """
+    for i in candidates:
+        yield i
+
+
+def search_descent(candidates, explored, footprint):
+    """
+    Coordinate descent over the candidate tunable arguments.
+
+    Only the candidates whose cache footprint fits within
+    ``options['footprint-limit']`` are considered. The search starts from the
+    one with the largest footprint, and then repeatedly moves to the fastest
+    neighbour -- a candidate differing in exactly one tunable argument --
+    until no neighbour improves on the current candidate.
+    """
+    if not candidates:
+        return
+
+    limit = options['footprint-limit']
+    if limit is None:
+        # Half of the L2 cache, leaving room for e.g. hardware prefetching
+        limit = get_cpu_info()['cache'].get(2, 2**20) // 2
+    fitting = [i for i in candidates if footprint(i) <= limit]
+    fitting = fitting or [min(candidates, key=footprint)]
+
+    def neighbours(c0):
+        c0 = dict(c0[0] + c0[1])
+        for c1 in fitting:
+            items = dict(c1[0] + c1[1])
+            if items.keys() == c0.keys() and \
+                    len([k for k in items if items[k] != c0[k]]) == 1:
+                yield c1
+
+    current = max(fitting, key=footprint)
+    visited = {current}
+    yield current
+    while True:
+        for i in neighbours(current):
+            if i not in explored:
+                yield i
+        tried = [i for i in fitting if i in explored]
+        if not tried:
+            return
+        best = min(tried, key=explored.get)
+        if best in visited:
+            return
+        visited.add(best)
+        current = best
+
+
+search_strategies = {
+    'exhaustive': search_exhaustive,
+    'descent': search_descent
+}
+"""The available autotuning search strategies."""
+
+
+class TuningDB(object):
+
+    """
+    A persistent, on-disk database of autotuning results.
+
+    The tuned arguments of an Operator are recorded based on the Operator's
+    generated code, the platform, the number of threads, the autotuning level,
+    and the problem size, the latter being bucketed by rounding up the extent
+    of each space Dimension to the next power of two. A record for a different
+    problem size is used to warm-start autotuning.
+
+    Parameters
+    ----------
+    operator : Operator
+        The Operator being autotuned.
+    args : dict_like
+        The runtime arguments with which `operator` is run.
+    level : str
+        The autotuning aggressiveness.
+    """
+
+    def __init__(self, operator, args, level):
+        nthreads = operator.nthreads
+        if nthreads != 1:
+            nthreads = args[nthreads.name]
+        items = [operator._soname, str(configuration['platform']), str(nthreads),
+                 str(level)]
+        self.path = make_tempdir('autotuning').joinpath('%s.json' % Signer._sign(items))
+
+        dims = sorted({d.root for d in operator.dimensions if d.is_Space},
+                      key=lambda d: d.name)
+        self.bucket = tuple(bucket(args[d.max_name] - args[d.min_name] + 1)
+                            for d in dims if d.max_name in args and d.min_name in args)
+
+    def _load(self):
+        try:
+            with open(str(self.path), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self):
+        """
+        Return a 2-tuple ``(tuned, warmstart)``: the tuned arguments for the
+        current problem size, if any, and otherwise those recorded for the
+        most similar problem size, if any.
+        """
+        records = self._load()
+        try:
+            return records[json.dumps(self.bucket)], None
+        except KeyError:
+            pass
+
+        def distance(key):
+            other = json.loads(key)
+            if len(other) != len(self.bucket):
+                return float('inf')
+            return sum(abs(log2(i) - log2(j)) for i, j in zip(other, self.bucket))
+
+        candidates = [k for k in records if distance(k) < float('inf')]
+        if candidates:
+            return None, records[min(candidates, key=distance)]
+        else:
+            return None, None
+
+    def store(self, tuned):
+        records = self._load()
+        records[json.dumps(self.bucket)] = {k: int(v) for k, v in tuned.items()}
+
+        # Write to a temporary file first and then atomically move it, so that
+        # concurrent processes never observe partial files
+        tmpfile = self.path.with_suffix('.%d.tmp' % os.getpid())
+        with open(str(tmpfile), 'w') as f:
+            json.dump(records, f)
+        os.replace(str(tmpfile), str(self.path))
+
+
+def bucket(n):
+    """Round up ``n`` to the next power of two."""
+    return 2**ceil(log2(max(int(n), 1)))
+
+
+def generate_parallel_knobs(operator, args, level):
+    """
+    Generate the combinations of OpenMP loop schedule and nested parallelism,
+    provided the Operator exposes them as runtime arguments (see the
+    `par-tunable` DLE option).
+    """
+    knobs = {type(i).__base__: i for i in operator.input
+             if isinstance(i, (OmpScheduleKind, OmpScheduleChunk, NThreadsNested))}
+    if OmpScheduleKind not in knobs or level == 'basic':
+        return [()]
+
+    kind = knobs[OmpScheduleKind].name
+    chunk = knobs[OmpScheduleChunk].name
+    ret = [((kind, k), (chunk, c)) for k, c in options['schedules']]
+
+    # Also try switching off nested parallelism, if any
+    if NThreadsNested in knobs and level == 'max':
+        name = knobs[NThreadsNested].name
+        cases = filter_ordered([args[name], 1])
+        ret = [i + ((name, n),) for i, n in product(ret, cases)]
+
+    return ret
+
+
+def generate_halo_steps(operator, args, level, mode):
+    """
+    Generate the number of timesteps between two halo exchanges, provided the
+    Operator uses deep halo exchanges (see the `deep` MPI mode).
+    """
+    # Outside of `runtime` mode the halo exchanges are disabled, so the
+    # autotuner would only measure the cost of the redundant computation
+    knobs = [i for i in operator.input if isinstance(i, HaloSteps)]
+    if not knobs or mode != 'runtime' or level == 'basic':
+        return [()]
+
+    return [((i.name, n),) for i in knobs for n in range(1, i.max_value + 1)]
+
+
 options = {
     'squeezer': 4,
     'blocksize-l0': (8, 16, 24, 32, 64, 96, 128),
     'blocksize-l1': (8, 16, 32),
-    'stack_limit': resource.getrlimit(resource.RLIMIT_STACK)[0] / 4
+    'blocksize-time': (2, 4, 8),
+    'stack_limit': resource.getrlimit(resource.RLIMIT_STACK)[0] / 4,
+    'schedules': ((OmpScheduleKind.DYNAMIC, 1), (OmpScheduleKind.DYNAMIC, 4),
+                  (OmpScheduleKind.STATIC, 0), (OmpScheduleKind.GUIDED, 1)),
+    'strategy': 'exhaustive',
+    'footprint-limit': None,
+    'budget-runs': None,
+    'budget-time': None
 }
 """Autotuning options."""
 
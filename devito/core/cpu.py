@@ -4,8 +4,9 @@ from devito.core.operator import OperatorCore
 from devito.exceptions import InvalidOperator
 from devito.ir.clusters import Toposort
 from devito.passes.clusters import Lift, fuse, scalarize, eliminate_arrays, rewrite
-from devito.passes.iet import (DataManager, Blocker, Ompizer, avoid_denormals,
-                               optimize_halospots, mpiize, loop_wrapping, hoist_prodders)
+from devito.passes.iet import (DataManager, Blocker, TemporalBlocker, Ompizer,
+                               avoid_denormals, optimize_halospots, mpiize, loop_wrapping,
+                               hoist_prodders)
 from devito.tools import as_tuple, generator, timed_pass
 
 __all__ = ['CPU64NoopOperator', 'CPU64Operator', 'Intel64Operator', 'PowerOperator',
@@ -76,12 +77,16 @@ class CPU64Operator(CPU64NoopOperator):
             mpiize(graph, mode=options['mpi'])
 
         # Tiling
+        if options['blocktime'] and not options['mpi']:
+            tblocker = TemporalBlocker(options['blockinner'])
+            tblocker.make_blocking(graph)
         blocker = Blocker(options['blockinner'],
                           options['blocklevels'] or cls.BLOCK_LEVELS)
         blocker.make_blocking(graph)
 
         # Shared-memory and SIMD-level parallelism
-        ompizer = Ompizer()
+        ompizer = Ompizer(tunable=options['par-tunable'],
+                          collapse=options['par-collapse'])
         ompizer.make_simd(graph, simd_reg_size=platform.simd_reg_size)
         if options['openmp']:
             ompizer.make_parallel(graph)
@@ -111,14 +116,17 @@ class CustomOperator(CPU64Operator):
 
         blocker = Blocker(options['blockinner'],
                           options['blocklevels'] or cls.BLOCK_LEVELS)
+        tblocker = TemporalBlocker(options['blockinner'])
 
-        ompizer = Ompizer()
+        ompizer = Ompizer(tunable=options['par-tunable'],
+                          collapse=options['par-collapse'])
 
         return {
             'denormals': partial(avoid_denormals),
             'optcomms': partial(optimize_halospots),
             'wrapping': partial(loop_wrapping),
             'blocking': partial(blocker.make_blocking),
+            'tblocking': partial(tblocker.make_blocking),
             'openmp': partial(ompizer.make_parallel),
             'mpi': partial(mpiize, mode=options['mpi']),
             'simd': partial(ompizer.make_simd, simd_reg_size=platform.simd_reg_size),
@@ -3,3 +3,5 @@ from devito.data.allocators import *  # noqa
 from devito.data.decomposition import *  # noqa
 from devito.data.data import *  # noqa
 from devito.data.utils import *  # noqa
+from devito.data.compression import *  # noqa
+from devito.data.streaming import *  # noqa
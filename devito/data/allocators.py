@@ -3,6 +3,7 @@ from functools import reduce
 from operator import mul
 import mmap
 import os
+import tempfile
 
 import numpy as np
 import ctypes
@@ -13,8 +14,8 @@ from devito.parameters import configuration
 from devito.tools import dtype_to_ctype
 
 __all__ = ['ALLOC_FLAT', 'ALLOC_NUMA_LOCAL', 'ALLOC_NUMA_ANY',
-           'ALLOC_KNL_MCDRAM', 'ALLOC_KNL_DRAM', 'ALLOC_GUARD',
-           'default_allocator']
+           'ALLOC_KNL_MCDRAM', 'ALLOC_KNL_DRAM', 'ALLOC_GUARD', 'ALLOC_MMAP',
+           'MmapAllocator', 'default_allocator']
 
 
 class MemoryAllocator(object):
@@ -25,6 +26,10 @@ class MemoryAllocator(object):
 
     is_Posix = False
     is_Numa = False
+    is_Mmap = False
+
+    zeroed = False
+    """True if the allocated memory is guaranteed to be zero-initialized."""
 
     _attempted_init = False
     lib = None
@@ -307,6 +312,80 @@ class NumaAllocator(MemoryAllocator):
         return self._node == 'local'
 
 
+class MmapAllocator(MemoryAllocator):
+
+    """
+    Memory allocator backed by memory-mapped files, for data too large to
+    fit in RAM. The operating system pages the data in and out of the file
+    on demand; use a MmapStreamer to write back and prefetch chunks of data
+    asynchronously.
+
+    The files are unlinked as soon as they are mapped, so no file is left
+    behind, not even upon abnormal termination.
+
+    Parameters
+    ----------
+    path : str, optional
+        The directory of the backing files, ideally on a fast local disk.
+        Defaults to the current working directory. Note that the temporary
+        directory isn't a sensible default, as it is often memory-backed
+        (e.g., tmpfs).
+    """
+
+    is_Mmap = True
+
+    zeroed = True
+
+    @classmethod
+    def initialize(cls):
+        handle = find_library('c')
+        if handle is None:
+            return
+        lib = ctypes.CDLL(handle, use_errno=True)
+        lib.mmap.restype = ctypes.c_void_p
+        lib.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int,
+                             ctypes.c_int, ctypes.c_int, ctypes.c_long]
+        lib.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+        lib.msync.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+        lib.madvise.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+        cls.lib = lib
+
+    def __init__(self, path=None):
+        super(MmapAllocator, self).__init__()
+        self._path = path
+
+    @property
+    def path(self):
+        return self._path or os.getcwd()
+
+    def _alloc_C_libcall(self, size, ctype):
+        if not self.available():
+            raise RuntimeError("Couldn't find `libc`'s `mmap` to allocate memory")
+
+        # Work around the fact that mmap fails when the size is 0
+        nbytes = max(size * ctypes.sizeof(ctype), 1)
+
+        fd, filename = tempfile.mkstemp(prefix='devito-', suffix='.mmap', dir=self.path)
+        try:
+            os.unlink(filename)
+            os.ftruncate(fd, nbytes)
+            c_pointer = self.lib.mmap(None, nbytes, mmap.PROT_READ | mmap.PROT_WRITE,
+                                      mmap.MAP_SHARED, fd, 0)
+        except OSError:
+            os.close(fd)
+            return None, None
+        if c_pointer in (None, ctypes.c_void_p(-1).value):
+            os.close(fd)
+            return None, None
+
+        c_pointer = ctypes.c_void_p(c_pointer)
+        return c_pointer, (c_pointer, nbytes, fd)
+
+    def free(self, c_pointer, nbytes, fd):
+        self.lib.munmap(c_pointer, nbytes)
+        os.close(fd)
+
+
 class ExternalAllocator(MemoryAllocator):
 
     """
@@ -363,6 +442,7 @@ ALLOC_KNL_DRAM = NumaAllocator(0)
 ALLOC_KNL_MCDRAM = NumaAllocator(1)
 ALLOC_NUMA_ANY = NumaAllocator('any')
 ALLOC_NUMA_LOCAL = NumaAllocator('local')
+ALLOC_MMAP = MmapAllocator()
 
 
 def infer_knl_mode():
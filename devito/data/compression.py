@@ -0,0 +1,303 @@
+"""
+Codecs to compress the time slices of a saved wavefield, as well as a container
+storing such compressed time slices.
+"""
+
+from time import time as seq_time
+import bz2
+import lzma
+import zlib
+
+import numpy as np
+
+try:
+    import lz4.frame as lz4
+except ImportError:
+    lz4 = None
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+try:
+    import zfpy
+except ImportError:
+    zfpy = None
+
+__all__ = ['ShuffleCodec', 'QuantizeCodec', 'ZFPCodec', 'CompressedStorage',
+           'codec_registry']
+
+
+def _zstd_compress(data, level):
+    return zstd.ZstdCompressor(level=level).compress(data)
+
+
+def _zstd_decompress(data):
+    return zstd.ZstdDecompressor().decompress(data)
+
+
+compressors = {
+    'zlib': (lambda data, level: zlib.compress(data, level), zlib.decompress),
+    'bz2': (lambda data, level: bz2.compress(data, level), bz2.decompress),
+    'lzma': (lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+    'lz4': (lambda data, level: lz4.compress(data, compression_level=level),
+            lambda data: lz4.decompress(data)),
+    'zstd': (_zstd_compress, _zstd_decompress)
+}
+"""
+The lossless compressors of a byte stream, as `(compress, decompress)` pairs.
+"""
+
+optional_compressors = {'lz4': lambda: lz4, 'zstd': lambda: zstd}
+
+
+class Codec(object):
+
+    """
+    Abstract base class for the codecs.
+
+    A codec turns a numpy array into a `bytes` payload, and vice versa.
+    """
+
+    lossless = True
+    """True if the decoded arrays are bitwise identical to the encoded ones."""
+
+    def encode(self, array):
+        raise NotImplementedError
+
+    def decode(self, payload, shape, dtype):
+        raise NotImplementedError
+
+
+class ShuffleCodec(Codec):
+
+    """
+    A lossless codec: byte-shuffle followed by a general-purpose compressor.
+
+    Byte-shuffling groups together the i-th bytes of all of the array entries,
+    which, for smooth floating-point fields, greatly increases the redundancy
+    exploited by the compressor.
+
+    Parameters
+    ----------
+    compressor : str, optional
+        The compressor, among 'zlib', 'bz2', 'lzma', 'lz4', and 'zstd'. The
+        latter two require the `lz4` and `zstandard` packages, respectively.
+        Defaults to 'zlib'.
+    level : int, optional
+        The compression level. Defaults to 1, that is favour speed over
+        compression ratio.
+    """
+
+    def __init__(self, compressor='zlib', level=1):
+        if compressor not in compressors:
+            raise ValueError("Unknown compressor `%s`; accepted: `%s`"
+                             % (compressor, list(compressors)))
+        if compressor in optional_compressors and \
+                optional_compressors[compressor]() is None:
+            raise ValueError("Compressor `%s` requires a package which couldn't "
+                             "be imported" % compressor)
+        self.compressor = compressor
+        self.level = level
+
+    def __repr__(self):
+        return "ShuffleCodec[%s:%d]" % (self.compressor, self.level)
+
+    def encode(self, array):
+        array = np.ascontiguousarray(array)
+        shuffled = array.view(np.uint8).reshape(-1, array.itemsize).T.tobytes()
+        compress, _ = compressors[self.compressor]
+        return compress(shuffled, self.level)
+
+    def decode(self, payload, shape, dtype):
+        _, decompress = compressors[self.compressor]
+        shuffled = np.frombuffer(decompress(payload), dtype=np.uint8)
+        itemsize = np.dtype(dtype).itemsize
+        return shuffled.reshape(itemsize, -1).T.copy().view(dtype).reshape(shape)
+
+
+class QuantizeCodec(Codec):
+
+    """
+    A lossy codec with an absolute error bound.
+
+    The array entries are quantized onto a uniform grid of spacing
+    ``2*tolerance``, so that the pointwise error does not exceed ``tolerance``
+    (up to floating-point rounding). The quantized values are stored as the
+    narrowest integer type capable of representing them, and then compressed
+    losslessly via a ShuffleCodec.
+
+    Parameters
+    ----------
+    tolerance : float
+        The maximum absolute error.
+    compressor : str, optional
+        The compressor of the quantized values. Defaults to 'zlib'.
+    level : int, optional
+        The compression level. Defaults to 1.
+    """
+
+    lossless = False
+
+    def __init__(self, tolerance, compressor='zlib', level=1):
+        if tolerance <= 0:
+            raise ValueError("`tolerance` must be positive")
+        self.tolerance = tolerance
+        self.shuffler = ShuffleCodec(compressor, level)
+
+    def __repr__(self):
+        return "QuantizeCodec[%g]" % self.tolerance
+
+    def encode(self, array):
+        quantized = np.rint(np.asarray(array, dtype=np.float64) / (2*self.tolerance))
+        bound = np.abs(quantized).max() if quantized.size else 0
+        for itype in (np.int8, np.int16, np.int32, np.int64):
+            if bound <= np.iinfo(itype).max:
+                break
+        header = np.dtype(itype).char.encode()
+        return header + self.shuffler.encode(quantized.astype(itype))
+
+    def decode(self, payload, shape, dtype):
+        itype = np.dtype(payload[:1].decode())
+        quantized = self.shuffler.decode(payload[1:], shape, itype)
+        return (quantized * (2*self.tolerance)).astype(dtype)
+
+
+class ZFPCodec(Codec):
+
+    """
+    A lossy codec based on the ZFP floating-point compressor, which must be
+    installed (`zfpy` package).
+
+    Parameters
+    ----------
+    tolerance : float, optional
+        Fixed-accuracy mode -- the maximum absolute error.
+    rate : float, optional
+        Fixed-rate mode -- the number of compressed bits per value.
+
+    Notes
+    -----
+    Exactly one of ``tolerance`` and ``rate`` must be provided.
+    """
+
+    lossless = False
+
+    def __init__(self, tolerance=None, rate=None):
+        if zfpy is None:
+            raise ValueError("ZFPCodec requires the `zfpy` package, which "
+                             "couldn't be imported")
+        if (tolerance is None) == (rate is None):
+            raise ValueError("Exactly one of `tolerance` and `rate` must be provided")
+        self.tolerance = tolerance
+        self.rate = rate
+
+    def __repr__(self):
+        if self.tolerance is not None:
+            return "ZFPCodec[tolerance=%g]" % self.tolerance
+        else:
+            return "ZFPCodec[rate=%g]" % self.rate
+
+    def encode(self, array):
+        array = np.ascontiguousarray(array)
+        if self.tolerance is not None:
+            return zfpy.compress_numpy(array, tolerance=self.tolerance)
+        else:
+            return zfpy.compress_numpy(array, rate=self.rate)
+
+    def decode(self, payload, shape, dtype):
+        return zfpy.decompress_numpy(payload).astype(dtype).reshape(shape)
+
+
+codec_registry = {
+    'shuffle': ShuffleCodec,
+    'quantize': QuantizeCodec,
+    'zfp': ZFPCodec
+}
+"""The available codecs."""
+
+
+class CompressedStorage(object):
+
+    """
+    A sequence of time slices, each of which is compressed upon write and
+    decompressed upon read.
+
+    Parameters
+    ----------
+    shape : tuple of ints
+        The shape of a time slice.
+    dtype : data-type
+        The data type of a time slice.
+    codec : Codec
+        The codec used to compress the time slices.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from devito.data import CompressedStorage, ShuffleCodec
+    >>> storage = CompressedStorage((4, 4), np.float32, ShuffleCodec())
+    >>> storage[0] = np.zeros((4, 4), dtype=np.float32)
+    >>> storage[0].shape
+    (4, 4)
+    >>> storage.ratio > 1
+    True
+    """
+
+    def __init__(self, shape, dtype, codec):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.codec = codec
+
+        self._slices = {}
+
+        # Instrumentation
+        self.timings = {'encode': 0., 'decode': 0.}
+
+    def __repr__(self):
+        return "CompressedStorage<%s, ntimes=%d, ratio=%.2f>" % (self.codec, len(self),
+                                                                 self.ratio)
+
+    def __len__(self):
+        return len(self._slices)
+
+    def __contains__(self, t):
+        return t in self._slices
+
+    def __setitem__(self, t, array):
+        if array.shape != self.shape:
+            raise ValueError("Expected time slice of shape `%s`, got `%s` instead"
+                             % (self.shape, array.shape))
+        tic = seq_time()
+        self._slices[t] = self.codec.encode(array.astype(self.dtype, copy=False))
+        self.timings['encode'] += seq_time() - tic
+
+    def __getitem__(self, t):
+        tic = seq_time()
+        array = self.codec.decode(self._slices[t], self.shape, self.dtype)
+        self.timings['decode'] += seq_time() - tic
+        return array
+
+    @property
+    def times(self):
+        """The time indices of the stored time slices, in increasing order."""
+        return tuple(sorted(self._slices))
+
+    @property
+    def nbytes(self):
+        """The amount of memory, in bytes, taken by the compressed time slices."""
+        return sum(len(i) for i in self._slices.values())
+
+    @property
+    def nbytes_uncompressed(self):
+        """The amount of memory, in bytes, the time slices would take uncompressed."""
+        return len(self) * int(np.prod(self.shape)) * self.dtype.itemsize
+
+    @property
+    def ratio(self):
+        """The compression ratio."""
+        try:
+            return self.nbytes_uncompressed / self.nbytes
+        except ZeroDivisionError:
+            return 1.
@@ -183,43 +183,51 @@ class Data(np.ndarray):
             local_val = super(Data, self).__getitem__(data_idx)
             self._index_stash = None
 
-            comm = self._distributor.comm
-            rank = comm.Get_rank()
-
-            owners, send, global_si, local_si = \
-                mpi_index_maps(loc_idx, local_val.shape, self._distributor.topology,
-                               self._distributor.all_coords, comm)
+            # The block of the global view held by each MPI rank, before flipping
+            glb_idx = self._normalize_index(glb_idx)
+            box, extent, decomposition = self._view_box(glb_idx, local_val)
 
             retval = Data(local_val.shape, local_val.dtype.type,
-                          decomposition=local_val._decomposition,
-                          modulo=(False,)*len(local_val.shape))
-            it = np.nditer(owners, flags=['refs_ok', 'multi_index'])
-            # Iterate over each element of data
-            while not it.finished:
-                index = it.multi_index
-                if rank == owners[index] and rank == send[index]:
-                    # Current index and destination index are on the same rank
-                    loc_ind = local_si[index]
-                    send_ind = local_si[global_si[index]]
-                    retval.data[send_ind] = local_val.data[loc_ind]
-                elif rank == owners[index]:
-                    # Current index is on this rank and hence need to send
-                    # the data to the appropriate rank
-                    loc_ind = local_si[index]
-                    send_rank = send[index]
-                    send_ind = global_si[index]
-                    send_val = local_val.data[loc_ind]
-                    reqs = comm.isend([send_ind, send_val], dest=send_rank)
-                    reqs.wait()
-                elif rank == send[index]:
-                    # Current rank is required to receive data from this index
-                    recval = comm.irecv(source=owners[index])
-                    local_dat = recval.wait()
-                    loc_ind = local_si[local_dat[0]]
-                    retval.data[loc_ind] = local_dat[1]
+                          decomposition=decomposition,
+                          modulo=(False,)*len(local_val.shape),
+                          distributor=self._distributor)
+            flip = [isinstance(i, slice) and i.step < 0 for i in glb_idx]
+
+            comm = self._distributor.comm
+            rank = comm.Get_rank()
+            boxes = comm.allgather(box)
+            # Some MPI ranks may hold replicas of the same block, in which case
+            # only the first of them sends it
+            senders = [boxes.index(i) == r for r, i in enumerate(boxes)]
+
+            # Flipping maps a block onto a block, so each MPI rank sends to (and
+            # receives from) any other rank at most one block
+            sendblocks = []
+            recvblocks = []
+            for r, i in enumerate(boxes):
+                if senders[rank] and box is not None:
+                    block = box_intersect(i, box_flip(box, extent, flip))
+                else:
+                    block = None
+                if block is not None:
+                    src = box_to_idx(box_flip(block, extent, flip), box)
+                    mirror = tuple(slice(None, None, -1) if j else slice(None)
+                                   for j in flip)
+                    block = np.asarray(local_val)[src][mirror]
+                sendblocks.append(block)
+
+                if senders[r] and box is not None:
+                    block = box_intersect(box, box_flip(i, extent, flip))
                 else:
-                    pass
-                it.iternext()
+                    block = None
+                recvblocks.append(block)
+            recvshapes = [None if i is None else tuple(j1 - j0 for j0, j1 in i)
+                          for i in recvblocks]
+
+            values = mpi_alltoallv(comm, sendblocks, recvshapes, retval.dtype)
+            for block, v in zip(recvblocks, values):
+                if block is not None:
+                    np.asarray(retval)[box_to_idx(block, box)] = v
             return retval
         elif loc_idx is NONLOCAL:
             # Caller expects a scalar. However, `glb_idx` doesn't belong to
@@ -246,24 +254,12 @@ class Data(np.ndarray):
                 super(Data, self).__setitem__(glb_idx, val)
         elif isinstance(val, Data) and val._is_distributed:
             if comm_type is index_by_index:
+                glb_idx = self._normalize_index(glb_idx)
                 glb_idx, val = self._process_args(glb_idx, val)
                 val_idx = as_tuple([slice(i.glb_min, i.glb_max+1, 1) for
                                     i in val._decomposition])
                 idx = self._set_global_idx(val, glb_idx, val_idx)
-                comm = self._distributor.comm
-                nprocs = self._distributor.nprocs
-                # Prepare global lists:
-                data_global = []
-                idx_global = []
-                for j in range(nprocs):
-                    data_global.append(comm.bcast(np.array(val), root=j))
-                    idx_global.append(comm.bcast(idx, root=j))
-                # Set the data:
-                for j in range(nprocs):
-                    skip = any(i is None for i in idx_global[j]) \
-                        or data_global[j].size == 0
-                    if not skip:
-                        self.__setitem__(idx_global[j], data_global[j])
+                self._set_blocks(idx, val)
             elif self._is_distributed:
                 # `val` is decomposed, `self` is decomposed -> local set
                 super(Data, self).__setitem__(glb_idx, val)
@@ -338,17 +334,12 @@ class Data(np.ndarray):
             transform = []
             for j, k in zip(idx, self._distributor.glb_shape):
                 if isinstance(j, slice) and j.step is not None and j.step < 0:
-                    if j.start is None:
-                        stop = None
+                    # The same indices, in increasing order
+                    indices = range(*j.indices(k))
+                    if len(indices) == 0:
+                        processed.append(slice(0, 0, 1))
                     else:
-                        stop = j.start + 1
-                    if j.stop is None and j.start is None:
-                        start = int(np.mod(k-1, -j.step))
-                    elif j.stop is None:
-                        start = int(np.mod(j.start, -j.step))
-                    else:
-                        start = j.stop + 1
-                    processed.append(slice(start, stop, -j.step))
+                        processed.append(slice(indices[-1], indices[0] + 1, -j.step))
                     transform.append(slice(None, None, np.sign(j.step)))
                 else:
                     processed.append(j)
@@ -416,6 +407,114 @@ class Data(np.ndarray):
 
         return loc_idx[0] if len(loc_idx) == 1 else tuple(loc_idx)
 
+    def _view_box(self, glb_idx, local_val):
+        """
+        Compute the block of the global view ``self[glb_idx]``, with all negative
+        slice steps turned positive, stored by this MPI rank as ``local_val``.
+
+        Returns
+        -------
+        The block, as a tuple of ``(start, stop)`` pairs, or None if empty; the
+        shape of the global view; the Decomposition of the global view.
+        """
+        box = []
+        extent = []
+        decomposition = []
+        # The dimensions indexed by integers are retained, with size 1 or 0, in
+        # `local_val`, but they may be dropped from its Decomposition
+        vdecs = iter(local_val._decomposition)
+        dropped = len(local_val._decomposition) < local_val.ndim
+        for i, dec, n in zip(glb_idx, self._decomposition, local_val.shape):
+            vdec = None if is_integer(i) and dropped else next(vdecs)
+            if isinstance(i, slice) and dec is not None:
+                # Explicit indices, as `dec.reshape` would take negative starts
+                # and stops as extensions
+                vdec = dec.reshape(np.sort(np.arange(*i.indices(dec.glb_max + 1))))
+                start = vdec.loc_abs_min or 0
+                box.append((start, start + n))
+                extent.append(vdec.size)
+            else:
+                box.append((0, n))
+                extent.append(n)
+            decomposition.append(vdec)
+        if 0 in local_val.shape:
+            box = None
+        return box and tuple(box), tuple(extent), tuple(decomposition)
+
+    def _set_blocks(self, idx, val):
+        """
+        Set ``self`` from the MPI-distributed ``val``, where ``idx`` are the
+        global indices of ``self`` to which the block of ``val`` stored by this
+        MPI rank corresponds. The blocks are redistributed among the MPI ranks
+        through a single all-to-all exchange.
+        """
+        comm = self._distributor.comm
+        rank = comm.Get_rank()
+
+        # The block of `self` owned by each MPI rank
+        if any(i is not None and i.loc_empty for i in self._decomposition):
+            box = None
+        else:
+            box = tuple((0, s) if i is None else (i.loc_abs_min, i.loc_abs_max + 1)
+                        for i, s in zip(self._decomposition, self.shape))
+        boxes = comm.allgather(box)
+
+        # The indices of `self` to which the block of `val` stored by each
+        # MPI rank corresponds. Some MPI ranks may hold replicas of the same
+        # block, in which case only the first of them sends it
+        data = np.asarray(val)
+        if any(i is None for i in idx) or data.size == 0:
+            idx = None
+        sources = comm.allgather(idx)
+        senders = [i is not None and sources.index(i) == r
+                   for r, i in enumerate(sources)]
+
+        def select(idx, box):
+            # The positions within the block of `val`, and the corresponding
+            # local indices of `self`, of the entries falling within `box`
+            positions = []
+            indices = []
+            for i, (start, stop) in zip(idx, box):
+                if is_integer(i):
+                    if not start <= i < stop:
+                        return None, None
+                    indices.append(i - start)
+                else:
+                    glb = np.arange(i.start, i.stop, i.step or 1)
+                    mask = np.nonzero((glb >= start) & (glb < stop))[0]
+                    if mask.size == 0:
+                        return None, None
+                    positions.append(mask)
+                    indices.append(glb[mask] - start)
+            arrays = iter(np.ix_(*[i for i in indices if not is_integer(i)]))
+            indices = tuple(i if is_integer(i) else next(arrays) for i in indices)
+            return positions, indices
+
+        sendblocks = []
+        recvblocks = []
+        recvshapes = []
+        for r in range(len(boxes)):
+            block = None
+            if senders[rank] and boxes[r] is not None:
+                positions, _ = select(idx, boxes[r])
+                if positions is not None:
+                    shape = tuple(len(range(i.start, i.stop, i.step or 1))
+                                  for i in idx if not is_integer(i))
+                    block = data.reshape(shape)[np.ix_(*positions)]
+            sendblocks.append(block)
+
+            positions = indices = None
+            if senders[r] and box is not None:
+                positions, indices = select(sources[r], box)
+            recvblocks.append(indices)
+            recvshapes.append(None if positions is None else
+                              tuple(i.size for i in positions))
+
+        values = mpi_alltoallv(comm, sendblocks, recvshapes, self.dtype)
+        for indices, v in zip(recvblocks, values):
+            if indices is not None:
+                np.asarray(self)[indices] = v
+
     def _set_global_idx(self, val, idx, val_idx):
         """
         Compute the global indices to which val (the locally stored data) correspond.
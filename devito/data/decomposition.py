@@ -465,11 +465,20 @@ class Decomposition(tuple):
 
         >>> d.reshape(slice(4))
         Decomposition([0,2], [3,3], <<[]>>, [])
+
+        A slice with a step other than 1 retains one index every ``step``
+
+        >>> d.reshape(slice(1, None, 3))
+        Decomposition([0,0], [1,1], <<[2,2]>>, [3,3])
         """
 
         if len(args) == 1:
             arg = args[0]
-            if isinstance(arg, slice):
+            if isinstance(arg, slice) and arg.step not in (None, 1):
+                if self.glb_max is None:
+                    return Decomposition([np.array([])]*len(self), self.local)
+                return self.reshape(np.sort(np.arange(*arg.indices(self.glb_max + 1))))
+            elif isinstance(arg, slice):
                 if arg.start is None or self.glb_min is None:
                     nleft = 0
                 else:
@@ -0,0 +1,160 @@
+"""
+Asynchronous write-back and prefetch of the time slices of out-of-core
+TimeFunctions, that is TimeFunctions allocated through a MmapAllocator.
+"""
+
+from queue import Queue
+from threading import Thread
+import mmap
+import os
+
+from devito.tools import prod
+
+__all__ = ['MmapStreamer']
+
+MS_SYNC = 4
+MADV_WILLNEED = 3
+MADV_DONTNEED = 4
+
+
+class MmapStreamer(object):
+
+    """
+    An I/O thread moving the time slices of an out-of-core TimeFunction between
+    RAM and its backing file, so that the time loop only ever touches slices
+    which are already resident.
+
+    The time loop notifies the MmapStreamer of its progress through ``advance``.
+    The slices the time loop has moved past are then written back to disk and
+    dropped from RAM, while the slices it is going to read next are prefetched.
+
+    Parameters
+    ----------
+    function : TimeFunction
+        The out-of-core TimeFunction.
+    radius : int, optional
+        The time slices in ``[t - radius, t + radius]`` are accessed at time
+        ``t``, hence they are never written back. Defaults to
+        ``function.time_order // 2``.
+    lookahead : int, optional
+        The number of time slices prefetched ahead of the time loop. Defaults to 2.
+
+    Examples
+    --------
+    The slices of ``u`` are streamed as an Operator is run one timestep at
+    a time, backwards
+
+    >>> streamer = MmapStreamer(u)  # doctest: +SKIP
+    >>> call = op.prepare(u=u)  # doctest: +SKIP
+    >>> summary = call.stepwise(lambda t: streamer.advance(t, direction=-1),
+    ...                         backward=True)  # doctest: +SKIP
+    >>> streamer.close()  # doctest: +SKIP
+    """
+
+    def __init__(self, function, radius=None, lookahead=2):
+        # Trigger the allocation
+        function._data_allocated
+        data = function._data
+        if not data._allocator.is_Mmap:
+            raise ValueError("`%s` isn't backed by a MmapAllocator" % function.name)
+        self.function = function
+        self.radius = function.time_order // 2 if radius is None else radius
+        self.lookahead = lookahead
+
+        self._pointer, _, self._fd = data._memfree_args
+        self._lib = data._allocator.lib
+        self._pagesize = mmap.PAGESIZE
+        self._nslices = data.shape[0]
+        self._slicebytes = prod(data.shape[1:]) * data.itemsize
+
+        self._written = set()
+        self._prefetched = set()
+
+        # Instrumentation
+        self.nwritten = 0
+        self.nprefetched = 0
+
+        self._queue = Queue()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __del__(self):
+        self.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                action, t = item
+                if action == 'writeback':
+                    self._writeback(t)
+                else:
+                    self._prefetch(t)
+            finally:
+                self._queue.task_done()
+
+    def _range(self, t, inner):
+        # The page-aligned byte range of the time slice `t`. If `inner`, the
+        # range excludes the pages shared with the neighbouring slices
+        start = t * self._slicebytes
+        end = start + self._slicebytes
+        if inner:
+            start = -(-start // self._pagesize) * self._pagesize
+            end = end // self._pagesize * self._pagesize
+        else:
+            start = start // self._pagesize * self._pagesize
+        return start, max(end - start, 0)
+
+    def _writeback(self, t):
+        start, size = self._range(t, inner=False)
+        self._lib.msync(self._pointer.value + start, size, MS_SYNC)
+        start, size = self._range(t, inner=True)
+        if size > 0:
+            # The pages must be unmapped first, or the page cache would keep them
+            self._lib.madvise(self._pointer.value + start, size, MADV_DONTNEED)
+            os.posix_fadvise(self._fd, start, size, os.POSIX_FADV_DONTNEED)
+        self.nwritten += 1
+
+    def _prefetch(self, t):
+        start, size = self._range(t, inner=False)
+        os.posix_fadvise(self._fd, start, size, os.POSIX_FADV_WILLNEED)
+        self._lib.madvise(self._pointer.value + start, size, MADV_WILLNEED)
+        self.nprefetched += 1
+
+    def advance(self, t, direction=1):
+        """
+        Notify the MmapStreamer that the time loop is about to compute timestep
+        ``t``, marching forward (``direction=1``) or backward (``direction=-1``)
+        in time.
+        """
+        if self._thread is None:
+            raise RuntimeError("The MmapStreamer has been closed")
+
+        # Write back the slices moved past
+        behind = t - direction*(self.radius + 1)
+        if 0 <= behind < self._nslices and behind not in self._written:
+            self._written.add(behind)
+            self._prefetched.discard(behind)
+            self._queue.put(('writeback', behind))
+
+        # Prefetch the slices ahead
+        for i in range(self.lookahead):
+            ahead = t + direction*(self.radius + 1 + i)
+            if 0 <= ahead < self._nslices and ahead not in self._prefetched:
+                self._prefetched.add(ahead)
+                self._written.discard(ahead)
+                self._queue.put(('prefetch', ahead))
+
+    def wait(self):
+        """Block until all pending I/O requests have been served."""
+        self._queue.join()
+
+    def close(self):
+        """Serve all pending I/O requests and stop the I/O thread."""
+        if getattr(self, '_thread', None) is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
@@ -4,7 +4,8 @@ from devito.tools import Tag, as_tuple, is_integer
 
 __all__ = ['Index', 'NONLOCAL', 'PROJECTED', 'index_is_basic', 'index_apply_modulo',
            'index_dist_to_repl', 'convert_index', 'index_handle_oob',
-           'loc_data_idx', 'mpi_index_maps', 'flip_idx']
+           'loc_data_idx', 'flip_idx', 'box_intersect', 'box_flip',
+           'box_to_idx', 'mpi_alltoallv']
 
 
 class Index(Tag):
@@ -130,22 +131,17 @@ def loc_data_idx(loc_idx):
     --------
     >>> loc_data_idx(slice(11, None, -3))
     (slice(2, 12, 3),)
+    >>> loc_data_idx(slice(6, 0, -4))
+    (slice(2, 7, 4),)
     """
     retval = []
     for i in as_tuple(loc_idx):
-        if isinstance(i, slice) and i.step is not None and i.step == -1:
-            if i.stop is None:
-                retval.append(slice(0, i.start+1, -i.step))
-            else:
-                retval.append(slice(i.stop+1, i.start+1, -i.step))
-        elif isinstance(i, slice) and i.step is not None and i.step < -1:
-            if i.stop is None:
-                lmin = i.start
-                while lmin >= 0:
-                    lmin += i.step
-                retval.append(slice(lmin-i.step, i.start+1, -i.step))
+        if isinstance(i, slice) and i.step is not None and i.step < 0:
+            indices = range(i.start, -1 if i.stop is None else i.stop, i.step)
+            if len(indices) == 0:
+                retval.append(slice(0, 0, 1))
             else:
-                retval.append(slice(i.stop+1, i.start+1, -i.step))
+                retval.append(slice(indices[-1], indices[0]+1, -i.step))
         elif is_integer(i):
             retval.append(slice(i, i+1, 1))
         else:
@@ -153,175 +149,91 @@ def loc_data_idx(loc_idx):
     return as_tuple(retval)
 
 
-def mpi_index_maps(loc_idx, shape, topology, coords, comm):
+def box_intersect(box0, box1):
     """
-    Generate various data structures used to determine what MPI communication
-    is required. The function creates the following:
-
-    owners: An array of shape ``shape`` where each index signifies the rank on which
-    that data is stored.
-
-    send: An array of shape ``shape`` where each index signifies the rank to which
-    data beloning to that index should be sent.
-
-    global_si: An array of ``shape`` shape where each index contains the global index
-    to which that index should be sent.
-
-    local_si: An array of shape ``shape`` where each index contains the local index
-    (on the destination rank) to which that index should be sent.
-
-    Parameters
-    ----------
-    loc_idx : tuple of slices
-        The coordinates of interest to the current MPI rank.
-    shape: np.array of tuples
-        Array containing the local shape of data to each rank.
-    topology: tuple
-        Topology of the decomposed domain.
-    coords: tuple of tuples
-        The coordinates of each MPI rank in the decomposed domain, ordered
-        based on the MPI rank.
-    comm : MPI communicator
+    Intersect two boxes, that is two tuples of ``(start, stop)`` pairs. Return
+    None if either box is None or the intersection is empty.
 
     Examples
     --------
-    An array is given by A = [[  0,  1,  2,  3],
-                              [  4,  5,  6,  7],
-                              [  8,  9, 10, 11],
-                              [ 12, 13, 14, 15]],
-    which is then distributed over four ranks such that on rank 0:
-
-    A = [[ 0, 1],
-         [ 4, 5]],
-
-    on rank 1:
+    >>> box_intersect(((0, 4), (2, 6)), ((2, 8), (0, 3)))
+    ((2, 4), (2, 3))
+    """
+    if box0 is None or box1 is None:
+        return None
+    retval = tuple((max(i0, j0), min(i1, j1)) for (i0, i1), (j0, j1) in zip(box0, box1))
+    if any(i0 >= i1 for i0, i1 in retval):
+        return None
+    return retval
 
-    A = [[ 2, 3],
-         [ 6, 7]],
 
-    on rank 2:
+def box_flip(box, extent, flip):
+    """
+    Mirror a box along the dimensions for which ``flip`` is True, with ``extent``
+    the size of each dimension.
 
-    A = [[  8,  9],
-         [ 12, 13]],
+    Examples
+    --------
+    >>> box_flip(((0, 4), (2, 6)), (10, 10), (True, False))
+    ((6, 10), (2, 6))
+    """
+    if box is None:
+        return None
+    return tuple((n - i1, n - i0) if f else (i0, i1)
+                 for (i0, i1), n, f in zip(box, extent, flip))
 
-    on rank 3:
 
-    A = [[ 10, 11],
-         [ 14, 15]].
+def box_to_idx(box, origin):
+    """
+    Turn a box into a tuple of slices relative to the box ``origin``.
 
-    Taking the slice A[2:0:-1, 2:0:-1] the expected output (in serial) is
+    Examples
+    --------
+    >>> box_to_idx(((6, 10), (2, 6)), ((4, 12), (0, 8)))
+    (slice(2, 6, None), slice(2, 6, None))
+    """
+    return tuple(slice(i0 - j0, i1 - j0) for (i0, i1), (j0, _) in zip(box, origin))
 
-    [[  0,  1,  2,  3],
-     [  4, 10,  9,  7],
-     [  8,  6,  5, 11],
-     [ 12, 13, 14, 15]],
 
-    Hence, in this case the following would be generated:
+def mpi_alltoallv(comm, sendblocks, recvshapes, dtype):
+    """
+    Exchange arbitrarily shaped blocks of data among all MPI ranks through a
+    single collective ``MPI_Alltoallv``.
 
-    owners = [[0, 1],
-              [2, 3]],
+    Parameters
+    ----------
+    comm : MPI communicator
+        The communicator.
+    sendblocks : list of np.ndarray
+        The block to be sent to each MPI rank, or None if nothing is sent.
+    recvshapes : list of tuples
+        The shape of the block to be received from each MPI rank, or None if
+        nothing is received.
+    dtype : data-type
+        The data type of the exchanged blocks.
+
+    Returns
+    -------
+    The list of received blocks, with None in place of the MPI ranks from which
+    nothing was received.
+    """
+    dtype = np.dtype(dtype)
 
-    send = [[3, 2],
-            [1, 0]],
+    sendblocks = [np.empty(0, dtype) if i is None else np.ravel(i).astype(dtype)
+                  for i in sendblocks]
+    scount = np.array([i.size for i in sendblocks], dtype=np.int32)
+    sdisp = np.concatenate([[0], np.cumsum(scount)[:-1]]).astype(np.int32)
+    sendbuf = np.concatenate(sendblocks) if sendblocks else np.empty(0, dtype)
 
-    global_si = [[(2, 2), (2, 1)],
-                 [(1, 2), (1, 1)]],
+    rcount = np.array([0 if i is None else int(np.prod(i)) for i in recvshapes],
+                      dtype=np.int32)
+    rdisp = np.concatenate([[0], np.cumsum(rcount)[:-1]]).astype(np.int32)
+    recvbuf = np.empty(int(rcount.sum()), dtype)
 
-    local_si = [[(0, 0), (0, 1)],
-                [(1, 0), (1, 1)]].
-    """
+    comm.Alltoallv([sendbuf, (scount, sdisp)], [recvbuf, (rcount, rdisp)])
 
-    nprocs = comm.Get_size()
-
-    # Gather data structures from all ranks in order to produce the
-    # relevant mappings.
-    dat_len = np.zeros(topology, dtype=tuple)
-    for j in range(nprocs):
-        dat_len[coords[j]] = comm.bcast(shape, root=j)
-        if any(k == 0 for k in dat_len[coords[j]]):
-            dat_len[coords[j]] = as_tuple([0]*len(dat_len[coords[j]]))
-    dat_len_cum = distributed_data_size(dat_len, coords, topology)
-    # This 'transform' will be required to produce the required maps
-    transform = []
-    for i in as_tuple(loc_idx):
-        if isinstance(i, slice):
-            if i.step is not None:
-                transform.append(slice(None, None, np.sign(i.step)))
-            else:
-                transform.append(slice(None, None, None))
-        else:
-            transform.append(0)
-    transform = as_tuple(transform)
-
-    global_size = dat_len_cum[coords[-1]]
-
-    indices = np.zeros(global_size, dtype=tuple)
-    global_si = np.zeros(global_size, dtype=tuple)
-    it = np.nditer(indices, flags=['refs_ok', 'multi_index'])
-    while not it.finished:
-        index = it.multi_index
-        indices[index] = index
-        it.iternext()
-    global_si[:] = indices[transform]
-
-    # Create the 'rank' slices
-    rank_slice = []
-    for j in coords:
-        this_rank = []
-        for k in dat_len[j]:
-            this_rank.append(slice(0, k, 1))
-        rank_slice.append(this_rank)
-    # Normalize the slices:
-    n_rank_slice = []
-    for i in range(len(rank_slice)):
-        my_coords = coords[i]
-        if any([j.stop == j.start for j in rank_slice[i]]):
-            n_rank_slice.append(as_tuple([None]*len(rank_slice[i])))
-            continue
-        if i == 0:
-            n_rank_slice.append(as_tuple(rank_slice[i]))
-            continue
-        left_neighbours = []
-        for j in range(len(my_coords)):
-            left_coord = list(my_coords)
-            left_coord[j] -= 1
-            left_neighbours.append(as_tuple(left_coord))
-        left_neighbours = as_tuple(left_neighbours)
-        n_slice = []
-        for j in range(len(my_coords)):
-            if left_neighbours[j][j] < 0:
-                start = 0
-                stop = dat_len_cum[my_coords][j]
-            else:
-                start = dat_len_cum[left_neighbours[j]][j]
-                stop = dat_len_cum[my_coords][j]
-            n_slice.append(slice(start, stop, 1))
-        n_rank_slice.append(as_tuple(n_slice))
-    n_rank_slice = as_tuple(n_rank_slice)
-
-    # Now fill each elements owner:
-    owners = np.zeros(global_size, dtype=np.int32)
-    send = np.zeros(global_size, dtype=np.int32)
-    for i in range(len(n_rank_slice)):
-        if any([j is None for j in n_rank_slice[i]]):
-            continue
-        else:
-            owners[n_rank_slice[i]] = i
-    send[:] = owners[transform]
-
-    # Construct local_si
-    local_si = np.zeros(global_size, dtype=tuple)
-    it = np.nditer(local_si, flags=['refs_ok', 'multi_index'])
-    while not it.finished:
-        index = it.multi_index
-        owner = owners[index]
-        my_slice = n_rank_slice[owner]
-        rnorm_index = []
-        for j, k in zip(my_slice, index):
-            rnorm_index.append(k-j.start)
-        local_si[index] = as_tuple(rnorm_index)
-        it.iternext()
-    return owners, send, global_si, local_si
+    return [None if i is None else recvbuf[j:j+k].reshape(i)
+            for i, j, k in zip(recvshapes, rdisp, rcount)]
 
 
 def flip_idx(idx, decomposition):
@@ -391,68 +303,3 @@ def flip_idx(idx, decomposition):
         else:
             processed.append(i)
     return as_tuple(processed)
-
-
-def distributed_data_size(shape, coords, topology):
-    """
-    Compute the cumulative shape of the distributed data (cshape).
-
-    Parameters
-    -----------
-    shape: np.array of tuples
-        Array containing the local shape of data to each rank.
-    coords: tuple of tuples
-        The coordinates of each MPI rank in the decomposed domain, ordered
-        based on the MPI rank.
-    topology: tuple
-        Topology of the decomposed domain.
-
-    Examples
-    --------
-    Given a set of distributed data such that:
-
-    shape = [[ (2, 2), (2, 2)],
-             [ (2, 2), (2, 2)]],
-
-    (that is, there are 4 ranks and the data on each rank has shape (2, 2)).
-    cshape will be returned as
-
-    cshape = [[ (2, 2), (2, 4)],
-              [ (4, 2), (4, 4)]].
-    """
-    cshape = np.zeros(topology, dtype=tuple)
-    for i in range(len(coords)):
-        my_coords = coords[i]
-        if i == 0:
-            cshape[my_coords] = shape[my_coords]
-            continue
-        left_neighbours = []
-        for j in range(len(my_coords)):
-            left_coord = list(my_coords)
-            left_coord[j] -= 1
-            left_neighbours.append(as_tuple(left_coord))
-        left_neighbours = as_tuple(left_neighbours)
-        n_dat = []  # Normalised data size
-        if sum(shape[my_coords]) == 0:
-            prev_dat_len = []
-            for j in left_neighbours:
-                if any(d < 0 for d in j):
-                    pass
-                else:
-                    prev_dat_len.append(cshape[j])
-            func = lambda a, b: max([d[b] for d in a])
-            max_dat_len = []
-            for j in range(len(my_coords)):
-                max_dat_len.append(func(prev_dat_len, j))
-            cshape[my_coords] = as_tuple(max_dat_len)
-        else:
-            for j in range(len(my_coords)):
-                if left_neighbours[j][j] < 0:
-                    c_dat = shape[my_coords][j]
-                    n_dat.append(c_dat)
-                else:
-                    c_dat = shape[my_coords][j]  # Current length
-                    p_dat = cshape[left_neighbours[j]][j]  # Previous length
-                    n_dat.append(c_dat+p_dat)
-            cshape[my_coords] = as_tuple(n_dat)
-    return cshape
@@ -8,7 +8,7 @@ from devito.ir.clusters.analysis import analyze
 from devito.ir.clusters.cluster import Cluster, ClusterGroup
 from devito.ir.clusters.queue import Queue
 from devito.symbolics import CondEq
-from devito.tools import DAG, as_tuple, flatten, timed_pass
+from devito.tools import DAG, as_tuple, timed_pass
 
 __all__ = ['clusterize', 'guard', 'Toposort']
 
@@ -127,7 +127,7 @@ class Toposort(Queue):
         dag = DAG(nodes=cgroups)
         for n, cg0 in enumerate(cgroups):
             for cg1 in cgroups[n+1:]:
-                scope = Scope(exprs=cg0.exprs + cg1.exprs)
+                scope = Scope.merge(cg0.scope, cg1.scope)
 
                 # Handle anti-dependences
                 deps = scope.d_anti - (cg0.scope.d_anti + cg1.scope.d_anti)
@@ -217,7 +217,7 @@ class Schedule(Queue):
         # `clusters` are supposed to share it
         candidates = prefix[-1].dim._defines
 
-        scope = Scope(exprs=flatten(c.exprs for c in clusters))
+        scope = Scope.merge(*[c.scope for c in clusters])
 
         # Handle the nastiest case -- ambiguity due to the presence of both a
         # flow- and an anti-dependence.
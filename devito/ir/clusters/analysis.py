@@ -42,7 +42,7 @@ class Detector(Queue):
     def _fetch_scope(self, clusters):
         key = as_tuple(clusters)
         if key not in self.state.scopes:
-            self.state.scopes[key] = Scope(flatten(c.exprs for c in key))
+            self.state.scopes[key] = Scope.merge(*[c.scope for c in key])
         return self.state.scopes[key]
 
     def _fetch_properties(self, clusters, prefix):
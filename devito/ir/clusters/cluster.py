@@ -247,7 +247,7 @@ class ClusterGroup(tuple):
 
     @cached_property
     def scope(self):
-        return Scope(exprs=self.exprs)
+        return Scope.merge(*[c.scope for c in self])
 
     @cached_property
     def itintervals(self):
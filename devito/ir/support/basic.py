@@ -221,10 +221,31 @@ class TimedAccess(IterationInstance):
     def __hash__(self):
         return super(TimedAccess, self).__hash__()
 
+    def retimestamp(self, timestamp):
+        """
+        Shallow copy of ``self`` with a different timestamp. Unlike rebuilding
+        from scratch, all of the cached attributes are inherited.
+        """
+        obj = tuple.__new__(self.__class__, self)
+        obj.__dict__.update(self.__dict__)
+        obj.timestamp = timestamp
+        return obj
+
     @property
     def name(self):
         return self.function.name
 
+    @cached_property
+    def signature(self):
+        """
+        A hashable key uniquely determining the distance from/to another
+        TimedAccess -- the index functions, the `findices`, and the iteration
+        space. Unlike ``__eq__``, it ignores mode, timestamp and Function, so
+        identical accesses to e.g. different Functions on the same Grid share
+        the same signature.
+        """
+        return (tuple(self), self.findices, self.itintervals)
+
     @property
     def intervals(self):
         return self.ispace.intervals
@@ -411,11 +432,12 @@ class Dependence(object):
     A data dependence between two TimedAccess objects.
     """
 
-    def __init__(self, source, sink):
+    def __init__(self, source, sink, distance=None):
         assert isinstance(source, TimedAccess) and isinstance(sink, TimedAccess)
         assert source.function is sink.function
         self.source = source
         self.sink = sink
+        self._distance = distance
 
     def __eq__(self, other):
         # If the timestamps are equal in `self` (ie, an inplace dependence) then
@@ -442,9 +464,11 @@ class Dependence(object):
     def aindices(self):
         return tuple({i, j} for i, j in zip(self.source.aindices, self.sink.aindices))
 
-    @cached_property
+    @property
     def distance(self):
-        return self.source.distance(self.sink)
+        if self._distance is None:
+            self._distance = self.source.distance(self.sink)
+        return self._distance
 
     @cached_property
     def _defined_findices(self):
@@ -681,6 +705,8 @@ class Scope(object):
         """
         exprs = as_tuple(exprs)
 
+        self.exprs = exprs
+
         self.reads = {}
         self.writes = {}
 
@@ -701,15 +727,61 @@ class Scope(object):
                 v = self.reads.setdefault(e.lhs.function, [])
                 v.append(TimedAccess(e.lhs, 'RI', i, e.ispace))
 
+        self._add_implicit_reads()
+
+        # Memoized distances, keyed by TimedAccess signature pairs
+        self._distances = {}
+
+    @classmethod
+    def merge(cls, *scopes):
+        """
+        Build the Scope of the concatenation of the expressions in ``scopes``.
+
+        This is equivalent to, but cheaper than, ``Scope(exprs)``: the
+        TimedAccesses of ``scopes`` are reused, with shifted timestamps, rather
+        than extracted again from the expressions, and the distances already
+        computed within ``scopes`` are not computed again.
+        """
+        obj = cls.__new__(cls)
+
+        obj.exprs = tuple(chain(*[i.exprs for i in scopes]))
+
+        obj.reads = {}
+        obj.writes = {}
+
+        offset = 0
+        for scope in scopes:
+            for mapper, accesses in [(obj.reads, scope.reads),
+                                     (obj.writes, scope.writes)]:
+                for f, v in accesses.items():
+                    mapper.setdefault(f, []).extend(
+                        a.retimestamp(a.timestamp + offset) if offset else a
+                        for a in v if a.timestamp >= 0
+                    )
+            offset += len(scope.exprs)
+
+        obj._add_implicit_reads()
+
+        # Distances only depend on the TimedAccess signatures, so the memoization
+        # tables can be shared. We grow the largest one to minimize copies
+        tables = sorted({id(i._distances): i._distances for i in scopes}.values(),
+                        key=len)
+        obj._distances = tables.pop() if tables else {}
+        for i in tables:
+            obj._distances.update(i)
+
+        return obj
+
+    def _add_implicit_reads(self):
         # The iterators symbols too
-        dimensions = set().union(*[e.dimensions for e in exprs])
+        dimensions = set().union(*[e.dimensions for e in self.exprs])
         for d in dimensions:
             for j in d.symbolic_size.free_symbols:
                 v = self.reads.setdefault(j.function, [])
                 v.append(TimedAccess(j, 'R', -1))
 
         # Factor in conditionals
-        conditionals = set().union(*[e.conditionals for e in exprs])
+        conditionals = set().union(*[e.conditionals for e in self.exprs])
         for d in conditionals:
             for j in d.free_symbols:
                 v = self.reads.setdefault(j.function, [])
@@ -766,23 +838,42 @@ class Scope(object):
         return tuple(a for a in self.accesses
                      if a.timestamp in timestamps and a.mode in modes)
 
+    def _distance(self, source, sink):
+        key = (source.signature, sink.signature)
+        try:
+            return self._distances[key]
+        except KeyError:
+            return self._distances.setdefault(key, source.distance(sink))
+
+    @memoized_meth
+    def _buckets(self, function, mode='R'):
+        """
+        The TimedAccesses to ``function`` grouped by signature. All accesses in
+        a group are at the same distance from any other TimedAccess.
+        """
+        accesses = self.reads if mode == 'R' else self.writes
+        buckets = {}
+        for a in accesses.get(function, []):
+            buckets.setdefault(a.signature, []).append(a)
+        return tuple(buckets.values())
+
     @memoized_generator
     def d_flow_gen(self):
         """Generate the flow (or "read-after-write") dependences."""
         for k, v in self.writes.items():
             for w in v:
-                for r in self.reads.get(k, []):
-                    dependence = Dependence(w, r)
-                    distance = dependence.distance
-                    try:
-                        is_flow = distance > 0 or (r.lex_ge(w) and distance == 0)
-                    except TypeError:
-                        # Non-integer vectors are not comparable.
-                        # Conservatively, we assume it is a dependence, unless
-                        # it's a read-for-increment
-                        is_flow = not r.is_read_increment
-                    if is_flow:
-                        yield dependence
+                for group in self._buckets(k, 'R'):
+                    distance = self._distance(w, group[0])
+                    for r in group:
+                        try:
+                            is_flow = distance > 0 or (r.lex_ge(w) and distance == 0)
+                        except TypeError:
+                            # Non-integer vectors are not comparable.
+                            # Conservatively, we assume it is a dependence, unless
+                            # it's a read-for-increment
+                            is_flow = not r.is_read_increment
+                        if is_flow:
+                            yield Dependence(w, r, distance)
 
     @cached_property
     def d_flow(self):
@@ -794,18 +885,18 @@ class Scope(object):
         """Generate the anti (or "write-after-read") dependences."""
         for k, v in self.writes.items():
             for w in v:
-                for r in self.reads.get(k, []):
-                    dependence = Dependence(r, w)
-                    distance = dependence.distance
-                    try:
-                        is_anti = distance > 0 or (r.lex_lt(w) and distance == 0)
-                    except TypeError:
-                        # Non-integer vectors are not comparable.
-                        # Conservatively, we assume it is a dependence, unless
-                        # it's a read-for-increment
-                        is_anti = not r.is_read_increment
-                    if is_anti:
-                        yield dependence
+                for group in self._buckets(k, 'R'):
+                    distance = self._distance(group[0], w)
+                    for r in group:
+                        try:
+                            is_anti = distance > 0 or (r.lex_lt(w) and distance == 0)
+                        except TypeError:
+                            # Non-integer vectors are not comparable.
+                            # Conservatively, we assume it is a dependence, unless
+                            # it's a read-for-increment
+                            is_anti = not r.is_read_increment
+                        if is_anti:
+                            yield Dependence(r, w, distance)
 
     @cached_property
     def d_anti(self):
@@ -817,17 +908,17 @@ class Scope(object):
         """Generate the output (or "write-after-write") dependences."""
         for k, v in self.writes.items():
             for w1 in v:
-                for w2 in self.writes.get(k, []):
-                    dependence = Dependence(w2, w1)
-                    distance = dependence.distance
-                    try:
-                        is_output = distance > 0 or (w2.lex_gt(w1) and distance == 0)
-                    except TypeError:
-                        # Non-integer vectors are not comparable.
-                        # Conservatively, we assume it is a dependence
-                        is_output = True
-                    if is_output:
-                        yield dependence
+                for group in self._buckets(k, 'W'):
+                    distance = self._distance(group[0], w1)
+                    for w2 in group:
+                        try:
+                            is_output = distance > 0 or (w2.lex_gt(w1) and distance == 0)
+                        except TypeError:
+                            # Non-integer vectors are not comparable.
+                            # Conservatively, we assume it is a dependence
+                            is_output = True
+                        if is_output:
+                            yield Dependence(w2, w1, distance)
 
     @cached_property
     def d_output(self):
@@ -10,7 +10,8 @@ from cgen import Struct, Value
 
 from devito.data import LEFT, CENTER, RIGHT, Decomposition
 from devito.parameters import configuration
-from devito.tools import EnrichedTuple, as_tuple, ctypes_to_cstr, is_integer
+from devito.tools import (EnrichedTuple, as_tuple, ctypes_to_cstr, flatten, is_integer,
+                          prod)
 from devito.types import CompositeObject, Object
 
 
@@ -48,7 +49,7 @@ except ImportError:
             return None
 
 
-__all__ = ['Distributor', 'SparseDistributor', 'MPI']
+__all__ = ['Distributor', 'SparseDistributor', 'SparseCommPlan', 'MPI']
 
 
 class AbstractDistributor(ABC):
@@ -171,9 +172,14 @@ class Distributor(AbstractDistributor):
     comm : MPI communicator, optional
         The set of processes over which the domain is distributed. Defaults to
         MPI.COMM_WORLD.
+    topology : tuple, optional
+        The number of processes along each decomposed Dimension. An entry may
+        also be a tuple of ints, namely the sizes of the subdomains along that
+        Dimension, to decompose it unevenly. Defaults to the topology minimizing
+        the halo volume (see ``compute_dims``).
     """
 
-    def __init__(self, shape, dimensions, input_comm=None):
+    def __init__(self, shape, dimensions, input_comm=None, topology=None):
         super(Distributor, self).__init__(shape, dimensions)
 
         if configuration['mpi']:
@@ -189,14 +195,25 @@ class Distributor(AbstractDistributor):
                     self._input_comm.Free()
             atexit.register(cleanup)
 
-            # `MPI.Compute_dims` sets the dimension sizes to be as close to each other
-            # as possible, using an appropriate divisibility algorithm. Thus, in 3D:
-            # * topology[0] >= topology[1] >= topology[2]
-            # * topology[0] * topology[1] * topology[2] == self._input_comm.size
-            # However, `MPI.Compute_dims` is distro-dependent, so we have to enforce
-            # some properties through our own wrapper (e.g., OpenMPI v3 does not
-            # guarantee that 9 ranks are arranged into a 3x3 grid when shape=(9, 9))
-            self._topology = compute_dims(self._input_comm.size, len(shape))
+            if topology is None:
+                # The topology minimizing the halo volume, possibly across the
+                # nodes first
+                if configuration['mpi-node-aware']:
+                    nodes = compute_nodes(self._input_comm)
+                else:
+                    nodes = None
+                self._topology = compute_dims(self._input_comm.size, len(shape),
+                                              shape, nodes)
+                splits = self._topology
+            else:
+                splits = as_tuple(topology)
+                self._topology = tuple(i if is_integer(i) else len(i) for i in splits)
+                if len(self._topology) != len(shape) or \
+                        prod(self._topology) != self._input_comm.size:
+                    raise ValueError("The topology `%s` doesn't match %d processes "
+                                     "over %d Dimensions"
+                                     % (str(topology), self._input_comm.size,
+                                        len(shape)))
 
             if self._input_comm is not input_comm:
                 # By default, Devito arranges processes into a cartesian topology.
@@ -211,15 +228,39 @@ class Distributor(AbstractDistributor):
             self._input_comm = None
             self._comm = MPI.COMM_NULL
             self._topology = tuple(1 for _ in range(len(shape)))
+            splits = self._topology
 
         # The domain decomposition
-        self._decomposition = [Decomposition(np.array_split(range(i), j), c)
-                               for i, j, c in zip(shape, self.topology, self.mycoords)]
+        self._decomposition = [Decomposition(split(i, j), c)
+                               for i, j, c in zip(shape, splits, self.mycoords)]
 
     @property
     def comm(self):
         return self._comm
 
+    @cached_property
+    def comm_node(self):
+        """
+        The MPI communicator grouping the processes running on the same node
+        as the calling MPI rank.
+
+        Notes
+        -----
+        The communicator is created upon first access, which is therefore
+        collective over ``self.comm``.
+        """
+        if self.comm is MPI.COMM_NULL:
+            return MPI.COMM_NULL
+
+        comm = self.comm.Split_type(MPI.COMM_TYPE_SHARED)
+
+        # Make sure the node communicator will be freed up upon exit
+        def cleanup():
+            comm.Free()
+        atexit.register(cleanup)
+
+        return comm
+
     @property
     def myrank(self):
         if self.comm is not MPI.COMM_NULL:
@@ -450,6 +491,152 @@ class SparseDistributor(AbstractDistributor):
         return self.distributor.nprocs
 
 
+class SparseCommPlan(object):
+
+    """
+    A reusable plan to redistribute the sparse points of a SparseFunction
+    among the MPI ranks needing them ("scatter") and back ("gather").
+
+    Building a SparseCommPlan requires a collective ``MPI_Alltoall``, as well
+    as several sorting and masking operations, whose outcome only depends on
+    where the sparse points are located. A SparseCommPlan may thus be reused
+    until the sparse points move.
+
+    Parameters
+    ----------
+    comm : MPI communicator
+        The communicator of the MPI ranks among which the sparse points are
+        redistributed.
+    datamap : dict
+        Mapper ``M : MPI rank -> required sparse points``.
+    owners : array_like, optional
+        The MPI rank owning each sparse point, whose copy of the sparse point
+        is retained upon a gather. Defaults to the lowest MPI rank the sparse
+        point is sent to.
+
+    Notes
+    -----
+    If each MPI rank only exchanges sparse points with a small subset of the other
+    MPI ranks, the plan uses neighborhood collectives (``MPI_Neighbor_alltoallv``)
+    over a distributed graph communicator. Otherwise, it uses ``MPI_Alltoallv``.
+    """
+
+    def __init__(self, comm, datamap, owners=None):
+        self.comm = comm
+
+        # The sparse points to be sent to each MPI rank, grouped by MPI rank. The
+        # sparse points along the boundary of two or more MPI ranks are duplicated
+        self.scatter_mask = np.array(flatten(datamap[i] for i in sorted(datamap)),
+                                     dtype=int)
+
+        # How many sparse points is this MPI rank expected to send/receive to/from
+        # each other MPI rank upon a scatter
+        self.ssparse = np.array([len(datamap.get(i, [])) for i in range(comm.size)],
+                                dtype=int)
+
+        # The sparse points received upon a gather, without duplicates. Note that
+        # `np.unique` returns the first occurrence of each sparse point, ordered
+        # by sparse point
+        points, self.gather_mask = np.unique(self.scatter_mask, return_index=True)
+        if owners is not None and len(points) > 0:
+            # Retain the copies sent back by the owners instead
+            ranks = np.repeat(np.arange(comm.size), self.ssparse)
+            owned = np.flatnonzero(ranks == np.asarray(owners)[self.scatter_mask])
+            self.gather_mask[np.searchsorted(points, self.scatter_mask[owned])] = owned
+        self.rsparse = np.empty(comm.size, dtype=int)
+        comm.Alltoall(self.ssparse, self.rsparse)
+
+        # Use neighborhood collectives if the communication pattern is sparse
+        self.neighbours = np.nonzero(self.ssparse + self.rsparse)[0]
+        npeers = comm.allreduce(len(self.neighbours), op=MPI.MAX)
+        if 2*npeers <= comm.size:
+            neighbours = self.neighbours.tolist()
+            graph = comm.Create_dist_graph_adjacent(neighbours, neighbours,
+                                                    reorder=False)
+
+            # Make sure the graph communicator will be freed up upon exit, unless
+            # `free` is called earlier. Freeing a communicator is collective, so it
+            # mustn't be left to the garbage collector
+            def cleanup():
+                if graph != MPI.COMM_NULL:
+                    graph.Free()
+            atexit.register(cleanup)
+
+            self.graph = graph
+        else:
+            self.graph = None
+
+        self._buffers = {}
+
+    def free(self):
+        """
+        Release the distributed graph communicator, if any. This is collective
+        over ``self.comm``.
+        """
+        if self.graph is not None:
+            self.graph.Free()
+            self.graph = None
+
+    def _buffer(self, key, shape, dtype):
+        # Send/recv buffers, which never escape the plan, are allocated once
+        key = (key, shape, np.dtype(dtype))
+        try:
+            return self._buffers[key]
+        except KeyError:
+            return self._buffers.setdefault(key, np.empty(shape, dtype=dtype))
+
+    def _alltoallv(self, sendbuf, ssparse, recvbuf, rsparse):
+        mpitype = MPI._typedict[np.dtype(sendbuf.dtype).char]
+        size = prod(sendbuf.shape[1:])
+
+        scount = ssparse*size
+        sdisp = np.concatenate([[0], np.cumsum(scount)[:-1]])
+        rcount = rsparse*size
+        rdisp = np.concatenate([[0], np.cumsum(rcount)[:-1]])
+
+        if self.graph is None:
+            self.comm.Alltoallv([sendbuf, scount, sdisp, mpitype],
+                                [recvbuf, rcount, rdisp, mpitype])
+        else:
+            # The MPI ranks not in `self.neighbours` have zero counts, hence
+            # the displacements of the neighbours are unaffected
+            n = self.neighbours
+            self.graph.Neighbor_alltoallv([sendbuf, scount[n], sdisp[n], mpitype],
+                                          [recvbuf, rcount[n], rdisp[n], mpitype])
+
+    def scatter(self, array):
+        """
+        Send the sparse points in ``array``, the sparse Dimension being the
+        outermost one, to the MPI ranks needing them.
+
+        Returns
+        -------
+        A newly allocated array with the received sparse points.
+        """
+        sendbuf = self._buffer('scatter', (sum(self.ssparse),) + array.shape[1:],
+                               array.dtype)
+        np.take(array, self.scatter_mask, axis=0, out=sendbuf, mode='clip')
+        recvbuf = np.empty((sum(self.rsparse),) + array.shape[1:], dtype=array.dtype)
+        self._alltoallv(sendbuf, self.ssparse, recvbuf, self.rsparse)
+        return recvbuf
+
+    def gather(self, array):
+        """
+        Send the sparse points in ``array``, the sparse Dimension being the
+        outermost one, back to the MPI ranks they were received from upon
+        a scatter.
+
+        Returns
+        -------
+        An array with the gathered sparse points, without duplicates.
+        """
+        sendbuf = np.ascontiguousarray(array)
+        recvbuf = self._buffer('gather', (sum(self.ssparse),) + array.shape[1:],
+                               array.dtype)
+        self._alltoallv(sendbuf, self.rsparse, recvbuf, self.ssparse)
+        return recvbuf[self.gather_mask]
+
+
 class MPICommObject(Object):
 
     name = 'comm'
@@ -534,7 +721,63 @@ class MPINeighborhood(CompositeObject):
     _pickle_args = ['neighborhood']
 
 
-def compute_dims(nprocs, ndim):
+def compute_dims(nprocs, ndim, shape=None, nodes=None):
+    """
+    Arrange ``nprocs`` MPI processes into an ``ndim``-dimensional cartesian
+    topology.
+
+    Parameters
+    ----------
+    nprocs : int
+        The number of MPI processes.
+    ndim : int
+        The number of decomposed Dimensions.
+    shape : tuple of ints, optional
+        The shape of the decomposed domain. If provided, the topology minimizing
+        the total halo volume is selected. As the halo width is the same along
+        all Dimensions, the space order only scales the halo volume, hence it
+        doesn't affect the selection.
+    nodes : list, optional
+        The node each MPI process, in rank order, is running on. If provided,
+        the topology minimizing the halo volume exchanged across nodes is
+        selected, with ties broken by the total halo volume.
+
+    Examples
+    --------
+    >>> compute_dims(8, 3, shape=(1000, 1000, 400))
+    (4, 2, 1)
+    """
+    if shape is None:
+        return compute_dims_basic(nprocs, ndim)
+
+    # Subdomains should not be thinner than a grid point
+    candidates = [i for i in factorize(nprocs, ndim)
+                  if all(j <= k for j, k in zip(i, shape))]
+    if not candidates:
+        return compute_dims_basic(nprocs, ndim)
+
+    def cost(topology):
+        # Each of the `topology[d] - 1` cuts along `d` adds a halo surface
+        # of area `volume/shape[d]`
+        volume = prod(shape)
+        total = sum((i - 1)*volume/j for i, j in zip(topology, shape))
+
+        inter = 0
+        if nodes is not None:
+            # The halo surfaces separating MPI processes on different nodes
+            grid = np.array(nodes).reshape(topology)
+            for d, (i, j) in enumerate(zip(topology, shape)):
+                ncuts = np.count_nonzero(np.diff(grid, axis=d))
+                inter += ncuts*(volume/j)/(prod(topology)/i)
+
+        # Ties are broken in favour of decomposing the leftmost Dimensions,
+        # consistently with `MPI.Compute_dims`
+        return (inter, total, tuple(-i for i in topology))
+
+    return min(candidates, key=cost)
+
+
+def compute_dims_basic(nprocs, ndim):
     # We don't do anything clever here. In fact, we do something very basic --
     # we just try to distribute `nprocs` evenly over the number of dimensions,
     # and if we can't we fallback to whatever MPI.Compute_dims gives...
@@ -548,3 +791,36 @@ def compute_dims(nprocs, ndim):
     else:
         v = int(v)
     return tuple(v for _ in range(ndim))
+
+
+def compute_nodes(comm):
+    """
+    The node each MPI process in ``comm``, in rank order, is running on. A node
+    is identified by the lowest rank running on it.
+    """
+    comm_node = comm.Split_type(MPI.COMM_TYPE_SHARED)
+    leader = comm_node.allreduce(comm.rank, op=MPI.MIN)
+    comm_node.Free()
+    return comm.allgather(leader)
+
+
+def factorize(n, ndim):
+    """All of the ``ndim``-tuples of positive integers whose product is ``n``."""
+    if ndim == 1:
+        return [(n,)]
+    return [(i,) + j for i in range(1, n + 1) if n % i == 0
+            for j in factorize(n // i, ndim - 1)]
+
+
+def split(n, spec):
+    """
+    Split ``range(n)`` into either ``spec`` chunks of (nearly) equal size or,
+    if ``spec`` is a tuple, into chunks of size ``spec[0], spec[1], ...``.
+    """
+    if is_integer(spec):
+        return np.array_split(range(n), spec)
+    spec = as_tuple(spec)
+    if sum(spec) != n or any(i < 1 for i in spec):
+        raise ValueError("Cannot split `%d` points into chunks of size `%s`"
+                         % (n, str(spec)))
+    return np.split(np.arange(n), np.cumsum(spec)[:-1])
@@ -5,15 +5,18 @@ from functools import reduce
 from itertools import product
 from operator import mul
 
+import numpy as np
 from sympy import Integer
 
-from devito.data import OWNED, HALO, NOPAD, LEFT, CENTER, RIGHT, default_allocator
+from devito.data import (OWNED, HALO, NOPAD, FULL, LEFT, CENTER, RIGHT,
+                         default_allocator)
 from devito.ir.equations import DummyEq
 from devito.ir.iet import (Call, Callable, Conditional, Expression, ExpressionBundle,
                            AugmentedExpression, Iteration, List, Prodder, Return,
                            make_efunc, FindNodes, Transformer)
 from devito.ir.support import PARALLEL
 from devito.mpi import MPI
+from devito.mpi.halo_scheme import Halo
 from devito.symbolics import (Byref, CondNe, FieldFromPointer, FieldFromComposite,
                               IndexedPointer, Macro)
 from devito.tools import OrderedSet, dtype_to_mpitype, dtype_to_ctype, flatten, generator
@@ -29,7 +32,9 @@ class HaloExchangeBuilder(object):
     """
 
     def __new__(cls, mode, **generators):
-        if mode is True or mode == 'basic':
+        if mode is True or mode in ('basic', 'deep'):
+            # In `deep` mode, the halo exchanges are synchronous, but they only
+            # take place once every few timesteps
             obj = object.__new__(BasicHaloExchangeBuilder)
         elif mode == 'diag':
             obj = object.__new__(DiagHaloExchangeBuilder)
@@ -39,6 +44,8 @@ class HaloExchangeBuilder(object):
             obj = object.__new__(Overlap2HaloExchangeBuilder)
         elif mode == 'full':
             obj = object.__new__(FullHaloExchangeBuilder)
+        elif mode == 'persistent':
+            obj = object.__new__(PersistentHaloExchangeBuilder)
         else:
             assert False, "unexpected value `mode=%s`" % mode
 
@@ -860,6 +867,67 @@ class FullHaloExchangeBuilder(Overlap2HaloExchangeBuilder):
         return Prodder(poke.name, poke.parameters, single_thread=True, periodic=True)
 
 
+class PersistentHaloExchangeBuilder(BasicHaloExchangeBuilder):
+
+    """
+    A BasicHaloExchangeBuilder making use of persistent MPI requests.
+
+    The persistent requests, as well as the MPI subarray datatypes describing
+    the halo regions, are created in Python-land before jumping to C-land.
+    Thus, a halo exchange boils down to an MPI_Startall and an MPI_Waitall per
+    Dimension, with no buffer allocation nor explicit gather/scatter.
+    """
+
+    def _make_msg(self, f, hse, key):
+        halos = [Halo(d, s) for d in f.dimensions for s in (LEFT, RIGHT)
+                 if (d, s) in hse.halos]
+        fixed = [d for d in f.dimensions if d in hse.loc_indices]
+        return MPIMsgPersistent('msg%d' % key, f, halos, fixed)
+
+    def _make_all(self, f, hse, msg):
+        df = f.__class__.__base__(name='a', grid=f.grid, shape=f.shape_global,
+                                  dimensions=f.dimensions)
+
+        key = self._gen_commkey()
+        haloupdate = self._make_haloupdate(df, hse, key, msg=msg)
+
+        self._cache_halo[(f.ndim, hse)] = (haloupdate, None)
+        self._efuncs.append(haloupdate)
+
+        return haloupdate, None
+
+    def _make_haloupdate(self, f, hse, key, msg=None):
+        fixed = {d: Symbol(name="o%s" % d.root) for d in hse.loc_indices}
+
+        # The requests are laid out in row-major order of the fixed indices,
+        # then by Dimension and side, with a receive and a send for each side
+        slot = 0
+        for d in f.dimensions:
+            if d in fixed:
+                slot = slot*f._C_get_field(FULL, d).size + fixed[d]
+        reqs = FieldFromPointer(msg._C_field_reqs, msg)
+
+        body = []
+        ofs = 0
+        for d in f.dimensions:
+            nreqs = 2*len([s for s in (LEFT, RIGHT) if (d, s) in hse.halos])
+            if d in fixed or nreqs == 0:
+                continue
+            # One Dimension at a time, so that the corners are updated too
+            reqs_d = Byref(IndexedPointer(reqs, slot*msg.nreqs + ofs))
+            body.append(Call('MPI_Startall', [nreqs, reqs_d]))
+            body.append(Call('MPI_Waitall', [nreqs, reqs_d,
+                                             Macro('MPI_STATUSES_IGNORE')]))
+            ofs += nreqs
+
+        iet = List(body=body)
+        parameters = [f, msg] + list(fixed.values())
+        return Callable('haloupdate%d' % key, iet, 'void', parameters, ('static',))
+
+    def _call_haloupdate(self, name, f, hse, msg):
+        return Call(name, [f, msg] + list(hse.loc_indices.values()))
+
+
 class MPIStatusObject(LocalObject):
 
     dtype = type('MPI_Status', (c_void_p,), {})
@@ -1022,6 +1090,114 @@ class MPIMsgEnriched(MPIMsg):
         return {self.name: self.value}
 
 
+class MPIMsgPersistent(CompositeObject):
+
+    _C_field_reqs = 'reqs'
+
+    def __init__(self, name, function, halos, fixed):
+        self._function = function
+        self._halos = tuple(halos)
+        self._fixed = tuple(fixed)
+        fields = [(MPIMsgPersistent._C_field_reqs, POINTER(MPIMsg.c_mpirequest_p))]
+        super(MPIMsgPersistent, self).__init__(name, 'msgp', fields)
+
+        # The persistent requests, to be freed upon returning from C-land
+        self._requests = []
+
+    def __del__(self):
+        self._C_memfree()
+
+    def _C_memfree(self):
+        for i in self._requests:
+            i.Free()
+        self._requests[:] = []
+
+    @property
+    def function(self):
+        return self._function
+
+    @property
+    def halos(self):
+        return self._halos
+
+    @property
+    def fixed(self):
+        return self._fixed
+
+    @property
+    def nreqs(self):
+        """The number of requests for a given set of fixed indices."""
+        return 2*len(self.halos)
+
+    def _make_datatype(self, function, shape, mpitype, fixed, region, dim, side):
+        sizes = []
+        starts = []
+        for d in function.dimensions:
+            if d in fixed:
+                sizes.append(1)
+                starts.append(fixed[d])
+            elif d is dim:
+                if region is OWNED:
+                    size, offset = function._size_owned[d], function._offset_owned[d]
+                else:
+                    size, offset = function._size_halo[d], function._offset_halo[d]
+                sizes.append(getattr(size, side.name))
+                starts.append(getattr(offset, side.name))
+            else:
+                sizes.append(function._size_nopad[d])
+                starts.append(function._offset_halo[d].left)
+        if 0 in sizes:
+            return None
+        return mpitype.Create_subarray(shape, sizes, starts).Commit()
+
+    def _arg_defaults(self, alias=None, procnull=False):
+        self._C_memfree()
+
+        function = alias or self.function
+        distributor = function.grid.distributor
+        neighborhood = distributor.neighborhood
+        data = function._data_allocated
+        mpitype = MPI._typedict[np.dtype(function.dtype).char]
+
+        ranges = [range(data.shape[function.dimensions.index(d)]) for d in self.fixed]
+        for indices in product(*ranges):
+            fixed = dict(zip(self.fixed, indices))
+            for dim, side in self.halos:
+                # Sending to `side`, receiving from the opposite side
+                torank = neighborhood[dim][side]
+                fromrank = neighborhood[dim][side.flip()]
+                if procnull:
+                    torank = fromrank = MPI.PROC_NULL
+                for region, rank, init in [(HALO, fromrank, distributor.comm.Recv_init),
+                                           (OWNED, torank, distributor.comm.Send_init)]:
+                    s = side.flip() if region is HALO else side
+                    dtype = self._make_datatype(function, data.shape, mpitype, fixed,
+                                                region, dim, s)
+                    if dtype is None:
+                        request = init([data, 0, mpitype], MPI.PROC_NULL, 13)
+                    else:
+                        request = init([data, 1, dtype], rank, 13)
+                        # Freeing a datatype doesn't affect the requests using it
+                        dtype.Free()
+                    self._requests.append(request)
+
+        reqs = (MPIMsg.c_mpirequest_p*len(self._requests))(
+            *[MPI._handleof(i) for i in self._requests]
+        )
+        self.value._obj.reqs = reqs
+
+        return {self.name: self.value}
+
+    def _arg_values(self, args=None, **kwargs):
+        return self._arg_defaults(alias=kwargs.get(self.function.name, self.function))
+
+    def _arg_apply(self, *args, **kwargs):
+        self._C_memfree()
+
+    # Pickling support
+    _pickle_args = ['name', 'function', 'halos', 'fixed']
+
+
 class MPIRegion(CompositeObject):
 
     def __init__(self, name, arguments, owned):
@@ -12,7 +12,8 @@ from devito.types.basic import Scalar
 from devito.types.dense import SubFunction
 from devito.types.dimension import ConditionalDimension, Dimension, DefaultDimension
 
-__all__ = ['LinearInterpolator', 'PrecomputedInterpolator']
+__all__ = ['LinearInterpolator', 'LagrangeInterpolator', 'SincInterpolator',
+           'PrecomputedInterpolator']
 
 
 class UnevaluatedSparseOperation(Evaluable):
@@ -163,6 +164,17 @@ class LinearInterpolator(GenericInterpolator):
         A = A.subs(reference_cell)
         return A.inv().T * p
 
+    @property
+    def _weights(self):
+        """
+        The interpolation weight of each grid point surrounding a sparse point,
+        either computed on-the-fly or precomputed by the SparseFunction.
+        """
+        if self.sfunction.precompute:
+            return self.sfunction._interpolation_weights
+        else:
+            return self._interpolation_coeffs
+
     def _interpolation_indices(self, variables, offset=0, field_offset=0):
         """
         Generate interpolation indices for the DiscreteFunctions in ``variables``.
@@ -189,10 +201,11 @@ class LinearInterpolator(GenericInterpolator):
         # Temporaries for the indirection dimensions
         temps = [Eq(v, k, implicit_dims=self.sfunction.dimensions)
                  for k, v in points.items()]
-        # Temporaries for the coefficients
-        temps.extend([Eq(p, c, implicit_dims=self.sfunction.dimensions)
-                      for p, c in zip(self.sfunction._point_symbols,
-                                      self.sfunction._coordinate_bases(field_offset))])
+        # Temporaries for the coefficients, unless precomputed
+        if not self.sfunction.precompute:
+            bases = self.sfunction._coordinate_bases(field_offset)
+            temps.extend([Eq(p, c, implicit_dims=self.sfunction.dimensions)
+                          for p, c in zip(self.sfunction._point_symbols, bases)])
 
         return idx_subs, temps
 
@@ -228,7 +241,7 @@ class LinearInterpolator(GenericInterpolator):
 
             # Substitute coordinate base symbols into the interpolation coefficients
             args = [_expr.xreplace(v_sub) * b.xreplace(v_sub)
-                    for b, v_sub in zip(self._interpolation_coeffs, idx_subs)]
+                    for b, v_sub in zip(self._weights, idx_subs)]
 
             # Accumulate point-wise contributions into a temporary
             rhs = Scalar(name='sum', dtype=self.sfunction.dtype)
@@ -276,13 +289,270 @@ class LinearInterpolator(GenericInterpolator):
             # Substitute coordinate base symbols into the interpolation coefficients
             eqns = [Inc(field.xreplace(vsub), _expr.xreplace(vsub) * b,
                         implicit_dims=self.sfunction.dimensions)
-                    for b, vsub in zip(self._interpolation_coeffs, idx_subs)]
+                    for b, vsub in zip(self._weights, idx_subs)]
 
             return temps + eqns
 
         return Injection(field, expr, offset, self, callback)
 
 
+class WindowedInterpolator(GenericInterpolator):
+
+    """
+    Abstract base class for separable interpolation schemes whose support spans
+    ``2*r`` grid points in each dimension around the sparse point. The grid
+    indices and the weights are computed once per coordinates change, in NumPy,
+    while the Operator loops over the support of each sparse point.
+
+    Parameters
+    ----------
+    sfunction: The SparseFunction that this Interpolator operates on.
+    r : int
+        The radius of the support, in grid points.
+    """
+
+    def __init__(self, sfunction, r):
+        if not isinstance(r, int):
+            raise TypeError('Need `r` int argument')
+        if r <= 0:
+            raise ValueError('`r` must be > 0')
+        self.sfunction = sfunction
+        self.r = r
+        # The halo of the interpolated/injected fields, which bounds the support
+        self._halo = None
+
+    @property
+    def grid(self):
+        return self.sfunction.grid
+
+    @abstractmethod
+    def _kernel(self, t, k):
+        """
+        The 1D interpolation weights of the grid points at offset ``k`` (in
+        [-r + 1, r]) from the reference grid point, for sparse points at
+        fractional distance ``t`` (in [0, 1)) from the reference grid point.
+        """
+        pass
+
+    def _update_halo(self, fields):
+        """
+        Track the smallest halo of ``fields``, in which the support of the sparse
+        points must be clamped. Any precomputed data is invalidated if it shrinks.
+        The SparseFunctions in ``fields``, such as the injected ones, are ignored.
+        """
+        fields = [f.function for f in fields if not f.function.is_SparseFunction]
+        halo = [[h.left, h.right] for h in fields[0]._size_halo[-self.grid.dim:]]
+        for f in fields[1:]:
+            for i, h in zip(halo, f._size_halo[-self.grid.dim:]):
+                i[:] = [min(i[0], h.left), min(i[1], h.right)]
+        halo = tuple(tuple(i) for i in halo)
+        if self._halo is not None:
+            halo = tuple((min(i[0], j[0]), min(i[1], j[1]))
+                         for i, j in zip(halo, self._halo))
+        if halo != self._halo:
+            self._halo = halo
+            self.sfunction._precomputed_coords = None
+            try:
+                self.sfunction._dist_plan_cache[0].precomputed = None
+            except AttributeError:
+                pass
+
+    def _check_halo(self):
+        """
+        With MPI, the interpolated value retained for a sparse point is the one
+        computed by the MPI rank owning its reference grid point, which must thus
+        be able to read the whole support within its halo.
+        """
+        for (left, right), n in zip(self._halo, self.grid.distributor.topology):
+            if n > 1 and (left < self.r - 1 or right < self.r):
+                raise ValueError("With MPI, interpolation with `r=%d` requires "
+                                 "halos at least %d grid points deep, but the "
+                                 "interpolated fields have halos `%s`"
+                                 % (self.r, self.r, str(self._halo)))
+
+    def _interpolation_data(self, coords):
+        """
+        Compute, for the sparse points at ``coords``, the grid index of the first
+        grid point of the support and the weight of each grid point of the support.
+        The support is clamped so as to lie within the halo of the fields;
+        the grid points that would be cut off are dropped. With MPI, this only
+        happens along the physical boundary for the MPI rank owning the sparse
+        point (see ``_check_halo``); on the other MPI ranks, the clamped support
+        still covers all of the grid points they own, which is all injection needs.
+        """
+        r = self.r
+        origin = np.array([o.data for o in self.grid.origin], dtype=self.sfunction.dtype)
+        spacing = np.array([d.spacing.data for d in self.grid.dimensions],
+                           dtype=self.sfunction.dtype)
+        shape = np.array(self.grid.distributor.shape)
+        halo = np.array(self._halo or [(0, 0)]*self.grid.dim)
+
+        pos = (np.asarray(coords, dtype=self.sfunction.dtype) - origin) / spacing
+        ref = np.floor(pos).astype(np.int32)
+
+        lower = -halo[:, 0]
+        upper = np.maximum(shape + halo[:, 1] - 2*r, lower)
+        indices = np.clip(ref - r + 1, lower, upper).astype(np.int32)
+
+        # The offset of each grid point of the (clamped) support from the
+        # reference grid point
+        k = indices[:, :, None] - ref[:, :, None] + np.arange(2*r)
+        weights = self._kernel((pos - ref)[:, :, None], k)
+        mask = (k >= -r + 1) & (k <= r) & (indices[:, :, None] + np.arange(2*r) <=
+                                           (shape + halo[:, 1] - 1)[:, None])
+        weights = np.where(mask, weights, 0.).astype(self.sfunction.dtype)
+
+        return indices, weights
+
+    def _support(self, fields):
+        """
+        The indirection indices and the separable weights for the grid points
+        in the support of the sparse points.
+        """
+        self._update_halo(fields)
+
+        sf = self.sfunction
+        p = sf._sparse_dim
+        rdims = tuple(DefaultDimension(name='r%s_%s' % (d.name, sf.name),
+                                       default_value=2*self.r)
+                      for d in self.grid.dimensions)
+        subs = {d: sf._interp_indices.indexify((p, i)) + rd
+                for i, (d, rd) in enumerate(zip(self.grid.dimensions, rdims))}
+        weight = prod([sf._interp_weights.indexify((p, i, rd))
+                       for i, rd in enumerate(rdims)])
+
+        return rdims, subs, weight
+
+    def interpolate(self, expr, offset=0, increment=False, self_subs={}):
+        """
+        Generate equations interpolating an arbitrary expression into ``self``.
+
+        Parameters
+        ----------
+        expr : expr-like
+            Input expression to interpolate.
+        offset : int, optional
+            Unused, as the support is always clamped within the halo.
+        increment: bool, optional
+            If True, generate increments (Inc) rather than assignments (Eq).
+        """
+        def callback():
+            # Derivatives must be evaluated before the introduction of indirect accesses
+            try:
+                _expr = expr.evaluate
+            except AttributeError:
+                # E.g., a generic SymPy expression or a number
+                _expr = expr
+            _expr = indexify(_expr)
+
+            variables = list(retrieve_function_carriers(_expr))
+            rdims, subs, weight = self._support(variables)
+            implicit_dims = self.sfunction.dimensions + rdims
+            self._check_halo()
+
+            # Accumulate point-wise contributions into a temporary
+            rhs = Scalar(name='sum', dtype=self.sfunction.dtype)
+            summands = [Eq(rhs, 0., implicit_dims=self.sfunction.dimensions),
+                        Inc(rhs, _expr.xreplace(subs) * weight,
+                            implicit_dims=implicit_dims)]
+
+            # Write/Incr `self`
+            lhs = self.sfunction.subs(self_subs)
+            last = [Inc(lhs, rhs)] if increment else [Eq(lhs, rhs)]
+
+            return summands + last
+
+        return Interpolation(expr, offset, increment, self_subs, self, callback)
+
+    def inject(self, field, expr, offset=0):
+        """
+        Generate equations injecting an arbitrary expression into a field.
+
+        Parameters
+        ----------
+        field : Function
+            Input field into which the injection is performed.
+        expr : expr-like
+            Injected expression.
+        offset : int, optional
+            Unused, as the support is always clamped within the halo.
+        """
+        def callback():
+            # Derivatives must be evaluated before the introduction of indirect accesses
+            try:
+                _expr = expr.evaluate
+            except AttributeError:
+                # E.g., a generic SymPy expression or a number
+                _expr = expr
+            _expr = indexify(_expr)
+            _field = indexify(field)
+
+            variables = list(retrieve_function_carriers(_expr)) + [field]
+            rdims, subs, weight = self._support(variables)
+            implicit_dims = self.sfunction.dimensions + rdims
+
+            return [Inc(_field.xreplace(subs), _expr.xreplace(subs) * weight,
+                        implicit_dims=implicit_dims)]
+
+        return Injection(field, expr, offset, self, callback)
+
+
+class LagrangeInterpolator(WindowedInterpolator):
+
+    """
+    Concrete implementation of GenericInterpolator implementing a tensor-product
+    Lagrange interpolation scheme over ``2*r`` grid points per dimension, e.g.
+    cubic interpolation for ``r=2``. With ``r=1``, this is equivalent to
+    LinearInterpolator.
+
+    Parameters
+    ----------
+    sfunction: The SparseFunction that this Interpolator operates on.
+    r : int
+        The radius of the support, in grid points.
+    """
+
+    def _kernel(self, t, k):
+        nodes = np.arange(-self.r + 1, self.r + 1)
+        ret = np.ones(np.broadcast(t, k).shape)
+        for m in nodes:
+            ret *= np.where(k == m, 1., (t - m) / np.where(k == m, 1, k - m))
+        return ret
+
+
+class SincInterpolator(WindowedInterpolator):
+
+    """
+    Concrete implementation of GenericInterpolator implementing a Kaiser-windowed
+    sinc interpolation scheme over ``2*r`` grid points per dimension, as in:
+
+        Hicks, G. J. (2002). Arbitrary source and receiver positioning in
+        finite-difference schemes using Kaiser windowed sinc functions.
+        Geophysics, 67(1), 156-165.
+
+    Parameters
+    ----------
+    sfunction: The SparseFunction that this Interpolator operates on.
+    r : int
+        The radius of the support, in grid points, at most 10.
+    """
+
+    # Optimal Kaiser window shape parameter for each radius (Hicks, 2002)
+    _b = {1: 2.94, 2: 4.53, 3: 4.14, 4: 5.26, 5: 6.40,
+          6: 7.51, 7: 8.56, 8: 9.56, 9: 10.64, 10: 10.83}
+
+    def __init__(self, sfunction, r):
+        super(SincInterpolator, self).__init__(sfunction, r)
+        if r not in self._b:
+            raise ValueError('`r` must be <= %d' % max(self._b))
+
+    def _kernel(self, t, k):
+        x = t - k
+        b = self._b[self.r]
+        window = np.i0(b*np.sqrt(np.clip(1. - (x/self.r)**2, 0., None))) / np.i0(b)
+        return np.sinc(x) * window
+
+
 class PrecomputedInterpolator(GenericInterpolator):
 
     def __init__(self, obj, r, gridpoints_data, coefficients_data):
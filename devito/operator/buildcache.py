@@ -0,0 +1,210 @@
+"""
+A persistent, on-disk cache of lowered Operators.
+
+An Operator is stored, right after lowering, as a pickle. The data carriers
+appearing in the user-provided expressions (Functions, SparseFunctions,
+Constants, ...) are not pickled by value; they are rather recorded through
+their name, and rebound to the objects supplied by the user upon loading.
+Thus, a cache hit entirely bypasses the lowering pipeline, while the loaded
+Operator still operates on the user's data.
+"""
+
+from io import BytesIO
+import os
+import pickle
+
+from devito.logger import debug
+from devito.parameters import configuration
+from devito.symbolics import retrieve_functions
+from devito.tools import Signer, as_tuple, filter_sorted, make_tempdir
+from devito.types import Dimension
+
+__all__ = ['build_cache_key', 'build_cache_load', 'build_cache_dump']
+
+
+def user_expressions(cls, expressions):
+    """
+    The user-provided ``expressions`` augmented with any implicit expression
+    and flattened (e.g., a tensorial Eq becomes a sequence of scalar Eqs),
+    but still unevaluated.
+    """
+    processed = []
+    for i in cls._add_implicit(as_tuple(expressions)):
+        try:
+            processed.extend(i._flatten)
+        except AttributeError:
+            # E.g., an Injection, which is cheap to evaluate
+            processed.extend(as_tuple(i.evaluate))
+    return processed
+
+
+def user_objects(expressions):
+    """
+    Map names to the user-provided data carriers (e.g., Functions, Constants)
+    and to the Dimensions appearing in ``expressions``.
+    """
+    functions = {}
+    dimensions = {}
+    for e in expressions:
+        for i in retrieve_functions(e):
+            f = i.function
+            functions[f.name] = f
+            for j in f._sub_functions if hasattr(f, '_sub_functions') else ():
+                sf = getattr(f, j, None)
+                if sf is not None:
+                    functions[sf.name] = sf
+            dimensions.update({d.name: d for d in f.dimensions})
+        for i in e.free_symbols:
+            if getattr(i, 'is_Constant', False):
+                functions[i.name] = i
+            elif isinstance(i, Dimension):
+                dimensions[i.name] = i
+        dimensions.update({d.name: d for d in getattr(e, 'implicit_dims', ())})
+        subdomain = getattr(e, 'subdomain', None)
+        if subdomain is not None:
+            dimensions.update({d.name: d for d in subdomain.dimension_map.values()})
+    return functions, dimensions
+
+
+def build_cache_key(cls, expressions, **kwargs):
+    """
+    A unique, deterministic key for the Operator built by ``cls`` out of
+    ``expressions`` and ``kwargs``. The key depends on the symbolic structure
+    of ``expressions``, on the symbolic metadata of the objects therein (e.g.,
+    dtype, halo, staggering), and on the JIT-relevant entries of
+    ``configuration``, but not on any numerical data.
+    """
+    expressions = user_expressions(cls, expressions)
+
+    items = [cls.__name__]
+
+    for e in expressions:
+        items.extend([type(e).__name__, str(e)])
+        items.append(str(getattr(e, 'implicit_dims', None)))
+        subdomain = getattr(e, 'subdomain', None)
+        if subdomain is not None:
+            items.append(str(subdomain))
+        substitutions = getattr(e, 'substitutions', None)
+        if substitutions is not None:
+            items.append(str(sorted(str(i) for i in substitutions.rules.items())))
+
+    functions, dimensions = user_objects(expressions)
+    for f in filter_sorted(functions.values()):
+        items.extend([type(f).__base__.__name__, f.name, str(f.dtype)])
+        if f.is_Constant:
+            continue
+        items.extend([str(f.function), str(f.halo), str(f.padding),
+                      str(getattr(f, 'shape_global', f.shape))])
+        items.extend([str(getattr(f, i, None))
+                      for i in ('space_order', 'time_order', 'save', 'staggered')])
+    for d in filter_sorted(dimensions.values()):
+        args, kws = d.__getnewargs_ex__()
+        items.extend([type(d).__name__, str(args), str(sorted(kws.items()))])
+
+    for k, v in sorted(kwargs.items()):
+        if k == 'platform':
+            # Already part of `configuration`
+            continue
+        if isinstance(v, dict):
+            v = sorted((str(i), str(j)) for i, j in v.items())
+        items.append('%s:%s' % (k, v))
+
+    items.extend(configuration._signature_items())
+
+    return Signer._sign(items)
+
+
+class BuildCachePickler(pickle.Pickler):
+
+    """
+    A Pickler recording the user-provided data carriers by name.
+    """
+
+    def __init__(self, file, functions):
+        super(BuildCachePickler, self).__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.functions = functions
+
+    def persistent_id(self, obj):
+        try:
+            f = obj.function
+        except AttributeError:
+            return None
+        if f is not self.functions.get(getattr(f, 'name', None)):
+            return None
+        if obj is f:
+            return ('devito', f.name, None)
+        elif type(obj) is type(f):
+            # E.g., `u(t + dt, x, y)`
+            return ('devito', f.name, obj.args)
+        else:
+            # E.g., an Indexed, which is pickled by value
+            return None
+
+
+class BuildCacheUnpickler(pickle.Unpickler):
+
+    """
+    An Unpickler rebinding the recorded data carriers to the user-provided ones.
+    """
+
+    def __init__(self, file, functions):
+        super(BuildCacheUnpickler, self).__init__(file)
+        self.functions = functions
+
+    def persistent_load(self, pid):
+        _, name, args = pid
+        try:
+            f = self.functions[name]
+        except KeyError:
+            raise pickle.UnpicklingError("Unknown object `%s`" % name)
+        return f if args is None else f.func(*args)
+
+
+def build_cache_path(key):
+    return make_tempdir('buildcache').joinpath('%s.pkl' % key)
+
+
+def build_cache_load(cls, key, expressions):
+    """
+    Load the Operator associated with ``key``, or return None on a cache miss.
+    """
+    path = build_cache_path(key)
+    if not path.is_file():
+        return None
+
+    functions, _ = user_objects(user_expressions(cls, expressions))
+    try:
+        with open(str(path), 'rb') as f:
+            op = BuildCacheUnpickler(f, functions).load()
+    except Exception as e:
+        # A stale or corrupted entry -- we simply fall back to lowering
+        debug("Unable to load `%s` from the build cache [%s]" % (path.name, e))
+        return None
+
+    # The compiler is a runtime choice
+    op._compiler = configuration['compiler']
+
+    return op
+
+
+def build_cache_dump(cls, key, op, expressions):
+    """
+    Store the lowered Operator ``op`` into the build cache under ``key``.
+    """
+    path = build_cache_path(key)
+
+    functions, _ = user_objects(user_expressions(cls, expressions))
+    buf = BytesIO()
+    try:
+        BuildCachePickler(buf, functions).dump(op)
+    except Exception as e:
+        debug("Operator `%s` could not be stored in the build cache [%s]" %
+              (op.name, e))
+        return
+
+    # Write to a temporary file first and then atomically move it, so that
+    # concurrent processes (e.g., MPI ranks) never observe partial files
+    tmpfile = path.with_suffix('.%d.tmp' % os.getpid())
+    with open(str(tmpfile), 'wb') as f:
+        f.write(buf.getvalue())
+    os.replace(str(tmpfile), str(path))
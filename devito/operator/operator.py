@@ -1,4 +1,5 @@
 from collections import OrderedDict
+from concurrent.futures import Future
 from functools import reduce
 from operator import attrgetter, mul
 from math import ceil
@@ -12,6 +13,8 @@ from devito.ir.equations import LoweredEq
 from devito.ir.clusters import ClusterGroup, clusterize
 from devito.ir.iet import Callable, MetaCall, iet_build, derive_parameters
 from devito.ir.stree import stree_build
+from devito.operator.buildcache import (build_cache_key, build_cache_load,
+                                        build_cache_dump)
 from devito.operator.registry import operator_selector
 from devito.operator.profiling import create_profile
 from devito.mpi import MPI
@@ -21,6 +24,7 @@ from devito.symbolics import indexify
 from devito.tools import (DAG, Signer, ReducerMap, as_tuple, flatten, filter_ordered,
                           filter_sorted, split, timed_pass, timed_region, Evaluable)
 from devito.types import Dimension, Eq
+from devito.types.sparse import AbstractSparseFunction
 
 __all__ = ['Operator']
 
@@ -127,6 +131,9 @@ class Operator(Callable):
     _default_includes = ['stdlib.h', 'math.h', 'sys/time.h']
     _default_globals = []
 
+    _jit_future = None
+    """The pending asynchronous JIT compilation, if any."""
+
     def __new__(cls, expressions, **kwargs):
         if expressions is None:
             # Return a dummy Callable. This is exploited by unpickling. Users
@@ -141,7 +148,10 @@ class Operator(Callable):
 
         # Lower to a JIT-compilable object
         with timed_region('op-compile') as r:
-            op = cls._build(expressions, **kwargs)
+            if configuration['build-cache']:
+                op = cls._build_cached(expressions, **kwargs)
+            else:
+                op = cls._build(expressions, **kwargs)
         op._profiler.py_timers.update(r.timings)
 
         # Emit info about how long it took to perform the lowering
@@ -209,6 +219,25 @@ class Operator(Callable):
 
         return op
 
+    @classmethod
+    def _build_cached(cls, expressions, **kwargs):
+        """
+        Like ``_build``, but first attempt to fetch the lowered Operator from
+        the on-disk build cache. Upon a cache miss, the newly lowered Operator
+        is stored into the build cache, for use by later runs.
+        """
+        key = build_cache_key(cls, expressions, **kwargs)
+
+        op = build_cache_load(cls, key, expressions)
+        if op is not None:
+            perf("Operator `%s` fetched from build-cache" % op.name)
+            return op
+
+        op = cls._build(expressions, **kwargs)
+        build_cache_dump(cls, key, op, expressions)
+
+        return op
+
     def __init__(self, *args, **kwargs):
         # Bypass the silent call to __init__ triggered through the backends engine
         pass
@@ -385,6 +414,9 @@ class Operator(Callable):
         graph = Graph(iet)
         graph = cls._specialize_iet(graph, **kwargs)
 
+        # Instrument the parallel constructs for C-level profiling
+        profiler.instrument_parallel(graph)
+
         return graph.root, graph
 
     # Read-only properties exposed to the outside world
@@ -484,6 +516,9 @@ class Operator(Callable):
         # Add in any backend-specific argument
         args.update(kwargs.pop('backend', {}))
 
+        # Attach `grid` to the arguments map
+        args = ArgumentsMap(grid, **args)
+
         # Execute autotuning and adjust arguments accordingly
         args = self._autotune(args, kwargs.pop('autotune', configuration['autotuning']))
 
@@ -493,18 +528,23 @@ class Operator(Callable):
                 if k not in self._known_arguments:
                     raise ValueError("Unrecognized argument %s=%s" % (k, v))
 
-        # Attach `grid` to the arguments map
-        args = ArgumentsMap(grid, **args)
-
         return args
 
     def _postprocess_arguments(self, args, **kwargs):
         """Process runtime arguments upon returning from ``.apply()``."""
+        names = {p.name for p in self.parameters}
         for p in self.parameters:
-            try:
-                p._arg_apply(args[p.name], args[p.coordinates.name], kwargs.get(p.name))
-            except AttributeError:
+            coordinates = getattr(p, 'coordinates', None)
+            if coordinates is None:
                 p._arg_apply(args[p.name], kwargs.get(p.name))
+                continue
+            # The coordinates aren't a parameter if the Operator doesn't use them
+            # (e.g., with precomputed interpolation indices and weights)
+            if coordinates.name in names:
+                coordsobj = args[coordinates.name]
+            else:
+                coordsobj = None
+            p._arg_apply(args[p.name], coordsobj, kwargs.get(p.name))
 
     @cached_property
     def _known_arguments(self):
@@ -540,9 +580,24 @@ class Operator(Callable):
         Operator, reagardless of how many times this method is invoked.
         """
         if self._lib is None:
-            with self._profiler.timer_on('jit-compile'):
-                recompiled, src_file = self._compiler.jit_compile(self._soname,
-                                                                  str(self.ccode))
+            comm = self._jit_comm()
+            if comm is not None and comm.rank != 0:
+                # Another rank performs the JIT compilation, then we receive
+                # the shared object from it
+                with self._profiler.timer_on('jit-compile'):
+                    self._compiler.bcast(self._soname, comm)
+                perf("Operator `%s` received `%s` in %.2f s via broadcast" %
+                     (self.name, self._soname, self._profiler.py_timers['jit-compile']))
+                return
+
+            if self._jit_future is None:
+                with self._profiler.timer_on('jit-compile'):
+                    recompiled, src_file = self._compiler.jit_compile(self._soname,
+                                                                      str(self.ccode))
+            else:
+                # Block until the asynchronous compilation has completed
+                recompiled, src_file, elapsed = self._jit_future.result()
+                self._profiler.py_timers['jit-compile'] = elapsed
 
             elapsed = self._profiler.py_timers['jit-compile']
             if recompiled:
@@ -552,6 +607,71 @@ class Operator(Callable):
                 perf("Operator `%s` fetched `%s` in %.2f s from jit-cache" %
                      (self.name, src_file, elapsed))
 
+            if comm is not None:
+                self._compiler.bcast(self._soname, comm)
+
+    def _jit_comm(self):
+        """
+        The MPI communicator over which the JIT-compiled shared object is
+        broadcast, or None if each MPI rank should JIT-compile on its own.
+        """
+        mode = configuration['jit-broadcast']
+        if not mode or not configuration['mpi']:
+            return None
+        grids = {getattr(i, 'grid', None) for i in self.input}
+        grids.discard(None)
+        if len(grids) != 1:
+            return None
+        distributor = grids.pop().distributor
+        if not distributor.is_parallel:
+            return None
+        if mode == 'node':
+            return distributor.comm_node
+        else:
+            return distributor.comm
+
+    def compile_async(self, executor=None):
+        """
+        JIT-compile the C code generated by the Operator in the background.
+
+        This method returns immediately, so the JIT compilation of multiple
+        Operators may overlap with each other as well as with any other work
+        carried out by the caller. Later, ``apply`` will only block until the
+        JIT compilation of this very Operator has completed.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor, optional
+            The pool performing the compilation. Defaults to a thread pool
+            shared by all Operators.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Completed once the Operator has been JIT-compiled.
+
+        Examples
+        --------
+        >>> from devito import Eq, Grid, Function, Operator
+        >>> grid = Grid(shape=(4, 4))
+        >>> f = Function(name='f', grid=grid)
+        >>> ops = [Operator(Eq(f, f + 1)), Operator(Eq(f, f - 1))]
+        >>> futures = [op.compile_async() for op in ops]
+        >>> summary = ops[0].apply()
+        """
+        comm = self._jit_comm()
+        if self._jit_future is None:
+            if self._lib is None and (comm is None or comm.rank == 0):
+                self._jit_future = self._compiler.jit_compile_async(self._soname,
+                                                                    str(self.ccode),
+                                                                    executor)
+            else:
+                # Nothing to do, either already JIT-compiled or the shared
+                # object will be received, upon `apply`, from another rank
+                self._jit_future = Future()
+                self._jit_future.set_result((False, None, 0.))
+        return self._jit_future
+
     @property
     def cfunction(self):
         """The JIT-compiled C function as a ctypes.FuncPtr object."""
@@ -639,11 +759,65 @@ class Operator(Callable):
             args = self.arguments(**kwargs)
 
         # Invoke kernel function with args
+        self._invoke(args)
+
+        # Post-process runtime arguments
+        self._postprocess_arguments(args, **kwargs)
+
+        # Output summary of performance achieved
+        return self._emit_apply_profiling(args)
+
+    def prepare(self, **kwargs):
+        """
+        Bind the Operator arguments once, for repeated execution.
+
+        The arguments are processed as in ``apply``, and the returned
+        PreparedCall may then be executed many times, possibly patching some
+        of them. This is much cheaper than calling ``apply`` each time, as the
+        arguments aren't processed again from scratch.
+
+        Parameters
+        ----------
+        **kwargs
+            The same key-value arguments accepted by ``apply``.
+
+        Examples
+        --------
+        >>> from devito import Eq, Grid, TimeFunction, Operator
+        >>> grid = Grid(shape=(3, 3))
+        >>> u = TimeFunction(name='u', grid=grid, save=5)
+        >>> op = Operator(Eq(u.forward, u + 1))
+        >>> call = op.prepare(time_M=1)
+        >>> summary = call()
+        >>> summary = call(time_m=2, time_M=3)
+        >>> u.data[:, 0, 0]
+        Data([0., 1., 2., 3., 4.], dtype=float32)
+        """
+        with self._profiler.timer_on('arguments'):
+            args = self.arguments(**kwargs)
+        return PreparedCall(self, args, **kwargs)
+
+    def _invoke(self, args, step=None):
+        """
+        Invoke the JIT-compiled kernel function with the arguments ``args``.
+
+        If ``step`` is supplied, as a ``(callback, backward)`` pair, the kernel
+        function is invoked one timestep at a time, see ``_apply_stepwise``.
+        """
         arg_values = [args[p.name] for p in self.parameters]
+        streams = [p for p in self.parameters if getattr(p, 'stream', None) is not None]
+        if streams and step is not None:
+            raise ValueError("Cannot run an Operator with streamed "
+                             "SparseTimeFunctions one timestep at a time")
         try:
             cfunction = self.cfunction
             with self._profiler.timer_on('apply', comm=args.comm):
-                cfunction(*arg_values)
+                if streams:
+                    self._apply_streamed(cfunction, args, streams)
+                elif step is not None:
+                    self._apply_stepwise(cfunction, args, *step)
+                else:
+                    cfunction(*arg_values)
         except ctypes.ArgumentError as e:
             if e.args[0].startswith("argument "):
                 argnum = int(e.args[0][9:].split(':')[0]) - 1
@@ -655,11 +829,59 @@ class Operator(Callable):
             else:
                 raise
 
-        # Post-process runtime arguments
-        self._postprocess_arguments(args, **kwargs)
+    def _apply_streamed(self, cfunction, args, streams):
+        """
+        Run ``cfunction`` one chunk of timesteps at a time, so that the chunks
+        of the SparseTimeFunctions in ``streams`` are written to disk, by a
+        background thread, while the next chunk is computed.
+        """
+        dim = streams[0].time_dim
+        time_m, time_M = args[dim.min_name], args[dim.max_name]
 
-        # Output summary of performance achieved
-        return self._emit_apply_profiling(args)
+        dataobjs = {f: args[f.name] for f in streams}
+        pointers = {f: dataobjs[f]._obj.data for f in streams}
+        for f in streams:
+            f.stream._open(f._C_as_ndarray(dataobjs[f]))
+        chunk = min(f._time_size for f in streams)
+
+        try:
+            for n, t0 in enumerate(range(time_m, time_M + 1, chunk)):
+                t1 = min(t0 + chunk, time_M + 1) - 1
+                # Shift the data pointers so that the generated code, which
+                # indexes the buffers by timestep, accesses the current chunk
+                for f in streams:
+                    buf = f.stream._acquire(n)
+                    dataobjs[f]._obj.data = ctypes.c_void_p(buf.ctypes.data -
+                                                            t0*buf.strides[0])
+                args.update({dim.min_name: t0, dim.max_name: t1})
+                cfunction(*[args[p.name] for p in self.parameters])
+                for f in streams:
+                    f.stream._release(n, t0, t1 - t0 + 1)
+        finally:
+            for f in streams:
+                f.stream._close()
+                dataobjs[f]._obj.data = pointers[f]
+            args.update({dim.min_name: time_m, dim.max_name: time_M})
+
+    def _apply_stepwise(self, cfunction, args, callback, backward=False):
+        """
+        Run ``cfunction`` one timestep at a time, in reverse order if ``backward``,
+        calling ``callback(t)`` right before computing each timestep ``t``.
+        """
+        if args.grid is None:
+            raise ValueError("Cannot run an Operator without a Grid one "
+                             "timestep at a time")
+        dim = args.grid.time_dim
+        time_m, time_M = args[dim.min_name], args[dim.max_name]
+
+        timesteps = range(time_m, time_M + 1)
+        try:
+            for t in (reversed(timesteps) if backward else timesteps):
+                callback(t)
+                args.update({dim.min_name: t, dim.max_name: t})
+                cfunction(*[args[p.name] for p in self.parameters])
+        finally:
+            args.update({dim.min_name: time_m, dim.max_name: time_M})
 
     # Performance profiling
 
@@ -726,6 +948,11 @@ class Operator(Callable):
             if v is not None:
                 perf("%s* Achieved %.2f FD-GPts/s" % (indent, v.gpointss))
 
+            # Load imbalance across ranks, excluding the halo exchanges
+            for k, v in summary.ranks.items():
+                perf("%s* %s compute time imbalance across ranks (max/mean)=%.2f" %
+                     (indent, k, fround(v.ratio)))
+
             perf("Local performance indicators")
         else:
             indent = ""
@@ -752,6 +979,26 @@ class Operator(Callable):
                 perf("%s* %s%s computed in %.2f s"
                      % (indent, name, rank, fround(v.time)))
 
+            # Hardware counters, if available, vs static estimates
+            c = summary.counters.get(k)
+            if c is not None:
+                gbytess = float(summary.input[k].traffic)/10**9/v.time
+                perf("%s  measured %.2f GB/s with OI=%.2f and IPC=%.2f "
+                     "[estimated %.2f GB/s with OI=%.2f]" %
+                     (indent, fround(c.gbytess), fround(c.oi), fround(c.ipc),
+                      fround(gbytess), fround(v.oi)))
+
+            # Load imbalance across threads, and halo exchanges, if available
+            t = summary.threads.get(k)
+            if t is not None:
+                perf("%s  %d threads with imbalance (max/mean)=%.2f" %
+                     (indent, len(t.times), fround(t.ratio)))
+            h = summary.halo.get(k)
+            if h is not None:
+                perf("%s  halo exchanges in %.2f s, remainder in %.2f s, "
+                     "rest in %.2f s" %
+                     (indent, fround(h.halo), fround(h.remainder), fround(h.compute)))
+
         # Emit relevant configuration values
         perf("Configuration:  %s" % self._state['optimizations'])
 
@@ -822,9 +1069,13 @@ class Operator(Callable):
             state['_args'] = None
             with open(self._lib._name, 'rb') as f:
                 state['binary'] = f.read()
+            state.pop('_jit_future', None)
             return state
         else:
-            return self.__dict__
+            state = dict(self.__dict__)
+            # A pending asynchronous JIT compilation can't be pickled
+            state.pop('_jit_future', None)
+            return state
 
     def __getnewargs_ex__(self):
         return (None,), {}
@@ -857,6 +1108,143 @@ class Operator(Callable):
 # Misc helpers
 
 
+class PreparedCall(object):
+
+    """
+    A call to an Operator with bound arguments, as returned by ``Operator.prepare``.
+
+    Calling a PreparedCall executes the Operator. Key-value arguments may be
+    passed to patch the bound arguments; these are applied permanently, that is
+    they also hold for subsequent calls. Unlike ``Operator.apply``, only the
+    patched arguments are processed, and no out-of-bounds check is performed.
+
+    Notes
+    -----
+    The bound arguments refer to the data of the Functions, so any in-place
+    modification to the data (e.g., ``src.data[:] = ...``) is seen by the
+    subsequent calls. Patching a Function with one of different shape is
+    forbidden; in such a case, ``Operator.prepare`` should be called again.
+    """
+
+    def __init__(self, op, args, **kwargs):
+        self.op = op
+        self.args = args
+        self._kwargs = kwargs
+
+        self._parameters = {p.name: p for p in op.parameters}
+        self._dimensions = {}
+        for d in op.dimensions:
+            self._dimensions[d.min_name] = (d, 0)
+            self._dimensions[d.max_name] = (d, 1)
+
+        # The SparseFunctions must refresh their data upon each call, e.g. to
+        # (re-)distribute it across the MPI ranks
+        self._sparse = [p for p in op.input if p.is_SparseFunction]
+
+    def __call__(self, **kwargs):
+        return self.apply(**kwargs)
+
+    def apply(self, **kwargs):
+        """
+        Execute the Operator.
+
+        Parameters
+        ----------
+        **kwargs
+            Patches to the bound arguments, as accepted by ``Operator.apply``.
+        """
+        return self._apply(None, **kwargs)
+
+    def stepwise(self, callback, backward=False, **kwargs):
+        """
+        Execute the Operator one timestep at a time, calling ``callback(t)``
+        right before computing each timestep ``t``.
+
+        This allows, for example, to stream the time slices of a TimeFunction
+        in or out of memory while the Operator runs. As the arguments are bound
+        only once, the overhead per timestep is that of a function call.
+
+        Parameters
+        ----------
+        callback : callable
+            Called with the timestep about to be computed.
+        backward : bool, optional
+            If True, the timesteps are computed in reverse order. Defaults to False.
+        **kwargs
+            Patches to the bound arguments, as accepted by ``Operator.apply``.
+        """
+        return self._apply((callback, backward), **kwargs)
+
+    def _apply(self, step, **kwargs):
+        op = self.op
+        with op._profiler.timer_on('arguments'):
+            # All patches are checked before any is applied, so that a failed
+            # patch leaves the bound arguments untouched
+            updates = {}
+            for k, v in kwargs.items():
+                updates.update(self._patch(k, v))
+            self.args.update(updates)
+            self._kwargs.update(kwargs)
+            self._refresh()
+            self.args[op._profiler.name] = op._profiler.timer.reset()
+
+        op._invoke(self.args, step=step)
+
+        op._postprocess_arguments(self.args, **self._kwargs)
+
+        return op._emit_apply_profiling(self.args)
+
+    def _patch(self, k, v):
+        """
+        Return the updates to the bound arguments implied by the patch ``k=v``.
+        """
+        if k in self._dimensions:
+            d, side = self._dimensions[k]
+            grid = self.args.grid
+            if grid is not None and grid.is_distributed(d):
+                bounds = (v, None) if side == 0 else (None, v)
+                v = grid.distributor.glb_to_loc(d, bounds)[side]
+            return {k: v}
+        elif k in self._parameters and self._parameters[k].is_DiscreteFunction:
+            return self._bind(k, self._parameters[k]._arg_values(**{k: v}))
+        elif k in self._parameters:
+            return dict(self._parameters[k]._arg_values(**{k: v}))
+        else:
+            raise ValueError("Unrecognized argument %s=%s" % (k, v))
+
+    def _bind(self, name, values):
+        """
+        Return the updates binding the data in ``values``, which stem from the
+        Function ``name``, to the corresponding parameters. Any other value, such
+        as a Dimension size, must match the bound one.
+        """
+        for k, v in values.items():
+            p = self._parameters.get(k)
+            if p is not None and p.is_DiscreteFunction:
+                continue
+            if k in self.args and k not in self._dimensions and self.args[k] != v:
+                raise ValueError("Patching `%s` requires `%s=%s`, rather than the "
+                                 "bound `%s=%s`; use `prepare` again instead"
+                                 % (name, k, v, k, self.args[k]))
+
+        return {k: self._parameters[k]._C_make_dataobj(v) for k, v in values.items()
+                if k in self._parameters and self._parameters[k].is_DiscreteFunction}
+
+    def _refresh(self):
+        for p in self._sparse:
+            obj = self._kwargs.get(p.name, p)
+            if not isinstance(obj, AbstractSparseFunction):
+                # A pure-data replacement, already distributed
+                continue
+            if self.args.comm is not MPI.COMM_NULL:
+                # The sparse data must be re-distributed across the MPI ranks
+                values = obj._arg_defaults(alias=p).reduce_all()
+                self.args.update(self._bind(p.name, values))
+            elif getattr(obj, 'precompute', False) or getattr(obj, 'binning', False):
+                # Refresh, in place, the data derived from the coordinates
+                obj._update_precomputed_data()
+
+
 class ArgumentsMap(dict):
 
     def __init__(self, grid, *args, **kwargs):
@@ -897,6 +1285,12 @@ def parse_kwargs(**kwargs):
                        configuration['dle-options'].get('blockinner', False))
     options.setdefault('blocklevels',
                        configuration['dle-options'].get('blocklevels', None))
+    options.setdefault('blocktime',
+                       configuration['dle-options'].get('blocktime', False))
+    options.setdefault('par-tunable',
+                       configuration['dle-options'].get('par-tunable', False))
+    options.setdefault('par-collapse',
+                       configuration['dle-options'].get('par-collapse', None))
     options.setdefault('openmp', configuration['openmp'])
     options.setdefault('mpi', configuration['mpi'])
     kwargs['options'] = options
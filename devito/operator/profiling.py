@@ -1,21 +1,29 @@
 from collections import OrderedDict, namedtuple
 from contextlib import contextmanager
-from ctypes import c_double
+from ctypes import (CDLL, POINTER, c_double, c_int, create_string_buffer,
+                    get_errno)
 from functools import reduce
 from operator import mul
 from pathlib import Path
 from time import time as seq_time
+import fcntl
 import os
+import platform
+import struct
+import weakref
 
 from cached_property import cached_property
+import cgen as c
+import numpy as np
 
-from devito.ir.iet import (Call, ExpressionBundle, List, TimedList, Section,
-                           FindNodes, Transformer)
+from devito.ir.iet import (Block, Call, ExpressionBundle, Iteration, List, TimedList,
+                           Section, FindNodes, Transformer, retrieve_iteration_tree)
 from devito.ir.support import IntervalGroup
 from devito.logger import warning
 from devito.mpi import MPI
 from devito.parameters import configuration
-from devito.symbolics import estimate_cost
+from devito.passes.iet.engine import iet_pass
+from devito.symbolics import FieldFromPointer, Macro, estimate_cost
 from devito.tools import flatten
 from devito.types import CompositeObject
 
@@ -26,6 +34,30 @@ SectionData = namedtuple('SectionData', 'ops sops points traffic itermaps')
 PerfKey = namedtuple('PerfKey', 'name rank')
 PerfInput = namedtuple('PerfInput', 'time ops points traffic sops itershapes')
 PerfEntry = namedtuple('PerfEntry', 'time gflopss gpointss oi ops itershapes')
+CounterEntry = namedtuple('CounterEntry', 'cycles instructions ipc gbytess oi')
+ImbalanceEntry = namedtuple('ImbalanceEntry', 'times ratio histogram')
+HaloEntry = namedtuple('HaloEntry', 'halo remainder compute')
+
+
+# The subset of <linux/perf_event.h> used by the `perf` profiler
+
+PERF_TYPE_HARDWARE = 0
+PERF_TYPE_SOFTWARE = 1
+
+PERF_COUNT_HW_CPU_CYCLES = 0
+PERF_COUNT_HW_INSTRUCTIONS = 1
+PERF_COUNT_HW_CACHE_MISSES = 3
+
+PERF_COUNT_SW_TASK_CLOCK = 1
+PERF_COUNT_SW_PAGE_FAULTS = 2
+
+PERF_FORMAT_TOTAL_TIME_ENABLED = 1 << 0
+PERF_FORMAT_TOTAL_TIME_RUNNING = 1 << 1
+
+PERF_EVENT_IOC_RESET = 0x2403
+PERF_IOC_FLAG_GROUP = 1
+
+PERF_FLAG_FD_CLOEXEC = 1 << 3
 
 
 class Profiler(object):
@@ -98,6 +130,14 @@ class Profiler(object):
 
         return iet
 
+    def instrument_parallel(self, graph):
+        """
+        Enrich the specialized Graph ``graph``, that is after the introduction of
+        shared-memory and distributed-memory parallelism, with nodes for C-level
+        performance profiling of the parallel constructs. By default, a no-op.
+        """
+        return
+
     @contextmanager
     def timer_on(self, name, comm=None):
         """
@@ -271,6 +311,258 @@ class AdvisorProfiler(AdvancedProfiler):
         return iet
 
 
+class PerfEventProfiler(AdvancedProfiler):
+
+    """
+    Rely on the Linux ``perf_event_open`` interface to read hardware counters
+    within each profiled section.
+
+    On top of the ``advanced`` metrics, which are derived from static estimates,
+    the summary reports, for each section, the cycles and instructions actually
+    executed, and the memory bandwidth and operational intensity derived from
+    the last-level cache misses.
+
+    Notes
+    -----
+    The counters of a section are opened as a group, which the generated code
+    enables right before and disables right after the section. The counters are
+    inherited by the threads spawned by the Operator's thread, but not by those
+    that already exist; with OpenMP, the thread pool is typically created when
+    the first parallel region in the process is executed, so the counters would
+    silently cover the master thread only. Hence, this profiler can't be set up
+    while ``configuration['openmp']`` is on, and the counters aren't reported
+    for the Operators that are individually parallelized with OpenMP.
+    """
+
+    _default_includes = ['sys/ioctl.h', 'linux/perf_event.h']
+    _ext_calls = ['ioctl']
+
+    _events = OrderedDict([
+        ('cycles', (PERF_TYPE_HARDWARE, PERF_COUNT_HW_CPU_CYCLES)),
+        ('instructions', (PERF_TYPE_HARDWARE, PERF_COUNT_HW_INSTRUCTIONS)),
+        ('llc-misses', (PERF_TYPE_HARDWARE, PERF_COUNT_HW_CACHE_MISSES))
+    ])
+    """The counters, in each group. The first one is the group leader."""
+
+    def __init__(self, name):
+        if configuration['openmp']:
+            warning("Requested `perf` profiler, but the hardware counters can't "
+                    "account for the OpenMP threads")
+            self.initialized = False
+            return
+
+        try:
+            for fd in perf_event_open_group(self._events.values()):
+                os.close(fd)
+        except OSError as e:
+            warning("Requested `perf` profiler, but couldn't open the hardware "
+                    "counters (%s)" % e)
+            self.initialized = False
+        else:
+            super(PerfEventProfiler, self).__init__(name)
+
+        # False if the counters can't be trusted, e.g. due to OpenMP threads
+        self._counted = True
+
+    def instrument(self, iet):
+        iet = super(PerfEventProfiler, self).instrument(iet)
+
+        # Enable the counters right before each section and disable them right
+        # after, without polluting the section timings
+        counters = self.timer.counters
+        mapper = {}
+        for i in FindNodes(TimedList).visit(iet):
+            fd = FieldFromPointer(i.name, counters)
+            mapper[i] = List(body=[
+                Call('ioctl', [fd, Macro('PERF_EVENT_IOC_ENABLE'),
+                               Macro('PERF_IOC_FLAG_GROUP')]),
+                i,
+                Call('ioctl', [fd, Macro('PERF_EVENT_IOC_DISABLE'),
+                               Macro('PERF_IOC_FLAG_GROUP')])
+            ])
+        iet = Transformer(mapper).visit(iet)
+
+        return iet
+
+    def instrument_parallel(self, graph):
+        # The Operator may be parallelized with OpenMP even though the global
+        # `openmp` switch is off, in which case the counters would only cover
+        # the master thread
+        if 'omp.h' in graph.includes:
+            warning("The hardware counters can't account for the OpenMP threads; "
+                    "they won't be reported")
+            self._counted = False
+
+    def summary(self, args, dtype, reduce_over=None):
+        summary = super(PerfEventProfiler, self).summary(args, dtype, reduce_over)
+
+        if not self._counted:
+            return summary
+
+        comm = args.comm
+
+        counts = self.timer.counters.read()
+        if comm is not MPI.COMM_NULL:
+            # With MPI enabled, the counters are "per-rank"
+            counts = comm.allgather(counts)
+
+        for k, v in list(summary.input.items()):
+            items = counts[k.rank][k.name] if k.rank is not None else counts[k.name]
+            summary.add_counters(k.name, k.rank, v.time, v.ops, **items)
+
+        return summary
+
+    @cached_property
+    def timer(self):
+        sections = [i.name for i in self._sections]
+        counters = PerfCounters('counters', sections, self._events)
+        return PerfEventTimer(self.name, sections, counters)
+
+
+class ImbalanceProfiler(AdvancedProfiler):
+
+    """
+    On top of the ``advanced`` metrics, measure the load imbalance within each
+    profiled section, across the OpenMP threads and across the MPI ranks.
+
+    Within the OpenMP worksharing loops, each thread accumulates the time it
+    spends in the iterations it has been assigned. With MPI, the time spent in
+    the halo exchanges (``haloupdate`` and ``halowait``) and in the computation
+    over the OWNED region (``remainder``) is also recorded, so that the time
+    actually spent computing may be compared across the ranks.
+
+    Notes
+    -----
+    The per-thread timers are read at every iteration of the (collapsed)
+    worksharing loops, so they add a small overhead to each of them.
+    """
+
+    _halo_calls = ('haloupdate', 'halowait')
+    _remainder_calls = ('remainder',)
+    """The prefixes of the efuncs produced by the HaloExchangeBuilders."""
+
+    def __init__(self, name):
+        super(ImbalanceProfiler, self).__init__(name)
+
+        # The sections performing halo exchanges
+        self._halo_sections = set()
+
+    def instrument_parallel(self, graph):
+        # The section each efunc belongs to, based on the TimedList of the
+        # call site. The efuncs called from more than one section are ambiguous,
+        # hence they are not instrumented. Neither are the halo exchanges, which
+        # are timed as a whole
+        sections = {}
+        for i in FindNodes(TimedList).visit(graph.root):
+            if i.timer is not self.timer:
+                continue
+            queue = [j.name for j in FindNodes(Call).visit(i)]
+            callees = set()
+            while queue:
+                name = queue.pop(0)
+                if name.startswith(self._halo_calls):
+                    continue
+                if name in graph.efuncs and name not in callees:
+                    callees.add(name)
+                    calls = FindNodes(Call).visit(graph.efuncs[name])
+                    queue.extend(j.name for j in calls)
+            for name in callees:
+                sections[name] = i.name if sections.get(name, i.name) == i.name else None
+
+        self._instrument_parallel(graph, sections=sections)
+
+    @iet_pass
+    def _instrument_parallel(self, iet, sections):
+        mapper = {}
+        if sections.get(iet.name):
+            mapper.update(self._make_timers(iet, sections[iet.name]))
+        for i in FindNodes(TimedList).visit(iet):
+            if i.timer is self.timer:
+                mapper.update(self._make_timers(i, i.name))
+
+        if not mapper:
+            return iet, {}
+
+        iet = Transformer(mapper).visit(iet)
+
+        return iet, {'args': self.timer.imbalance}
+
+    def _make_timers(self, node, section):
+        imbalance = self.timer.imbalance
+        mapper = {}
+
+        # Per-thread timers around the body of the (collapsed) worksharing loops
+        for i in FindNodes(Iteration).visit(node):
+            if not any(str(j.value).startswith('omp for') for j in i.pragmas):
+                continue
+            tree = retrieve_iteration_tree(i)[0]
+            inner = tree[max(i.ncollapsed, 1) - 1]
+            header = [c.Statement('double tstart_%s = omp_get_wtime()' % section)]
+            footer = [c.Statement('const int tid_%s = omp_get_thread_num()' % section),
+                      c.If('tid_%s < %d' % (section, imbalance.maxthreads),
+                           c.Statement('%s->%s_threads[tid_%s] += '
+                                       'omp_get_wtime() - tstart_%s' %
+                                       (imbalance.name, section, section, section)))]
+            body = List(header=header, body=inner.nodes, footer=footer)
+            mapper[inner] = inner._rebuild(nodes=body)
+
+        # Timers around the halo exchanges and the computation over the OWNED region
+        for i in FindNodes(Call).visit(node):
+            if i.name.startswith(self._halo_calls):
+                lname = '%s_halo' % section
+            elif i.name.startswith(self._remainder_calls):
+                lname = '%s_remainder' % section
+            else:
+                continue
+            mapper[i] = Block(body=TimedList(timer=imbalance, lname=lname, body=i))
+            self._halo_sections.add(section)
+
+        return mapper
+
+    def summary(self, args, dtype, reduce_over=None):
+        summary = super(ImbalanceProfiler, self).summary(args, dtype, reduce_over)
+
+        comm = args.comm
+
+        imbalance = self.timer.imbalance
+        for name in imbalance.sections:
+            # Time to run the section
+            time = max(getattr(args[self.name]._obj, name), 10e-7)
+
+            threads = imbalance.threads(name)
+            halo = getattr(imbalance.value._obj, '%s_halo' % name)
+            remainder = getattr(imbalance.value._obj, '%s_remainder' % name)
+
+            if comm is not MPI.COMM_NULL:
+                # With MPI enabled, we add one entry per section per rank
+                items = comm.allgather((time, threads, halo, remainder))
+                ranks = range(comm.size)
+            else:
+                items = [(time, threads, halo, remainder)]
+                ranks = [None]
+
+            for rank, (time, threads, halo, remainder) in zip(ranks, items):
+                if PerfKey(name, rank) not in summary:
+                    # Unexecuted section
+                    continue
+                if threads.size > 0:
+                    summary.add_threads(name, rank, threads)
+                if name in self._halo_sections:
+                    summary.add_halo(name, rank, time, halo, remainder)
+
+            if comm is not MPI.COMM_NULL and PerfKey(name, 0) in summary:
+                # The time spent computing, that is not exchanging halos
+                summary.add_ranks(name, [i[0] - i[2] for i in items])
+
+        return summary
+
+    @cached_property
+    def timer(self):
+        sections = [i.name for i in self._sections]
+        imbalance = ImbalanceData('imbalance', sections)
+        return ImbalanceTimer(self.name, sections, imbalance)
+
+
 class Timer(CompositeObject):
 
     def __init__(self, name, sections):
@@ -293,12 +585,146 @@ class Timer(CompositeObject):
     _pickle_args = ['name', 'sections']
 
 
+class PerfEventTimer(Timer):
+
+    """
+    A Timer which also resets the hardware counters of the timed sections.
+    """
+
+    def __init__(self, name, sections, counters):
+        super(PerfEventTimer, self).__init__(name, sections)
+        self.counters = counters
+
+    def reset(self):
+        self.counters.reset()
+        return super(PerfEventTimer, self).reset()
+
+    # Pickling support
+    _pickle_args = Timer._pickle_args + ['counters']
+
+
+class PerfCounters(CompositeObject):
+
+    """
+    The file descriptors of the groups of hardware counters, one group for
+    each profiled section.
+    """
+
+    def __init__(self, name, sections, events):
+        super(PerfCounters, self).__init__(name, 'profiler_perf',
+                                           [(i, c_int) for i in sections])
+        self.events = events
+
+        self._fds = OrderedDict()
+        for i in sections:
+            fds = perf_event_open_group(events.values())
+            setattr(self.value._obj, i, fds[0])
+            self._fds[i] = fds
+        weakref.finalize(self, close_fds, flatten(self._fds.values()))
+
+    @property
+    def sections(self):
+        return self.fields
+
+    def reset(self):
+        for fds in self._fds.values():
+            fcntl.ioctl(fds[0], PERF_EVENT_IOC_RESET, PERF_IOC_FLAG_GROUP)
+
+    def read(self):
+        """
+        Read the counters of each section, scaled to account for multiplexing.
+        """
+        ret = OrderedDict()
+        for section, fds in self._fds.items():
+            values = []
+            for fd in fds:
+                value, enabled, running = struct.unpack('QQQ', os.read(fd, 24))
+                values.append(value*enabled/running if running else 0)
+            ret[section] = OrderedDict(zip(self.events, values))
+        return ret
+
+    def _hashable_content(self):
+        return (super(PerfCounters, self)._hashable_content() +
+                (tuple(self.events.items()),))
+
+    # Pickling support
+    _pickle_args = ['name', 'sections', 'events']
+
+
+class ImbalanceTimer(Timer):
+
+    """
+    A Timer which also resets the per-thread and halo exchange timers of the
+    timed sections.
+    """
+
+    def __init__(self, name, sections, imbalance):
+        super(ImbalanceTimer, self).__init__(name, sections)
+        self.imbalance = imbalance
+
+    def reset(self):
+        self.imbalance.reset()
+        return super(ImbalanceTimer, self).reset()
+
+    # Pickling support
+    _pickle_args = Timer._pickle_args + ['imbalance']
+
+
+class ImbalanceData(CompositeObject):
+
+    """
+    The per-thread timers, as well as the halo exchange and remainder timers,
+    of each profiled section.
+
+    The per-thread timers of a section are stored in a buffer of ``maxthreads``
+    entries; threads with a higher id, if any, go untimed.
+    """
+
+    _default_maxthreads = 256
+
+    def __init__(self, name, sections, maxthreads=None):
+        pfields = []
+        for i in sections:
+            pfields.extend([('%s_threads' % i, POINTER(c_double)),
+                            ('%s_halo' % i, c_double),
+                            ('%s_remainder' % i, c_double)])
+        super(ImbalanceData, self).__init__(name, 'profiler_imbalance', pfields)
+        self.sections = tuple(sections)
+        self.maxthreads = maxthreads or max(os.cpu_count(), self._default_maxthreads)
+
+        self._threads = np.zeros((len(self.sections), self.maxthreads))
+        for i, buf in zip(self.sections, self._threads):
+            setattr(self.value._obj, '%s_threads' % i,
+                    buf.ctypes.data_as(POINTER(c_double)))
+
+    def reset(self):
+        self._threads.fill(0.0)
+        for i in self.sections:
+            setattr(self.value._obj, '%s_halo' % i, 0.0)
+            setattr(self.value._obj, '%s_remainder' % i, 0.0)
+
+    def threads(self, section):
+        """
+        The time spent by each thread in the worksharing loops of ``section``.
+        The threads which haven't been assigned any iteration are dropped.
+        """
+        times = self._threads[self.sections.index(section)]
+        return times[times > 0].copy()
+
+    # Pickling support
+    _pickle_args = ['name', 'sections', 'maxthreads']
+
+
 class PerformanceSummary(OrderedDict):
 
     def __init__(self, *args, **kwargs):
         super(PerformanceSummary, self).__init__(*args, **kwargs)
         self.input = OrderedDict()
         self.globals = {}
+        self.counters = OrderedDict()
+        self.threads = OrderedDict()
+        self.halo = OrderedDict()
+        self.ranks = OrderedDict()
 
     def add(self, name, rank, time,
             ops=None, points=None, traffic=None, sops=None, itershapes=None):
@@ -325,6 +751,44 @@ class PerformanceSummary(OrderedDict):
 
         self.input[k] = PerfInput(time, ops, points, traffic, sops, itershapes)
 
+    def add_counters(self, name, rank, time, ops=None, **counts):
+        """
+        Add the hardware counters measured within a given code section. The
+        memory traffic is derived from the last-level cache misses.
+        """
+        k = PerfKey(name, rank)
+
+        cycles = counts.get('cycles', 0)
+        instructions = counts.get('instructions', 0)
+        ipc = instructions/cycles if cycles else 0.0
+        traffic = counts.get('llc-misses', 0)*cache_line_size()
+        gbytess = float(traffic)/10**9/time
+        oi = float(ops/traffic) if ops is not None and traffic else 0.0
+
+        self.counters[k] = CounterEntry(cycles, instructions, ipc, gbytess, oi)
+
+    def add_threads(self, name, rank, times):
+        """
+        Add the time spent by each thread within a given code section.
+        """
+        self.threads[PerfKey(name, rank)] = load_imbalance(times)
+
+    def add_halo(self, name, rank, time, halo, remainder):
+        """
+        Add the time spent exchanging halos, and computing over the OWNED region,
+        within a given code section. The rest is the computation over the CORE
+        region, plus any other local computation.
+        """
+        compute = max(time - halo - remainder, 0.0)
+        self.halo[PerfKey(name, rank)] = HaloEntry(halo, remainder, compute)
+
+    def add_ranks(self, name, times):
+        """
+        Add the time spent computing, that is excluding the halo exchanges, by
+        each rank within a given code section.
+        """
+        self.ranks[name] = load_imbalance(times)
+
     def add_glb_vanilla(self, time):
         """
         Reduce the following performance data:
@@ -379,6 +843,29 @@ class PerformanceSummary(OrderedDict):
     def timings(self):
         return OrderedDict([(k, v.time) for k, v in self.items()])
 
+    @property
+    def imbalance(self):
+        """
+        The load imbalance, as the ratio of the maximum to the average time,
+        across the threads of each section and rank and across the ranks of
+        each section.
+        """
+        ret = OrderedDict([(k, v.ratio) for k, v in self.threads.items()])
+        ret.update([(k, v.ratio) for k, v in self.ranks.items()])
+        return ret
+
+
+def load_imbalance(times, bins=10):
+    """
+    Return an ImbalanceEntry with the times, the ratio of the maximum to the
+    average time, and a histogram of the times in at most ``bins`` bins.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    mean = times.mean() if times.size > 0 else 0.0
+    ratio = float(times.max()/mean) if mean > 0 else 1.0
+    histogram = np.histogram(times, bins=max(min(bins, times.size), 1))
+    return ImbalanceEntry(times, ratio, histogram)
+
 
 def create_profile(name):
     """Create a new Profiler."""
@@ -402,7 +889,9 @@ def create_profile(name):
 profiler_registry = {
     'basic': Profiler,
     'advanced': AdvancedProfiler,
-    'advisor': AdvisorProfiler
+    'advisor': AdvisorProfiler,
+    'perf': PerfEventProfiler,
+    'imbalance': ImbalanceProfiler
 }
 """Profiling levels."""
 
@@ -419,3 +908,58 @@ def locate_intel_advisor():
     except KeyError:
         warning("Requested `advisor` profiler, but ADVISOR_HOME isn't set")
         return None
+
+
+perf_event_open_nr = {
+    'x86_64': 298,
+    'aarch64': 241,
+    'ppc64le': 319,
+}
+
+
+def perf_event_open_group(events):
+    """
+    Open a group of counters for the calling thread, and any thread it spawns
+    thereafter, on any CPU. The first counter is the group leader; the group
+    is opened disabled. Return the file descriptors.
+    """
+    try:
+        nr = perf_event_open_nr[platform.machine()]
+    except KeyError:
+        raise OSError("perf_event_open unsupported on `%s`" % platform.machine())
+    libc = CDLL(None, use_errno=True)
+
+    fds = []
+    for n, (etype, config) in enumerate(events):
+        # A `struct perf_event_attr`, as of PERF_ATTR_SIZE_VER0
+        attr = bytearray(64)
+        read_format = PERF_FORMAT_TOTAL_TIME_ENABLED | PERF_FORMAT_TOTAL_TIME_RUNNING
+        # Flags: disabled (leader only), inherit, exclude_kernel, exclude_hv
+        flags = (n == 0) | 1 << 1 | 1 << 5 | 1 << 6
+        struct.pack_into('IIQQQQQ', attr, 0, etype, len(attr), config, 0, 0,
+                         read_format, flags)
+        group_fd = fds[0] if fds else -1
+        fd = libc.syscall(nr, create_string_buffer(bytes(attr), len(attr)),
+                          0, -1, group_fd, PERF_FLAG_FD_CLOEXEC)
+        if fd < 0:
+            close_fds(fds)
+            errno = get_errno()
+            raise OSError(errno, os.strerror(errno))
+        fds.append(fd)
+
+    return fds
+
+
+def close_fds(fds):
+    for fd in fds:
+        os.close(fd)
+
+
+def cache_line_size():
+    """The size, in bytes, of a last-level cache line. Defaults to 64."""
+    try:
+        path = Path('/sys/devices/system/cpu/cpu0/cache')
+        index = sorted(path.glob('index*'))[-1]
+        return int(index.joinpath('coherency_line_size').read_text())
+    except (IndexError, OSError, ValueError):
+        return 64
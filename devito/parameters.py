@@ -117,11 +117,16 @@ env_vars_mapper = {
     'DEVITO_DLE': 'dle',
     'DEVITO_OPENMP': 'openmp',
     'DEVITO_MPI': 'mpi',
+    'DEVITO_MPI_HALO_DEPTH': 'mpi-halo-depth',
+    'DEVITO_MPI_NODE_AWARE': 'mpi-node-aware',
     'DEVITO_AUTOTUNING': 'autotuning',
+    'DEVITO_AUTOTUNING_DB': 'autotuning-db',
     'DEVITO_LOGGING': 'log-level',
     'DEVITO_FIRST_TOUCH': 'first-touch',
     'DEVITO_DEBUG_COMPILER': 'debug-compiler',
     'DEVITO_JIT_BACKDOOR': 'jit-backdoor',
+    'DEVITO_BUILD_CACHE': 'build-cache',
+    'DEVITO_JIT_BROADCAST': 'jit-broadcast',
     'DEVITO_IGNORE_UNKNOWN_PARAMS': 'ignore-unknowns'
 }
 
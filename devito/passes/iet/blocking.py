@@ -3,17 +3,21 @@ from itertools import groupby, product
 import cgen as c
 import numpy as np
 from cached_property import cached_property
+from sympy import And, Max, Min, Or
 
-from devito.ir import (Expression, Iteration, List, FindAdjacent, FindNodes,
-                       IsPerfectIteration, Transformer, PARALLEL, AFFINE, make_efunc,
-                       compose_nodes, filter_iterations, retrieve_iteration_tree)
+from devito.ir import (Backward, Call, Conditional, DummyEq, Expression,
+                       Iteration, List, FindAdjacent, FindNodes, IsPerfectIteration,
+                       Transformer,
+                       PARALLEL, AFFINE, TILABLE, make_efunc, compose_nodes,
+                       filter_iterations, retrieve_iteration_tree)
 from devito.exceptions import InvalidArgument
+from devito.logger import perf_adv
 from devito.passes.iet.engine import iet_pass
-from devito.symbolics import as_symbol, xreplace_indices
-from devito.tools import all_equal, as_tuple, flatten
+from devito.symbolics import CondEq, INT, as_symbol, retrieve_indexed, xreplace_indices
+from devito.tools import all_equal, as_tuple, filter_ordered, flatten
 from devito.types import IncrDimension, Scalar
 
-__all__ = ['Blocker', 'BlockDimension']
+__all__ = ['Blocker', 'TemporalBlocker', 'BlockDimension']
 
 
 class Blocker(object):
@@ -119,6 +123,288 @@ class Blocker(object):
                      'args': [i.step for i in block_dims]}
 
 
+class TemporalBlocker(object):
+
+    """
+    Temporal blocking, also known as wavefront tiling, of time-marching
+    Iteration trees.
+
+    The time Iteration is tiled, and so are the space Iterations. Within a
+    time tile, each space block is run through all of the timesteps of the
+    tile before moving on to the next space block, so that the data it
+    accesses stay in cache. To honour the stencil dependences, the space blocks
+    are skewed: at each timestep, a block shifts backwards by the stencil
+    radius. This way, the modulo buffers of the SteppingDimensions are never
+    overwritten before being read.
+
+    Sparse operations (e.g., injection and interpolation) are run, at each
+    timestep, within each space block as well, restricted to the grid points
+    owned by the block at that timestep.
+
+    Time-marching trees not meeting the requirements of the transformation are
+    left unchanged.
+    """
+
+    def __init__(self, blockinner):
+        self.blockinner = bool(blockinner)
+
+        self.nblocked = 0
+
+    @iet_pass
+    def make_blocking(self, iet):
+        """
+        Apply temporal blocking to sequential time Iterations.
+        """
+        mapper = {}
+        block_dims = []
+        for root in FindNodes(Iteration).visit(iet):
+            if not root.dim.is_Time or isinstance(root.dim, BlockDimension):
+                continue
+
+            try:
+                analysis = analyze_wavefront(root, self.blockinner)
+            except WavefrontError as e:
+                perf_adv("Couldn't apply temporal blocking to `%s`: %s" % (root.dim, e))
+                continue
+
+            blocked, dims = self._make_blocked(root, *analysis)
+            mapper[root] = blocked
+            block_dims.extend(dims)
+
+            # Next blockable tree, use different (unique) variable names
+            self.nblocked += 1
+
+        iet = Transformer(mapper).visit(iet)
+
+        return iet, {'dimensions': block_dims,
+                     'args': [i.step for i in block_dims]}
+
+    def _make_blocked(self, root, dims, radius, nests, sparse):
+        nb = self.nblocked
+
+        # The time tile
+        tdim = BlockDimension(root.dim, name="%s%d_blk0" % (root.dim.name, nb))
+        tmin, tmax = root.dim.symbolic_min, root.dim.symbolic_max
+        tile = Iteration([], tdim, (tmin, tmax, tdim.step), direction=root.direction)
+        if root.direction is Backward:
+            limits = (INT(Max(tdim - tdim.step + 1, tmin)), tdim, 1)
+            skew = tdim - root.dim
+        else:
+            limits = (tdim, INT(Min(tdim + tdim.step - 1, tmax)), 1)
+            skew = root.dim - tdim
+
+        # The space blocks, skewed by the stencil radius at each timestep
+        blocks = []
+        bounds = []
+        regions = []
+        for d in dims:
+            bdim = BlockDimension(d, name="%s%d_blk0" % (d.name, nb))
+            r = radius[d]
+            blocks.append(Iteration([], bdim, (d.symbolic_min,
+                                               d.symbolic_max + r*(tdim.step - 1),
+                                               bdim.step)))
+            lo = Scalar(name="%s%d_wf_m" % (d.name, nb), dtype=np.int32)
+            hi = Scalar(name="%s%d_wf_M" % (d.name, nb), dtype=np.int32)
+            shift = r*skew
+            bounds.append(Expression(DummyEq(lo, INT(Max(d.symbolic_min,
+                                                         bdim - shift)))))
+            bounds.append(Expression(DummyEq(hi, INT(Min(d.symbolic_max,
+                                                         bdim + bdim.step - 1 - shift)))))
+            regions.append((d, lo, hi))
+
+        # The space Iterations only sweep the region owned by the block
+        subs = {}
+        for nest in nests:
+            for i in retrieve_iteration_tree(nest)[0]:
+                for d, lo, hi in regions:
+                    if i.dim is d:
+                        properties = [p for p in i.properties if p is not TILABLE]
+                        subs[i] = i._rebuild(limits=(lo, hi, 1), properties=properties)
+
+        # The sparse operations only touch the grid points owned by the block
+        nonempty = And(*[lo <= hi for _, lo, hi in regions])
+        zeroing = []
+        for nest, (conditionals, reductions) in sparse.items():
+            nsubs = {}
+            for cond, indices in conditionals:
+                owned = []
+                for d, lo, hi in regions:
+                    owned.append(Or(indices[d] >= lo, CondEq(lo, d.symbolic_min)))
+                    owned.append(Or(indices[d] <= hi, CondEq(hi, d.symbolic_max)))
+                nsubs[cond] = cond._rebuild(condition=And(cond.condition, *owned))
+            for init, e in reductions:
+                # The partial reductions are carried over across the blocks, which
+                # preserves the summation order
+                nsubs[init] = Expression(DummyEq(init.output, e.output))
+                zeroing.append(nest._rebuild([Expression(DummyEq(e.output, 0.))]))
+            subs[nest] = Conditional(nonempty, Transformer(nsubs).visit(nest))
+
+        body = Transformer(subs, nested=True).visit(List(body=root.nodes))
+        steps = root._rebuild(bounds + [body], limits=limits)
+
+        nodes = compose_nodes(blocks + [steps])
+        if zeroing:
+            nodes = [root._rebuild(zeroing, limits=limits, uindices=()), nodes]
+        blocked = tile._rebuild(nodes)
+
+        return blocked, [tdim] + [i.dim for i in blocks]
+
+
+class WavefrontError(Exception):
+    pass
+
+
+def analyze_wavefront(root, blockinner):
+    """
+    Check whether the time Iteration ``root`` can be temporally blocked.
+
+    Returns
+    -------
+    dims : list of Dimension
+        The space Dimensions to be blocked.
+    radius : dict
+        The stencil radius along each of the blocked Dimensions.
+    nests : list of Iteration
+        The Iteration nests over the space Dimensions.
+    sparse : dict
+        The Iteration nests over sparse points, each mapped to its Conditionals,
+        with the indices they guard along the blocked Dimensions, as well as to
+        its reductions, as ``(initialization, reduction)`` pairs.
+
+    Raises
+    ------
+    WavefrontError
+        If temporal blocking is not applicable.
+    """
+    if not root.is_Sequential:
+        raise WavefrontError("not a sequential Iteration")
+    if FindNodes(Call).visit(root):
+        raise WavefrontError("calls within the time loop")
+
+    trees = retrieve_iteration_tree(root)
+    nests = filter_ordered(i[1] for i in trees if len(i) > 1)
+    exprs = FindNodes(Expression).visit(root)
+    inner = set(flatten(FindNodes(Expression).visit(i) for i in nests))
+    if any(e.is_tensor for e in exprs if e not in inner):
+        raise WavefrontError("tensor expressions outside of loop nests")
+
+    # The Functions written within the time loop, and the time slices written
+    written = {e.write for e in exprs if e.is_tensor}
+    levels = {(e.write, e.output.indices[0]) for e in exprs
+              if e.is_tensor and e.write.is_TimeFunction}
+
+    # The loop nests over space
+    spatial = [i for i in nests if i.dim.is_Space]
+    if not spatial:
+        raise WavefrontError("no loop nests over space")
+    dims = None
+    for nest in spatial:
+        if not IsPerfectIteration().visit(nest):
+            raise WavefrontError("imperfect loop nest")
+        tree = retrieve_iteration_tree(nest)[0]
+        if any(not (i.is_Tilable and i.dim.is_Space) or i.offsets != (0, 0) or
+               i.limits != (i.dim.symbolic_min, i.dim.symbolic_max, 1) for i in tree):
+            raise WavefrontError("non-tilable loop nest")
+        if dims is None:
+            dims = [i.dim for i in tree]
+        elif dims != [i.dim for i in tree]:
+            raise WavefrontError("loop nests over different Dimensions")
+    if not blockinner:
+        dims = dims[:-1]
+    if not dims:
+        raise WavefrontError("nothing to block")
+
+    # The stencil radius; writes and reads of non time-buffered data must be
+    # pointwise
+    radius = {d: 1 for d in dims}
+    for e in flatten(FindNodes(Expression).visit(i) for i in spatial):
+        for a in retrieve_indexed(e.expr):
+            f = a.function
+            if f not in written:
+                continue
+            for n, (i, fd) in enumerate(zip(a.indices, f.dimensions)):
+                if fd.root not in dims:
+                    continue
+                ofs = i - fd.root - f._offset_domain[n]
+                if not ofs.is_Integer:
+                    raise WavefrontError("non-affine access `%s`" % a)
+                if ofs != 0 and (a == e.output or not f.is_TimeFunction or
+                                 (f, a.indices[0]) in levels):
+                    raise WavefrontError("non-pointwise access `%s`" % a)
+                radius[fd.root] = max(radius[fd.root], abs(int(ofs)))
+
+    # The loop nests over sparse points
+    sparse = {}
+    for nest in nests:
+        if nest in spatial:
+            continue
+        if len(FindNodes(Iteration).visit(nest)) > 1:
+            raise WavefrontError("imperfect sparse loop nest")
+
+        conditionals = []
+        guarded = set()
+        for cond in FindNodes(Conditional).visit(nest):
+            if FindNodes(Conditional).visit(cond.then_body + cond.else_body):
+                raise WavefrontError("nested Conditionals")
+            indices = guarded_indices(cond.condition, dims)
+            cexprs = FindNodes(Expression).visit(cond)
+            guarded.update(cexprs)
+            for e in cexprs:
+                for a in retrieve_indexed(e.expr):
+                    f = a.function
+                    if f not in written:
+                        continue
+                    for n, (i, fd) in enumerate(zip(a.indices, f.dimensions)):
+                        # The index may be a Dimension, while the guarded
+                        # index a Symbol, hence the comparison by name
+                        index = i - f._offset_domain[n]
+                        if fd.root in dims and str(index) != str(indices.get(fd.root)):
+                            raise WavefrontError("unguarded access `%s`" % a)
+            conditionals.append((cond, indices))
+
+        reductions = []
+        accumulators = {e.write for e in guarded if e.is_scalar}
+        inits = {e.write: e for e in FindNodes(Expression).visit(nest)
+                 if e.is_scalar and e.write in accumulators and e not in guarded}
+        for e in FindNodes(Expression).visit(nest):
+            if e in guarded or e in inits.values():
+                continue
+            if any(a.function in written and a != e.output
+                   for a in retrieve_indexed(e.expr)):
+                raise WavefrontError("unguarded sparse access in `%s`" % e)
+            if e.is_tensor and not e.is_Increment:
+                if not (e.expr.rhs.is_Symbol and e.expr.rhs in inits):
+                    raise WavefrontError("unsupported sparse operation `%s`" % e)
+                reductions.append((inits[e.expr.rhs], e))
+        sparse[nest] = (conditionals, reductions)
+
+    return dims, radius, spatial, sparse
+
+
+def guarded_indices(condition, dims):
+    """
+    Map each Dimension in ``dims`` to the index whose bounds along that
+    Dimension are checked by ``condition``.
+    """
+    mapper = {}
+    for rel in (condition.args if isinstance(condition, And) else [condition]):
+        if not rel.is_Relational:
+            continue
+        for d in dims:
+            bounds = {d.symbolic_min, d.symbolic_max}
+            if bounds & rel.rhs.free_symbols:
+                index = rel.lhs
+            elif bounds & rel.lhs.free_symbols:
+                index = rel.rhs
+            else:
+                continue
+            if mapper.setdefault(d, index) != index:
+                raise WavefrontError("ambiguous condition `%s`" % condition)
+    if set(mapper) != set(dims):
+        raise WavefrontError("condition `%s` doesn't guard all Dimensions" % condition)
+    return mapper
+
+
 def fold_blockable_tree(iet, blockinner=True):
     """
     Create IterationFolds from sequences of nested Iterations.
@@ -1,12 +1,54 @@
-from devito.ir.iet import (Call, HaloSpot, Iteration, List, FindAdjacent,
-                           FindNodes, MapNodes, Transformer, retrieve_iteration_tree)
-from devito.ir.support import PARALLEL
+import numpy as np
+from frozendict import frozendict
+from sympy import Mod
+
+from devito.data import LEFT, RIGHT
+from devito.exceptions import InvalidArgument
+from devito.ir.equations import DummyEq
+from devito.ir.iet import (Call, Conditional, Expression, HaloSpot, Iteration, List,
+                           FindAdjacent, FindNodes, MapNodes, Transformer,
+                           retrieve_iteration_tree)
+from devito.ir.support import PARALLEL, Backward
 from devito.logger import perf_adv
-from devito.mpi import HaloExchangeBuilder, HaloScheme
+from devito.mpi import HaloExchangeBuilder, HaloScheme, HaloSchemeEntry
+from devito.mpi.halo_scheme import Halo
+from devito.passes.iet.blocking import WavefrontError, analyze_wavefront
 from devito.passes.iet.engine import iet_pass
-from devito.tools import filter_sorted, generator
+from devito.symbolics import CondEq, CondNe, FieldFromPointer, Macro, retrieve_indexed
+from devito.tools import filter_sorted, flatten, generator
+from devito.types import Constant, Scalar
+
+__all__ = ['optimize_halospots', 'mpiize', 'HaloSteps']
+
+
+class HaloSteps(Constant):
+
+    """
+    The number of timesteps between two consecutive halo exchanges in `deep`
+    MPI mode. It ranges from 1 to ``max_value``, the number of timesteps the
+    halos are deep enough for.
+    """
+
+    is_PerfKnob = True
+
+    name = 'halo_steps'
 
-__all__ = ['optimize_halospots', 'mpiize']
+    def __new__(cls, **kwargs):
+        max_value = kwargs.pop('max_value', 1)
+        obj = Constant.__new__(cls, name=kwargs.get('name', cls.name), dtype=np.int32,
+                               value=max_value)
+        obj.max_value = max_value
+        return obj
+
+    def _arg_check(self, args, intervals):
+        super(HaloSteps, self)._arg_check(args, intervals)
+        value = args[self.name]
+        if not 1 <= value <= self.max_value:
+            raise InvalidArgument("Illegal `%s=%d`: the halos allow for at most %d "
+                                  "timesteps between two halo exchanges"
+                                  % (self.name, value, self.max_value))
+
+    _pickle_kwargs = Constant._pickle_kwargs + ['max_value']
 
 
 @iet_pass
@@ -121,6 +163,13 @@ def mpiize(iet, **kwargs):
     """
     mode = kwargs.pop('mode')
 
+    # In `deep` mode, the halo exchanges within the time loops are performed
+    # once every few timesteps
+    if mode == 'deep':
+        iet, deep_objs = make_deep_halospots(iet)
+    else:
+        deep_objs = []
+
     # To produce unique object names
     generators = {'msg': generator(), 'comm': generator(), 'comp': generator()}
     sync_heb = HaloExchangeBuilder('basic', **generators)
@@ -130,7 +179,7 @@ def mpiize(iet, **kwargs):
         heb = user_heb if hs.is_Overlappable else sync_heb
         mapper[hs] = heb.make(hs)
     efuncs = sync_heb.efuncs + user_heb.efuncs
-    objs = filter_sorted(sync_heb.objs + user_heb.objs)
+    objs = filter_sorted(sync_heb.objs + user_heb.objs + deep_objs)
     iet = Transformer(mapper, nested=True).visit(iet)
 
     # Must drop the PARALLEL tag from the Iterations within which halo
@@ -148,3 +197,196 @@ def mpiize(iet, **kwargs):
     iet = Transformer(mapper, nested=True).visit(iet)
 
     return iet, {'includes': ['mpi.h'], 'efuncs': efuncs, 'args': objs}
+
+
+def make_deep_halospots(iet):
+    """
+    Replace the HaloSpots within the time-marching Iterations of ``iet`` with
+    deep halo exchanges.
+
+    A deep halo exchange updates the entire halo of the Functions, which is
+    deeper than the stencil radius. Then, at each timestep, the ranks also
+    compute over the part of their halo that is still up-to-date, which shrinks
+    by the stencil radius at each timestep. This way, halo exchanges only occur
+    once every ``halo_steps`` timesteps, at the price of redundant computation.
+
+    Time-marching Iterations not meeting the requirements of the transformation
+    are left unchanged.
+    """
+    candidates = []
+    for root in FindNodes(Iteration).visit(iet):
+        if not root.dim.is_Time or not FindNodes(HaloSpot).visit(root):
+            continue
+        try:
+            candidates.append((root, analyze_deep_halo(root)))
+        except WavefrontError as e:
+            perf_adv("Couldn't use deep halo exchanges within `%s`: %s" % (root.dim, e))
+    if not candidates:
+        return iet, []
+
+    # The halos must be deep enough for all of the time-marching Iterations
+    steps = HaloSteps(max_value=min(i[-1] for _, i in candidates))
+
+    mapper = {}
+    objs = [steps]
+    for root, (grid, radius, schemes, invariant, _) in candidates:
+        distributor = grid.distributor
+        nb = distributor._obj_neighborhood
+        objs.append(nb)
+
+        # The number of timesteps since the last halo exchange
+        hstep = Scalar(name='%s_hstep' % root.dim.name, dtype=np.int32)
+        if root.direction is Backward:
+            elapsed = root.dim.symbolic_max - root.dim
+        else:
+            elapsed = root.dim - root.dim.symbolic_min
+        header = [Expression(DummyEq(hstep, Mod(elapsed, steps)))]
+
+        # The halo exchanges, once every `steps` timesteps
+        header.append(Conditional(CondEq(hstep, 0),
+                                  [HaloSpot(i) for i in schemes]))
+
+        # The extent of the halo to be computed over. Along the domain boundary,
+        # where there is no neighbour, the halo is never computed over
+        subs = {}
+        for d, r in radius.items():
+            extents = []
+            for side in (LEFT, RIGHT):
+                ext = Scalar(name='%s_ext_%s' % (d.name, side.name[0]), dtype=np.int32)
+                name = ''.join(side.name[0] if i is d else 'c'
+                               for i in distributor.dimensions)
+                header.append(Expression(DummyEq(ext, 0)))
+                header.append(Conditional(CondNe(FieldFromPointer(name, nb),
+                                                 Macro('MPI_PROC_NULL')),
+                                          Expression(DummyEq(ext, r*(steps-1-hstep)))))
+                extents.append(ext)
+            for i in FindNodes(Iteration).visit(root):
+                if i.dim is d:
+                    subs[i] = i._rebuild(limits=(d.symbolic_min - extents[0],
+                                                 d.symbolic_max + extents[1], 1))
+
+        # The HaloSpots within the time loop are superseded by the deep ones
+        body = Transformer(subs, nested=True).visit(List(body=root.nodes))
+        body = Transformer({i: i.body for i in FindNodes(HaloSpot).visit(body)},
+                           nested=True).visit(body)
+
+        node = root._rebuild([List(body=header), body])
+        if invariant is not None:
+            # The time-invariant Functions only need a halo exchange before
+            # the time loop
+            node = HaloSpot(invariant, node)
+        mapper[root] = node
+
+    iet = Transformer(mapper).visit(iet)
+
+    return iet, objs
+
+
+def analyze_deep_halo(root):
+    """
+    Check whether deep halo exchanges can be used within the time Iteration
+    ``root``.
+
+    Returns
+    -------
+    grid : Grid
+        The Grid of the distributed Functions.
+    radius : dict
+        The stencil radius along each distributed Dimension.
+    schemes : list of HaloScheme
+        The halo exchanges to be performed once every few timesteps.
+    invariant : HaloScheme
+        The halo exchanges of the time-invariant Functions, if any.
+    max_steps : int
+        The maximum number of timesteps between two halo exchanges.
+
+    Raises
+    ------
+    WavefrontError
+        If deep halo exchanges can't be used.
+    """
+    # Same requirements as temporal blocking: the timestep must be a sequence
+    # of perfect loop nests, free of intra-timestep dependences across them
+    dims, radius, nests, sparse = analyze_wavefront(root, True)
+    if sparse:
+        raise WavefrontError("sparse operations within the time loop")
+
+    exprs = flatten(FindNodes(Expression).visit(i) for i in nests)
+    written = {e.write for e in exprs}
+
+    # The range of the offsets along the distributed Dimensions, as well as
+    # the time slices read
+    offsets = {}
+    slices = {}
+    grid = None
+    for e in exprs:
+        for a in retrieve_indexed(e.expr):
+            f = a.function
+            if not f.is_DiscreteFunction or f.grid is None:
+                raise WavefrontError("access to non-distributed `%s`" % f.name)
+            grid = f.grid
+            loc_indices = {}
+            for n, (i, d) in enumerate(zip(a.indices, f.dimensions)):
+                if f.grid.is_distributed(d):
+                    ofs = i - d - f._offset_domain[n]
+                    if not ofs.is_Integer:
+                        raise WavefrontError("non-affine access `%s`" % a)
+                    lo, hi = offsets.get((f, d), (0, 0))
+                    offsets[(f, d)] = (min(lo, int(ofs)), max(hi, int(ofs)))
+                elif d.is_Time:
+                    loc_indices[d] = i
+                else:
+                    raise WavefrontError("unsupported access `%s`" % a)
+            if a == e.output and not e.is_Increment:
+                # Not a read, hence no halo exchange needed
+                continue
+            if loc_indices and f not in written:
+                raise WavefrontError("read-only, time-varying `%s`" % f.name)
+            entries = slices.setdefault(f, [])
+            if loc_indices not in entries:
+                entries.append(loc_indices)
+
+    # The slices read in between two halo exchanges must have been either
+    # computed or exchanged, which requires the time slices read to be contiguous
+    for f, entries in slices.items():
+        # The ModuloDimensions are relative to the SteppingDimension, not `root.dim`
+        times = {i.origin - i.parent if i.is_Modulo else i - root.dim
+                 for i in flatten(j.values() for j in entries)}
+        if times and not all(i.is_Integer for i in times):
+            raise WavefrontError("non-affine time accesses to `%s`" % f.name)
+        if times and len(times) != max(times) - min(times) + 1:
+            raise WavefrontError("non-contiguous time accesses to `%s`" % f.name)
+
+    radius = {d: v for d, v in radius.items() if grid.is_distributed(d)}
+    if not radius:
+        raise WavefrontError("no distributed loop nests")
+
+    # At the timestep following a halo exchange, the accesses may reach up to
+    # `radius*(max_steps - 1)` points deeper into the halo than usual
+    max_steps = None
+    for (f, d), (lo, hi) in offsets.items():
+        r = radius.get(d, 1)
+        size = dict(zip(f.dimensions, f._size_halo))[d]
+        v = min((size.left + lo) // r, (size.right - hi) // r) + 1
+        max_steps = v if max_steps is None else min(max_steps, v)
+    if max_steps is None or max_steps < 2:
+        raise WavefrontError("the halos aren't deep enough")
+
+    # One HaloScheme per time slice, since a HaloScheme may only have one
+    # HaloSchemeEntry per Function
+    fmappers = []
+    invariant = {}
+    for f, entries in slices.items():
+        halos = frozenset(Halo(d, s) for d in f._dist_dimensions for s in (LEFT, RIGHT))
+        for n, loc_indices in enumerate(entries):
+            hse = HaloSchemeEntry(frozendict(loc_indices), halos)
+            if f not in written:
+                invariant[f] = hse
+                continue
+            if n == len(fmappers):
+                fmappers.append({})
+            fmappers[n][f] = hse
+    schemes = [HaloScheme.build(i, {}) for i in fmappers]
+    invariant = HaloScheme.build(invariant, {}) if invariant else None
+
+    return grid, radius, schemes, invariant, max_steps
@@ -5,17 +5,18 @@ import numpy as np
 import cgen as c
 from sympy import Function, Or, Max, Not
 
-from devito.ir import (DummyEq, Conditional, Block, Expression, List, Prodder,
-                       While, FindSymbols, FindNodes, Return, COLLAPSED, VECTORIZED,
-                       Transformer, IsPerfectIteration, retrieve_iteration_tree,
-                       filter_iterations)
+from devito.ir import (DummyEq, Call, Conditional, Block, Expression, Iteration, List,
+                       Prodder, While, FindSymbols, FindNodes, Return, COLLAPSED,
+                       VECTORIZED, Transformer, IsPerfectIteration,
+                       retrieve_iteration_tree, filter_iterations)
 from devito.symbolics import CondEq, INT
 from devito.parameters import configuration
 from devito.passes.iet.engine import iet_pass
 from devito.tools import as_tuple, is_integer, prod
-from devito.types import Constant, Symbol
+from devito.types import Constant, Dimension, Symbol
 
-__all__ = ['NThreads', 'NThreadsNested', 'NThreadsNonaffine', 'Ompizer', 'ParallelTree']
+__all__ = ['NThreads', 'NThreadsNested', 'NThreadsNonaffine', 'OmpScheduleKind',
+           'OmpScheduleChunk', 'Ompizer', 'ParallelTree']
 
 
 def ncores():
@@ -72,6 +73,39 @@ class NThreadsNonaffine(NThreads):
     name = 'nthreads_nonaffine'
 
 
+class OmpScheduleKind(NThreadsMixin, Constant):
+
+    """
+    The OpenMP loop schedule kind, as an `omp_sched_t` value, used by the
+    parallel loops with a `schedule(runtime)` clause.
+    """
+
+    name = 'sched_kind'
+
+    STATIC = 1
+    DYNAMIC = 2
+    GUIDED = 3
+
+    @classmethod
+    def default_value(cls):
+        return cls.DYNAMIC
+
+
+class OmpScheduleChunk(NThreadsMixin, Constant):
+
+    """
+    The OpenMP loop schedule chunk size, used by the parallel loops with a
+    `schedule(runtime)` clause. A value smaller than 1 stands for the
+    implementation-defined default chunk size.
+    """
+
+    name = 'sched_chunk'
+
+    @classmethod
+    def default_value(cls):
+        return 1
+
+
 class ParallelRegion(Block):
 
     def __init__(self, body, nthreads, private=None):
@@ -103,10 +137,11 @@ class ParallelTree(List):
 
     _traversable = ['prefix', 'body']
 
-    def __init__(self, prefix, body, nthreads=None):
+    def __init__(self, prefix, body, nthreads=None, schedule=None):
         super(ParallelTree, self).__init__(body=body)
         self.prefix = as_tuple(prefix)
         self.nthreads = nthreads
+        self.schedule = as_tuple(schedule)
 
     def __getattr__(self, name):
         if 'body' in self.__dict__:
@@ -118,7 +153,7 @@ class ParallelTree(List):
 
     @property
     def functions(self):
-        return as_tuple(self.nthreads)
+        return as_tuple(self.nthreads) + self.schedule
 
 
 class ThreadedProdder(Conditional, Prodder):
@@ -169,9 +204,17 @@ class Ompizer(object):
     lang = {
         'for': lambda i, cs:
             c.Pragma('omp for collapse(%d) schedule(dynamic,%s)' % (i, cs)),
+        'for-bins': c.Pragma('omp for schedule(dynamic,1)'),
         'par-for': lambda i, cs, nt:
             c.Pragma('omp parallel for collapse(%d) schedule(dynamic,%s) num_threads(%s)'
                      % (i, cs, nt)),
+        'for-runtime': lambda i:
+            c.Pragma('omp for collapse(%d) schedule(runtime)' % i),
+        'par-for-runtime': lambda i, nt:
+            c.Pragma('omp parallel for collapse(%d) schedule(runtime) num_threads(%s)'
+                     % (i, nt)),
+        'ifdef-openmp': c.Line('#ifdef _OPENMP'),
+        'endif': c.Line('#endif'),
         'simd-for': c.Pragma('omp simd'),
         'simd-for-aligned': lambda i, j: c.Pragma('omp simd aligned(%s:%d)' % (i, j)),
         'atomic': c.Pragma('omp atomic update')
@@ -180,12 +223,20 @@ class Ompizer(object):
     Shortcuts for the OpenMP language.
     """
 
-    def __init__(self, key=None):
+    def __init__(self, key=None, tunable=False, collapse=None):
         """
         Parameters
         ----------
         key : callable, optional
             Return True if an Iteration can be parallelized, False otherwise.
+        tunable : bool, optional
+            If True, the loop schedule of the affine parallel Iterations, as well
+            as whether nested parallelism is used or not, become runtime
+            arguments (`sched_kind`, `sched_chunk`, `nthreads_nested`) rather
+            than being fixed by heuristics. Defaults to False.
+        collapse : int, optional
+            The maximum number of Iterations collapsed into a parallel loop.
+            Defaults to None, that is as many as allowed by the heuristics.
         """
         if key is not None:
             self.key = key
@@ -199,11 +250,21 @@ class Ompizer(object):
         self.nthreads = NThreads(aliases='nthreads0')
         self.nthreads_nested = NThreadsNested(aliases='nthreads1')
         self.nthreads_nonaffine = NThreadsNonaffine(aliases='nthreads2')
+        self.tunable = tunable
+        self.collapse = collapse
+        if tunable:
+            self.schedule = (OmpScheduleKind(), OmpScheduleChunk())
+        else:
+            self.schedule = ()
 
     def _find_collapsable(self, root, candidates):
         collapsable = []
         if ncores() >= self.COLLAPSE_NCORES:
             for n, i in enumerate(candidates[1:], 1):
+                # Honour the user-imposed maximum collapse depth
+                if self.collapse is not None and n >= self.collapse:
+                    break
+
                 # The Iteration nest [root, ..., i] must be perfect
                 if not IsPerfectIteration(depth=i).visit(root):
                     break
@@ -261,7 +322,22 @@ class Ompizer(object):
 
         # Prepare to build a ParallelTree
         prefix = []
-        if all(i.is_Affine for i in candidates):
+        schedule = None
+        if all(i.is_Affine for i in candidates) and self.tunable:
+            if nthreads is None:
+                # omp_set_schedule(sched_kind, sched_chunk)
+                # pragma omp for ... schedule(runtime)
+                nthreads = self.nthreads
+                schedule = self.schedule
+                prefix.append(List(header=self.lang['ifdef-openmp'],
+                                   body=Call('omp_set_schedule', schedule),
+                                   footer=self.lang['endif']))
+                omp_pragma = self.lang['for-runtime'](ncollapse)
+            else:
+                # pragma omp parallel for ... schedule(runtime)
+                # Note: the schedule is inherited from the enclosing parallel region
+                omp_pragma = self.lang['par-for-runtime'](ncollapse, nthreads)
+        elif all(i.is_Affine for i in candidates):
             if nthreads is None:
                 # pragma omp for ... schedule(..., 1)
                 nthreads = self.nthreads
@@ -284,12 +360,70 @@ class Ompizer(object):
         # Create a ParallelTree
         body = root._rebuild(pragmas=root.pragmas + (omp_pragma,),
                              properties=root.properties + (COLLAPSED(ncollapse),))
-        partree = ParallelTree(prefix, body, nthreads=nthreads)
+        partree = ParallelTree(prefix, body, nthreads=nthreads, schedule=schedule)
 
         collapsed = [partree] + collapsable
 
         return root, partree, collapsed
 
+    def _make_binned_partree(self, root):
+        """
+        Parallelize the injection of the sparse points iterated over by `root`,
+        if these are binned, with conflict-free updates.
+
+        The bins are visited one colour at a time, and the bins of a given colour
+        are distributed across the threads. Since two bins of the same colour never
+        update the same grid points, no atomic updates are required:
+
+            .. code-block:: C
+
+              for (int c_src = 0; c_src <= ncolors - 1; c_src += 1)
+              {
+                #pragma omp for schedule(dynamic,1)
+                for (int b_src = bin_colors[c_src]; ...)
+                  for (int k_src = bin_ptr[b_src]; ...)
+                  {
+                    int p_src = bin_perm[k_src];
+                    ...
+                  }
+              }
+
+        Returns the binned ParallelTree along with the condition under which it
+        should be used in place of the atomic one, or (None, None) if the sparse
+        points aren't binned.
+        """
+        binned = [i for i in FindSymbols().visit(root)
+                  if i.is_SparseFunction and getattr(i, 'binning', False) and
+                  i._sparse_dim is root.dim]
+        if not binned:
+            return None, None
+        sf = binned.pop()
+        perm, ptr, colors = sf._bin_perm, sf._bin_ptr, sf._bin_colors
+        ncolors = colors.shape[0] - 1
+
+        dc = Dimension(name='c_%s' % sf.name)
+        db = Dimension(name='b_%s' % sf.name)
+        dk = Dimension(name='k_%s' % sf.name)
+        b_m, b_M = Symbol(name='%s_m' % db.name), Symbol(name='%s_M' % db.name)
+        k_m, k_M = Symbol(name='%s_m' % dk.name), Symbol(name='%s_M' % dk.name)
+
+        body = [Expression(DummyEq(root.dim, perm.indexed[dk], dtype=np.int32))]
+        body = Iteration(body + list(root.nodes), dk, (k_m, k_M, 1))
+        body = [Expression(DummyEq(k_m, ptr.indexed[db], dtype=np.int32)),
+                Expression(DummyEq(k_M, ptr.indexed[db + 1] - 1, dtype=np.int32)),
+                body]
+        body = Iteration(body, db, (b_m, b_M, 1), pragmas=self.lang['for-bins'])
+        body = [Expression(DummyEq(b_m, colors.indexed[dc], dtype=np.int32)),
+                Expression(DummyEq(b_M, colors.indexed[dc + 1] - 1, dtype=np.int32)),
+                body]
+        body = Iteration(body, dc, (0, ncolors - 1, 1))
+        partree = ParallelTree([], body, nthreads=self.nthreads_nonaffine)
+
+        # All zeros if there are too few bins, in which case atomics are used
+        cond = colors.indexed[ncolors] > 0
+
+        return partree, cond
+
     def _make_parregion(self, partree):
         # Build the `omp-parallel` region
         private = [i for i in FindSymbols().visit(partree)
@@ -308,8 +442,9 @@ class Ompizer(object):
         return partree
 
     def _make_nested_partree(self, partree):
-        # Apply heuristic
-        if nhyperthreads() <= Ompizer.NESTED:
+        # Apply heuristic, unless the amount of nested parallelism is to be
+        # decided at runtime, via `nthreads_nested`
+        if nhyperthreads() <= Ompizer.NESTED and not self.tunable:
             return partree
 
         # Note: there might be multiple sub-trees amenable to nested parallelism,
@@ -365,6 +500,12 @@ class Ompizer(object):
             # Outer parallelism
             root, partree, collapsed = self._make_partree(candidates)
 
+            # Conflict-free injection of binned sparse points
+            if partree.is_ParallelAtomic:
+                binned, cond = self._make_binned_partree(root)
+            else:
+                binned = None
+
             # Nested parallelism
             partree = self._make_nested_partree(partree)
 
@@ -380,12 +521,18 @@ class Ompizer(object):
             # Protect the parallel region in case of 0-valued step increments
             parregion = self._make_guard(parregion, collapsed)
 
+            # Fall back to atomic increments if the binned points can't be used
+            if binned is not None:
+                parregion = Conditional(cond, self._make_parregion(binned), parregion)
+
             mapper[root] = parregion
 
         iet = Transformer(mapper).visit(iet)
 
-        # The used `nthreads` arguments
+        # The used `nthreads` arguments, as well as the sparse point bins
         args = [i for i in FindSymbols().visit(iet) if isinstance(i, (NThreadsMixin))]
+        args.extend(i for i in FindSymbols('symbolics').visit(iet)
+                    if getattr(getattr(i, 'parent', None), 'binning', False))
 
         return iet, {'args': args, 'includes': ['omp.h']}
 
@@ -136,7 +136,7 @@ class DiscreteFunction(AbstractFunction, ArgProvider):
                     except ValueError:
                         # Perhaps user only wants to initialise the physical domain
                         self._initializer(self.data)
-                else:
+                elif not self._allocator.zeroed:
                     self.data_with_halo.fill(0)
 
             return func(self)
@@ -624,6 +624,9 @@ class DiscreteFunction(AbstractFunction, ArgProvider):
         """
         dataobj = byref(self._C_ctype._type_())
         dataobj._obj.data = data.ctypes.data_as(c_void_p)
+        # The C struct only carries a pointer to `data`, which might otherwise be
+        # garbage collected (e.g., the sparse data scattered across MPI ranks)
+        dataobj._obj._data = data
         dataobj._obj.size = (c_int*self.ndim)(*data.shape)
         # MPI-related fields
         dataobj._obj.npsize = (c_int*self.ndim)(*[i - sum(j) for i, j in
@@ -816,7 +819,7 @@ class DiscreteFunction(AbstractFunction, ArgProvider):
 
     # Pickling support
     _pickle_kwargs = AbstractFunction._pickle_kwargs +\
-        ['grid', 'staggered', 'initializer']
+        ['grid', 'staggered', 'initializer', 'coefficients']
 
 
 class Function(DiscreteFunction, Differentiable):
@@ -1031,6 +1034,9 @@ class Function(DiscreteFunction, Differentiable):
                 halo = (left_points, right_points)
             else:
                 raise TypeError("`space_order` must be int or 3-tuple of ints")
+            if configuration['mpi'] == 'deep' and kwargs.get('grid') is not None:
+                # Deep halos, to exchange halos only once every few timesteps
+                halo = tuple(i*configuration['mpi-halo-depth'] for i in halo)
             return tuple(halo if i.is_Space else (0, 0) for i in self.dimensions)
 
     def __padding_setup__(self, **kwargs):
@@ -50,6 +50,13 @@ class Grid(ArgProvider):
     comm : MPI communicator, optional
         The set of processes over which the grid is distributed. Only relevant in
         case of MPI execution.
+    topology : tuple, optional
+        The number of processes along each dimension, or, for an uneven
+        decomposition, the sizes of the subdomains along a dimension. For
+        example, ``topology=(2, (60, 40))`` decomposes ``x`` evenly over two
+        processes and ``y`` into subdomains of 60 and 40 points. Only relevant
+        in case of MPI execution. Defaults to the topology minimizing the
+        halo volume.
 
     Examples
     --------
@@ -101,7 +108,7 @@ class Grid(ArgProvider):
 
     def __init__(self, shape, extent=None, origin=None, dimensions=None,
                  time_dimension=None, dtype=np.float32, subdomains=None,
-                 comm=None):
+                 comm=None, topology=None):
         self._shape = as_tuple(shape)
         self._extent = as_tuple(extent or tuple(1. for _ in self.shape))
         self._dtype = dtype
@@ -141,7 +148,8 @@ class Grid(ArgProvider):
         else:
             raise ValueError("`time_dimension` must be None or of type TimeDimension")
 
-        self._distributor = Distributor(self.shape, self.dimensions, comm)
+        self._topology = topology
+        self._distributor = Distributor(self.shape, self.dimensions, comm, topology)
 
     def __repr__(self):
         return "Grid[extent=%s, shape=%s, dimensions=%s]" % (
@@ -290,7 +298,8 @@ class Grid(ArgProvider):
     def __setstate__(self, state):
         for k, v in state.items():
             setattr(self, k, v)
-        self._distributor = Distributor(self.shape, self.dimensions)
+        self._distributor = Distributor(self.shape, self.dimensions,
+                                        topology=self._topology)
 
 
 class SubDomain(object):
@@ -1,15 +1,18 @@
 from collections import OrderedDict
 from itertools import product
+import os
 
 import sympy
 import numpy as np
 from cached_property import cached_property
 
 from devito.finite_differences import Differentiable, generate_fd_shortcuts
-from devito.mpi import MPI, SparseDistributor
-from devito.operations import LinearInterpolator, PrecomputedInterpolator
+from devito.mpi import MPI, SparseCommPlan, SparseDistributor
+from devito.parameters import configuration
+from devito.operations import (LinearInterpolator, LagrangeInterpolator,
+                               SincInterpolator, PrecomputedInterpolator)
 from devito.symbolics import INT, cast_mapper, indexify, retrieve_function_carriers
-from devito.tools import ReducerMap, flatten, prod, filter_ordered, memoized_meth
+from devito.tools import ReducerMap, flatten, filter_ordered, memoized_meth
 from devito.types.dense import DiscreteFunction, Function, SubFunction
 from devito.types.dimension import Dimension, ConditionalDimension
 from devito.types.basic import Symbol, Scalar
@@ -135,129 +138,17 @@ class AbstractSparseFunction(DiscreteFunction, Differentiable):
                 ret.setdefault(r, []).append(i)
         return {k: filter_ordered(v) for k, v in ret.items()}
 
-    @property
-    def _dist_scatter_mask(self):
-        """
-        A mask to index into ``self.data``, which creates a new data array that
-        logically contains N consecutive groups of sparse data values, where N
-        is the number of MPI ranks. The i-th group contains the sparse data
-        values accessible by the i-th MPI rank.  Thus, sparse data values along
-        the boundary of two or more MPI ranks are duplicated.
-        """
-        dmap = self._dist_datamap
-        mask = np.array(flatten(dmap[i] for i in sorted(dmap)), dtype=int)
-        ret = [slice(None) for i in range(self.ndim)]
-        ret[self._sparse_position] = mask
-        return tuple(ret)
-
-    @property
-    def _dist_subfunc_scatter_mask(self):
-        """
-        This method is analogous to :meth:`_dist_scatter_mask`, although
-        the mask is now suitable to index into self's SubFunctions, rather
-        than into ``self.data``.
-        """
-        return self._dist_scatter_mask[self._sparse_position]
-
-    @property
-    def _dist_gather_mask(self):
-        """
-        A mask to index into the ``data`` received upon returning from
-        ``self._dist_alltoall``. This mask creates a new data array in which
-        duplicate sparse data values have been discarded. The resulting data
-        array can thus be used to populate ``self.data``.
-        """
-        ret = list(self._dist_scatter_mask)
-        mask = ret[self._sparse_position]
-        inds = np.unique(mask, return_index=True)[1]
-        inds.sort()
-        ret[self._sparse_position] = inds.tolist()
-
-        return tuple(ret)
-
-    @property
-    def _dist_subfunc_gather_mask(self):
-        """
-        This method is analogous to :meth:`_dist_subfunc_scatter_mask`, although
-        the mask is now suitable to index into self's SubFunctions, rather
-        than into ``self.data``.
-        """
-        return self._dist_gather_mask[self._sparse_position]
-
-    @property
-    def _dist_count(self):
-        """
-        A 2-tuple of comm-sized iterables, which tells how many sparse points
-        is this MPI rank expected to send/receive to/from each other MPI rank.
-        """
-        dmap = self._dist_datamap
-        comm = self.grid.distributor.comm
-
-        ssparse = np.array([len(dmap.get(i, [])) for i in range(comm.size)], dtype=int)
-        rsparse = np.empty(comm.size, dtype=int)
-        comm.Alltoall(ssparse, rsparse)
-
-        return ssparse, rsparse
-
     @cached_property
     def _dist_reorder_mask(self):
         """
         An ordering mask that puts ``self._sparse_position`` at the front.
+        The positions are non-negative, so that the mask can be inverted
+        through ``np.argsort``.
         """
-        ret = (self._sparse_position,)
+        ret = (self._sparse_position % self.ndim,)
         ret += tuple(i for i, d in enumerate(self.indices) if d is not self._sparse_dim)
         return ret
 
-    @property
-    def _dist_alltoall(self):
-        """
-        The metadata necessary to perform an ``MPI_Alltoallv`` distributing the
-        sparse data values across the MPI ranks needing them.
-        """
-        ssparse, rsparse = self._dist_count
-
-        # Per-rank shape of send/recv data
-        sshape = []
-        rshape = []
-        for s, r in zip(ssparse, rsparse):
-            handle = list(self.shape)
-            handle[self._sparse_position] = s
-            sshape.append(tuple(handle))
-
-            handle = list(self.shape)
-            handle[self._sparse_position] = r
-            rshape.append(tuple(handle))
-
-        # Per-rank count of send/recv data
-        scount = tuple(prod(i) for i in sshape)
-        rcount = tuple(prod(i) for i in rshape)
-
-        # Per-rank displacement of send/recv data (it's actually all contiguous,
-        # but the Alltoallv needs this information anyway)
-        sdisp = np.concatenate([[0], np.cumsum(scount)[:-1]])
-        rdisp = np.concatenate([[0], tuple(np.cumsum(rcount))[:-1]])
-
-        # Total shape of send/recv data
-        sshape = list(self.shape)
-        sshape[self._sparse_position] = sum(ssparse)
-        rshape = list(self.shape)
-        rshape[self._sparse_position] = sum(rsparse)
-
-        # May have to swap axes, as `MPI_Alltoallv` expects contiguous data, and
-        # the sparse dimension may not be the outermost
-        sshape = tuple(sshape[i] for i in self._dist_reorder_mask)
-        rshape = tuple(rshape[i] for i in self._dist_reorder_mask)
-
-        return sshape, scount, sdisp, rshape, rcount, rdisp
-
-    @property
-    def _dist_subfunc_alltoall(self):
-        """
-        The metadata necessary to perform an ``MPI_Alltoallv`` distributing
-        self's SubFunction values across the MPI ranks needing them.
-        """
-        raise NotImplementedError
-
     def _dist_scatter(self):
         """
         A ``numpy.ndarray`` containing up-to-date data values belonging
@@ -273,8 +164,9 @@ class AbstractSparseFunction(DiscreteFunction, Differentiable):
         """
         raise NotImplementedError
 
-    @memoized_meth
     def _arg_defaults(self, alias=None):
+        # Note: not memoized, as with MPI the returned data is a scattered copy of
+        # `self.data`, which would otherwise go stale as soon as `self.data` changes
         key = alias or self
         mapper = {self: key}
         mapper.update({getattr(self, i): getattr(key, i) for i in self._sub_functions})
@@ -421,6 +313,25 @@ class SparseFunction(AbstractSparseFunction):
         The coordinates of each sparse point.
     space_order : int, optional
         Discretisation order for space derivatives. Defaults to 0.
+    precompute : bool, optional
+        If True, the grid indices and the weights used by the interpolation and
+        injection operators are computed upon ``op.apply``, once per coordinates
+        change, rather than at each timestep by the Operator. Defaults to False.
+    binning : bool, optional
+        If True, the sparse points are binned by grid cell upon ``op.apply``, once
+        per coordinates change, so that, with OpenMP, the injection may run in
+        parallel without atomic updates. Whether the bins or atomic updates are
+        actually used is decided based on the density of the sparse points.
+        Defaults to False.
+    interpolation : str, optional
+        The interpolation scheme used by the interpolation and injection
+        operators, among ``'linear'``, ``'lagrange'`` and ``'sinc'`` (Kaiser-
+        windowed sinc). Unlike ``'linear'``, the latter two always use grid
+        indices and weights computed upon ``op.apply``. Defaults to ``'linear'``.
+    r : int, optional
+        The radius, in grid points, of the support of the interpolation scheme.
+        Defaults to 1 for ``'linear'`` (the only allowed value), 2 (i.e., cubic)
+        for ``'lagrange'`` and 4 for ``'sinc'``.
     shape : tuple of ints, optional
         Shape of the object. Defaults to ``(npoint,)``.
     dimensions : tuple of Dimension, optional
@@ -488,11 +399,29 @@ class SparseFunction(AbstractSparseFunction):
     _radius = 1
     """The radius of the stencil operators provided by the SparseFunction."""
 
-    _sub_functions = ('coordinates',)
+    _interpolators = {'linear': (LinearInterpolator, 1),
+                      'lagrange': (LagrangeInterpolator, 2),
+                      'sinc': (SincInterpolator, 4)}
+    """The available interpolation schemes, with their default radius."""
 
     def __init_finalize__(self, *args, **kwargs):
         super(SparseFunction, self).__init_finalize__(*args, **kwargs)
-        self.interpolator = LinearInterpolator(self)
+
+        # Set up the interpolation scheme
+        interpolation = kwargs.get('interpolation', 'linear')
+        try:
+            interpolator, r = self._interpolators[interpolation]
+        except KeyError:
+            raise ValueError("Unknown interpolation scheme `%s`" % interpolation)
+        r = kwargs.get('r') or r
+        if interpolator is LinearInterpolator:
+            if r != 1:
+                raise ValueError("Linear interpolation requires `r=1`")
+            self.interpolator = LinearInterpolator(self)
+        else:
+            self.interpolator = interpolator(self, r)
+        self._interpolation = interpolation
+        self._radius = r
         # Set up sparse point coordinates
         coordinates = kwargs.get('coordinates', kwargs.get('coordinates_data'))
         if isinstance(coordinates, Function):
@@ -514,6 +443,50 @@ class SparseFunction(AbstractSparseFunction):
                 # case ``self._data is None``
                 self.coordinates.data
 
+        # Set up the precomputed interpolation indices and weights; with any
+        # scheme but linear, these are separable, and always precomputed
+        self._precompute = kwargs.get('precompute', False) or interpolation != 'linear'
+        if self._precompute:
+            self._interp_indices = SubFunction(name='%s_interp_idx' % self.name,
+                                               parent=self, dtype=np.int32,
+                                               dimensions=(self.indices[-1],
+                                                           Dimension(name='d')),
+                                               shape=(self.npoint, self.grid.dim),
+                                               space_order=0,
+                                               distributor=self._distributor)
+            if interpolation == 'linear':
+                # One weight per grid point within the support
+                dimensions = (self.indices[-1], Dimension(name='c'))
+                shape = (self.npoint, len(self._point_increments))
+            else:
+                # Separable weights, `2*r` per Dimension
+                dimensions = (self.indices[-1], Dimension(name='d'), Dimension(name='i'))
+                shape = (self.npoint, self.grid.dim, 2*r)
+            self._interp_weights = SubFunction(name='%s_interp_w' % self.name,
+                                               parent=self, dtype=self.dtype,
+                                               dimensions=dimensions, shape=shape,
+                                               space_order=0,
+                                               distributor=self._distributor)
+
+        # Set up the sparse point bins
+        self._binning = kwargs.get('binning', False)
+        if self._binning:
+            self._bin_perm = SubFunction(name='%s_bin_perm' % self.name, parent=self,
+                                         dtype=np.int32, dimensions=(self.indices[-1],),
+                                         shape=(self.npoint,), space_order=0,
+                                         distributor=self._distributor)
+            self._bin_ptr = SubFunction(name='%s_bin_ptr' % self.name, parent=self,
+                                        dtype=np.int32,
+                                        dimensions=(Dimension(name='nb'),),
+                                        shape=(self.npoint + 1,), space_order=0)
+            self._bin_colors = SubFunction(name='%s_bin_colors' % self.name,
+                                           parent=self, dtype=np.int32,
+                                           dimensions=(Dimension(name='nc'),),
+                                           shape=(2**self.grid.dim + 1,), space_order=0)
+
+        # The coordinates the precomputed data was last computed for
+        self._precomputed_coords = None
+
     def __distributor_setup__(self, **kwargs):
         """
         A `SparseDistributor` handles the SparseFunction decomposition based on
@@ -531,6 +504,35 @@ class SparseFunction(AbstractSparseFunction):
     def coordinates_data(self):
         return self.coordinates.data.view(np.ndarray)
 
+    @property
+    def precompute(self):
+        """True if the interpolation indices and weights are precomputed."""
+        return self._precompute
+
+    @property
+    def interpolation(self):
+        """The interpolation scheme."""
+        return self._interpolation
+
+    @property
+    def r(self):
+        """The radius, in grid points, of the support of the interpolation scheme."""
+        return self._radius
+
+    @property
+    def binning(self):
+        """True if the sparse points are binned for conflict-free injection."""
+        return self._binning
+
+    @property
+    def _sub_functions(self):
+        ret = ('coordinates',)
+        if self.precompute:
+            ret += ('_interp_indices', '_interp_weights')
+        if self.binning:
+            ret += ('_bin_perm', '_bin_ptr', '_bin_colors')
+        return ret
+
     @cached_property
     def _point_symbols(self):
         """Symbol for coordinate value in each dimension of the point."""
@@ -552,8 +554,12 @@ class SparseFunction(AbstractSparseFunction):
     @cached_property
     def _coordinate_indices(self):
         """Symbol for each grid index according to the coordinates."""
+        if self.precompute:
+            p_dim = self.indices[-1]
+            return tuple([self._interp_indices.indexify((p_dim, i))
+                          for i in range(self.grid.dim)])
         indices = self.grid.dimensions
-        return tuple([INT(sympy.Function('floor')((c - o) / i.spacing))
+        return tuple([INT(sympy.floor((c - o) / i.spacing))
                       for c, o, i in zip(self._coordinate_symbols, self.grid.origin,
                                          indices[:self.grid.dim])])
 
@@ -567,6 +573,110 @@ class SparseFunction(AbstractSparseFunction):
                                                   indices[:self.grid.dim],
                                                   field_offset)])
 
+    @cached_property
+    def _interpolation_weights(self):
+        """
+        Symbol for the precomputed interpolation weight of each grid point
+        surrounding the sparse point, in the same order as ``_point_increments``.
+        """
+        p_dim = self.indices[-1]
+        return tuple([self._interp_weights.indexify((p_dim, i))
+                      for i in range(len(self._point_increments))])
+
+    def _interpolation_data(self, coords):
+        """
+        Compute the grid indices and the interpolation weights of the sparse
+        points at ``coords``. This mirrors the symbolic expressions generated
+        by the interpolator when ``precompute=False``.
+        """
+        origin = np.array([o.data for o in self.grid.origin], dtype=self.dtype)
+        spacing = np.array([d.spacing.data for d in self.grid.dimensions],
+                           dtype=self.dtype)
+
+        coords = np.asarray(coords, dtype=self.dtype) - origin
+        indices = np.floor(coords / spacing).astype(np.int32)
+        bases = (coords - indices*spacing) / spacing
+
+        weights = np.empty((len(coords), len(self._point_increments)), dtype=self.dtype)
+        for i, inc in enumerate(self._point_increments):
+            weights[:, i] = np.prod([b if j else 1 - b for b, j in zip(bases.T, inc)],
+                                    axis=0)
+
+        return indices, weights
+
+    def _binning_data(self, indices):
+        """
+        Bin the sparse points whose supports start at grid indices ``indices``.
+
+        The grid is split into cells of ``2*radius - 1`` grid points per
+        dimension, and each cell is given one of ``2**ndim`` colours, based on
+        the parity of its index along each dimension. Two sparse points in
+        distinct cells of the same colour never update the same grid point, so
+        the bins (i.e., the non-empty cells) of a given colour may be processed
+        in parallel without atomic updates.
+
+        Returns
+        -------
+        The sparse points sorted by colour and bin; the start of each bin in the
+        sorted sparse points; the start of each colour in the bins. The latter is
+        all zeros if the bins should not be used, that is if there are too few
+        bins per colour to keep all threads busy.
+        """
+        npoint, ndim = indices.shape
+        ncolors = 2**ndim
+
+        cells = np.floor_divide(indices, 2*self._radius - 1)
+        keys = np.column_stack([np.mod(cells, 2) @ 2**np.arange(ndim), cells])
+        perm = np.lexsort(keys.T[::-1]).astype(np.int32)
+
+        keys = keys[perm]
+        starts = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+        starts = np.concatenate([[0], starts]) if npoint > 0 else starts
+        ptr = np.full(npoint + 1, npoint, dtype=np.int32)
+        ptr[:len(starts)] = starts
+
+        nthreads = int(os.environ.get('OMP_NUM_THREADS',
+                                      configuration['platform'].cores_physical))
+        if len(starts) >= ncolors*nthreads:
+            colors = np.searchsorted(keys[starts, 0], np.arange(ncolors + 1))
+            colors = colors.astype(np.int32)
+        else:
+            colors = np.zeros(ncolors + 1, dtype=np.int32)
+
+        return perm, ptr, colors
+
+    def _precomputed_data(self, coords):
+        """
+        Compute the data of the SubFunctions derived from the coordinates, that
+        is the precomputed interpolation data and the sparse point bins.
+        """
+        ret = {}
+        if self.precompute or self.binning:
+            if self.interpolation == 'linear':
+                indices, weights = self._interpolation_data(coords)
+            else:
+                indices, weights = self.interpolator._interpolation_data(coords)
+        if self.precompute:
+            ret.update({self._interp_indices: indices, self._interp_weights: weights})
+        if self.binning:
+            perm, ptr, colors = self._binning_data(indices)
+            ret.update({self._bin_perm: perm, self._bin_ptr: ptr,
+                        self._bin_colors: colors})
+        return ret
+
+    def _update_precomputed_data(self):
+        """
+        Recompute, in place, the data of the SubFunctions derived from the
+        coordinates, if the coordinates have changed since the last time.
+        """
+        coords = self.coordinates.data._local
+        cached = self._precomputed_coords
+        if cached is not None and np.array_equal(coords, cached):
+            return
+        for k, v in self._precomputed_data(coords).items():
+            k.data._local[:] = v
+        self._precomputed_coords = coords.copy()
+
     @memoized_meth
     def _index_matrix(self, offset):
         # Note about the use of *memoization*
@@ -643,29 +753,50 @@ class SparseFunction(AbstractSparseFunction):
         return tuple(mapper.get(d) for d in self.dimensions)
 
     @property
-    def _dist_subfunc_alltoall(self):
-        ssparse, rsparse = self._dist_count
-
-        # Per-rank shape of send/recv `coordinates`
-        sshape = [(i, self.grid.dim) for i in ssparse]
-        rshape = [(i, self.grid.dim) for i in rsparse]
-
-        # Per-rank count of send/recv `coordinates`
-        scount = [prod(i) for i in sshape]
-        rcount = [prod(i) for i in rshape]
-
-        # Per-rank displacement of send/recv `coordinates` (it's actually all
-        # contiguous, but the Alltoallv needs this information anyway)
-        sdisp = np.concatenate([[0], np.cumsum(scount)[:-1]])
-        rdisp = np.concatenate([[0], tuple(np.cumsum(rcount))[:-1]])
+    def _dist_owners(self):
+        """
+        The MPI rank owning the reference grid point of each sparse point. With
+        the windowed interpolation schemes, only the owner is guaranteed to be
+        able to read the whole support of the sparse point within its halo, hence
+        its interpolated value is the one retained upon a gather. With linear
+        interpolation, None, that is any copy of the sparse point will do.
+        """
+        if self.interpolation == 'linear':
+            return None
+        top = np.array(self.grid.shape) - 1
+        points = [tuple(np.clip(i, 0, top)) for i in self.gridpoints]
+        if not points:
+            return ()
+        ranks = self.grid.distributor.glb_to_rank(points)
+        return ranks if len(points) > 1 else (ranks,)
 
-        # Total shape of send/recv `coordinates`
-        sshape = list(self.coordinates.shape)
-        sshape[0] = sum(ssparse)
-        rshape = list(self.coordinates.shape)
-        rshape[0] = sum(rsparse)
+    @property
+    def _dist_plan(self):
+        """
+        The SparseCommPlan redistributing the sparse points across the MPI ranks
+        needing them. The plan is rebuilt only if the coordinates have changed,
+        on any MPI rank, since the last time it was built.
+        """
+        coords = self.coordinates.data._local
+        comm = self.grid.distributor.comm
 
-        return sshape, scount, sdisp, rshape, rcount, rdisp
+        try:
+            plan, cached = self._dist_plan_cache
+            changed = not np.array_equal(coords, cached)
+        except AttributeError:
+            plan = None
+            changed = True
+        if comm.allreduce(changed, op=MPI.LOR) or plan is None:
+            if plan is not None:
+                plan.free()
+            plan = SparseCommPlan(comm, self._dist_datamap, self._dist_owners)
+            # The scattered coordinates, and the data derived from them, are
+            # computed lazily, and reused as long as the plan is valid
+            plan.coords = None
+            plan.precomputed = None
+            self._dist_plan_cache = (plan, coords.copy())
+
+        return plan
 
     def _dist_scatter(self, data=None):
         data = data if data is not None else self.data._local
@@ -673,36 +804,36 @@ class SparseFunction(AbstractSparseFunction):
 
         # If not using MPI, don't waste time
         if distributor.nprocs == 1:
-            return {self: data, self.coordinates: self.coordinates.data}
+            ret = {self: data, self.coordinates: self.coordinates.data}
+            ret.update({getattr(self, i): getattr(self, i).data
+                        for i in self._sub_functions[1:]})
+            return ret
 
-        comm = distributor.comm
-        mpitype = MPI._typedict[np.dtype(self.dtype).char]
-
-        # Pack sparse data values so that they can be sent out via an Alltoallv
-        data = data[self._dist_scatter_mask]
-        data = np.ascontiguousarray(np.transpose(data, self._dist_reorder_mask))
-        # Send out the sparse point values
-        _, scount, sdisp, rshape, rcount, rdisp = self._dist_alltoall
-        scattered = np.empty(shape=rshape, dtype=self.dtype)
-        comm.Alltoallv([data, scount, sdisp, mpitype],
-                       [scattered, rcount, rdisp, mpitype])
-        data = scattered
-        # Unpack data values so that they follow the expected storage layout
-        data = np.ascontiguousarray(np.transpose(data, self._dist_reorder_mask))
-
-        # Pack (reordered) coordinates so that they can be sent out via an Alltoallv
-        coords = self.coordinates.data._local[self._dist_subfunc_scatter_mask]
-        # Send out the sparse point coordinates
-        _, scount, sdisp, rshape, rcount, rdisp = self._dist_subfunc_alltoall
-        scattered = np.empty(shape=rshape, dtype=self.coordinates.dtype)
-        comm.Alltoallv([coords, scount, sdisp, mpitype],
-                       [scattered, rcount, rdisp, mpitype])
-        coords = scattered
+        plan = self._dist_plan
 
-        # Translate global coordinates into local coordinates
-        coords = coords - np.array(self.grid.origin_offset, dtype=self.dtype)
+        # Send out the sparse point values. `MPI_Alltoallv` expects contiguous
+        # data, hence the sparse dimension is temporarily made the outermost
+        data = plan.scatter(np.transpose(data, self._dist_reorder_mask))
+        # Unpack data values so that they follow the expected storage layout
+        data = np.ascontiguousarray(np.transpose(data,
+                                                 np.argsort(self._dist_reorder_mask)))
+
+        # Send out the sparse point coordinates, unless they haven't changed
+        # since the last scatter
+        if plan.coords is None:
+            coords = plan.scatter(self.coordinates.data._local)
+            # Translate global coordinates into local coordinates
+            coords = coords - np.array(self.grid.origin_offset, dtype=self.dtype)
+            plan.coords = coords
+        ret = {self: data, self.coordinates: plan.coords.copy()}
+
+        # The data derived from the coordinates, as the coordinates themselves,
+        # is only computed if the plan has been rebuilt
+        if plan.precomputed is None:
+            plan.precomputed = self._precomputed_data(plan.coords)
+        ret.update(plan.precomputed)
 
-        return {self: data, self.coordinates: coords}
+        return ret
 
     def _dist_gather(self, data, coords):
         distributor = self.grid.distributor
@@ -712,36 +843,37 @@ class SparseFunction(AbstractSparseFunction):
             return
 
         comm = distributor.comm
+        plan = self._dist_plan
 
-        # Pack sparse data values so that they can be sent out via an Alltoallv
-        data = np.ascontiguousarray(np.transpose(data, self._dist_reorder_mask))
         # Send back the sparse point values
-        sshape, scount, sdisp, _, rcount, rdisp = self._dist_alltoall
-        gathered = np.empty(shape=sshape, dtype=self.dtype)
-        mpitype = MPI._typedict[np.dtype(self.dtype).char]
-        comm.Alltoallv([data, rcount, rdisp, mpitype],
-                       [gathered, scount, sdisp, mpitype])
+        data = np.transpose(data, self._dist_reorder_mask)
+        gathered = plan.gather(data)
         # Unpack data values so that they follow the expected storage layout
-        gathered = np.ascontiguousarray(np.transpose(gathered, self._dist_reorder_mask))
-        self._data[:] = gathered[self._dist_gather_mask]
+        self._data[:] = np.transpose(gathered, np.argsort(self._dist_reorder_mask))
 
+        # Send back the sparse point coordinates, unless the Operator left them
+        # unchanged
         if coords is not None:
-            # Pack (reordered) coordinates so that they can be sent out via an Alltoallv
-            coords = coords + np.array(self.grid.origin_offset, dtype=self.dtype)
-            # Send out the sparse point coordinates
-            sshape, scount, sdisp, _, rcount, rdisp = self._dist_subfunc_alltoall
-            gathered = np.empty(shape=sshape, dtype=self.coordinates.dtype)
-            mpitype = MPI._typedict[np.dtype(self.coordinates.dtype).char]
-            comm.Alltoallv([coords, rcount, rdisp, mpitype],
-                           [gathered, scount, sdisp, mpitype])
-            self._coordinates.data._local[:] = gathered[self._dist_subfunc_gather_mask]
+            changed = plan.coords is None or not np.array_equal(coords, plan.coords)
+            if comm.allreduce(changed, op=MPI.LOR):
+                coords = coords + np.array(self.grid.origin_offset, dtype=self.dtype)
+                self._coordinates.data._local[:] = plan.gather(coords)
 
         # Note: this method "mirrors" `_dist_scatter`: a sparse point that is sent
         # in `_dist_scatter` is here received; a sparse point that is received in
         # `_dist_scatter` is here sent.
 
+    def _arg_defaults(self, alias=None):
+        # Without MPI, the Operator reads the data derived from the coordinates
+        # straight from `self`'s SubFunctions, which must thus be kept up-to-date
+        if self.grid.distributor.nprocs == 1:
+            self._update_precomputed_data()
+        return super(SparseFunction, self)._arg_defaults(alias=alias)
+
     # Pickling support
-    _pickle_kwargs = AbstractSparseFunction._pickle_kwargs + ['coordinates_data']
+    _pickle_kwargs = AbstractSparseFunction._pickle_kwargs + ['coordinates_data',
+                                                              'precompute', 'binning',
+                                                              'interpolation', 'r']
 
 
 class SparseTimeFunction(AbstractSparseTimeFunction, SparseFunction):
@@ -772,6 +904,30 @@ class SparseTimeFunction(AbstractSparseTimeFunction, SparseFunction):
         Discretisation order for space derivatives. Defaults to 0.
     time_order : int, optional
         Discretisation order for time derivatives. Defaults to 1.
+    precompute : bool, optional
+        If True, the grid indices and the weights used by the interpolation and
+        injection operators are computed upon ``op.apply``, once per coordinates
+        change, rather than at each timestep by the Operator. Defaults to False.
+    binning : bool, optional
+        If True, the sparse points are binned by grid cell upon ``op.apply``, once
+        per coordinates change, so that, with OpenMP, the injection may run in
+        parallel without atomic updates. Whether the bins or atomic updates are
+        actually used is decided based on the density of the sparse points.
+        Defaults to False.
+    interpolation : str, optional
+        The interpolation scheme used by the interpolation and injection
+        operators, among ``'linear'``, ``'lagrange'`` and ``'sinc'`` (Kaiser-
+        windowed sinc). Unlike ``'linear'``, the latter two always use grid
+        indices and weights computed upon ``op.apply``. Defaults to ``'linear'``.
+    r : int, optional
+        The radius, in grid points, of the support of the interpolation scheme.
+        Defaults to 1 for ``'linear'`` (the only allowed value), 2 (i.e., cubic)
+        for ``'lagrange'`` and 4 for ``'sinc'``.
+    stream : Stream, optional
+        If provided, the data written by an Operator is streamed to a file, in
+        chunks of timesteps, while the Operator runs. Only one chunk is then
+        allocated, so ``shape`` defaults to ``(min(nt, stream.chunk), npoint)``
+        and ``data`` only carries scratch values. Not supported with MPI.
     shape : tuple of ints, optional
         Shape of the object. Defaults to ``(nt, npoint)``.
     dimensions : tuple of Dimension, optional
@@ -825,6 +981,57 @@ class SparseTimeFunction(AbstractSparseTimeFunction, SparseFunction):
 
     is_SparseTimeFunction = True
 
+    def __init_finalize__(self, *args, **kwargs):
+        super(SparseTimeFunction, self).__init_finalize__(*args, **kwargs)
+
+        self._stream = kwargs.get('stream')
+        if self._stream is not None:
+            if self.grid.distributor.nprocs > 1:
+                # The data would have to be gathered, by the MPI rank writing
+                # the file, after each chunk
+                raise ValueError("`stream` isn't supported with MPI")
+            self._nt = kwargs['nt']
+
+    @classmethod
+    def __shape_setup__(cls, **kwargs):
+        shape = super(SparseTimeFunction, cls).__shape_setup__(**kwargs)
+        stream = kwargs.get('stream')
+        if stream is not None and kwargs.get('shape') is None:
+            shape = list(shape)
+            shape[cls._time_position] = min(kwargs['nt'], stream.chunk)
+        return tuple(shape)
+
+    @property
+    def stream(self):
+        """The Stream the data is written to, if any."""
+        return self._stream
+
+    @property
+    def nt(self):
+        if self.stream is not None:
+            return self._nt
+        return super(SparseTimeFunction, self).nt
+
+    def _arg_defaults(self, alias=None):
+        args = super(SparseTimeFunction, self)._arg_defaults(alias=alias)
+        if self.stream is None:
+            return args
+
+        # The Operator runs over all `nt` timesteps, one chunk at a time
+        args = args.reduce_all()
+        args.update(self.time_dim._arg_defaults(_min=0, size=self.nt))
+        return ReducerMap(args)
+
+    def _arg_check(self, args, intervals):
+        if self.stream is None:
+            return super(SparseTimeFunction, self)._arg_check(args, intervals)
+
+        # The chunk-sized buffer is slid along time by the Operator
+        for i, s in zip(self.dimensions, args[self.name].shape):
+            if i is self.time_dim:
+                s = self.nt
+            i._arg_check(args, s, intervals[i])
+
     def interpolate(self, expr, offset=0, u_t=None, p_t=None, increment=False):
         """
         Generate equations interpolating an arbitrary expression into ``self``.
@@ -883,7 +1090,7 @@ class SparseTimeFunction(AbstractSparseTimeFunction, SparseFunction):
 
     # Pickling support
     _pickle_kwargs = AbstractSparseTimeFunction._pickle_kwargs +\
-        SparseFunction._pickle_kwargs
+        SparseFunction._pickle_kwargs + ['stream']
 
 
 class PrecomputedSparseFunction(AbstractSparseFunction):
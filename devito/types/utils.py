@@ -1,7 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+
 from devito.tools import Tag
 # Additional Function-related APIs
 
-__all__ = ['Buffer', 'NODE', 'CELL']
+__all__ = ['Buffer', 'Stream', 'NODE', 'CELL']
 
 
 class Buffer(Tag):
@@ -10,6 +15,105 @@ class Buffer(Tag):
         super(Buffer, self).__init__('Buffer', value)
 
 
+class Stream(object):
+
+    """
+    Stream the data written by an Operator into a SparseTimeFunction to a file,
+    in chunks of timesteps, while the Operator runs.
+
+    The SparseTimeFunction only allocates ``chunk`` timesteps, and the Operator
+    runs one chunk of timesteps at a time. While a chunk is computed, the
+    previous one is written to the file by a background thread, from a second
+    buffer of the same size.
+
+    Parameters
+    ----------
+    path : str
+        The file the data is written to, as a raw binary array in C order, with
+        the dtype of the SparseTimeFunction and one row of ``npoint`` values per
+        timestep. Only the rows of the timesteps actually run are written, so
+        after ``op.apply(time_M=...)`` the file holds ``time_M + 1`` rows, rather
+        than ``nt``. The file is overwritten by the first ``op.apply`` and
+        updated, over the timesteps actually run, by the subsequent ones.
+    chunk : int, optional
+        The number of timesteps per chunk. Defaults to 128.
+
+    Examples
+    --------
+    >>> from devito import Grid, SparseTimeFunction, Stream
+    >>> grid = Grid(shape=(4, 4))
+    >>> rec = SparseTimeFunction(name='rec', grid=grid, npoint=2, nt=1000,
+    ...                          stream=Stream('rec.bin', chunk=100))
+    >>> rec.shape
+    (100, 2)
+    >>> rec.nt
+    1000
+    """
+
+    def __init__(self, path, chunk=128):
+        if not isinstance(chunk, int) or chunk <= 0:
+            raise ValueError("`chunk` must be a positive int")
+        self.path = path
+        self.chunk = chunk
+
+        self._file = None
+        self._created = False
+
+    def __repr__(self):
+        return "Stream(%s, chunk=%d)" % (self.path, self.chunk)
+
+    def __reduce__(self):
+        return (Stream, (self.path, self.chunk))
+
+    def _open(self, data):
+        """
+        Prepare to stream ``data``, the chunk-sized buffer read by the Operator.
+        """
+        self._buffers = (data, np.empty_like(data))
+        self._futures = [None, None]
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        mode = 'r+b' if self._created and os.path.exists(self.path) else 'wb'
+        self._file = open(self.path, mode)
+        self._created = True
+
+    def _acquire(self, n):
+        """
+        The buffer for the ``n``-th chunk, once it's no longer being written.
+        """
+        i = n % 2
+        if self._futures[i] is not None:
+            self._futures[i].result()
+        buf = self._buffers[i]
+        buf.fill(0)
+        return buf
+
+    def _release(self, n, t0, nrows):
+        """
+        Asynchronously write the first ``nrows`` rows of the buffer for the
+        ``n``-th chunk, starting at timestep ``t0``.
+        """
+        i = n % 2
+        self._futures[i] = self._executor.submit(self._write, self._buffers[i][:nrows],
+                                                 t0)
+
+    def _write(self, data, t0):
+        self._file.seek(t0*data[0].nbytes)
+        self._file.write(np.ascontiguousarray(data).data)
+
+    def _close(self):
+        """Wait for all pending writes, then close the file."""
+        try:
+            self._executor.shutdown(wait=True)
+            for i in self._futures:
+                if i is not None:
+                    # Re-raise any I/O error
+                    i.result()
+        finally:
+            self._file.close()
+            self._file = None
+            self._buffers = self._futures = self._executor = None
+
+
 class Stagger(Tag):
     """Stagger region."""
     pass
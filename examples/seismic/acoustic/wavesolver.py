@@ -1,11 +1,11 @@
 from devito import Function, TimeFunction
+from devito.checkpointing import Checkpointer
+from devito.data import CompressedStorage, MmapAllocator, MmapStreamer, codec_registry
 from devito.tools import memoized_meth
 from examples.seismic import PointSource, Receiver
 from examples.seismic.acoustic.operators import (
     ForwardOperator, AdjointOperator, GradientOperator, BornOperator
 )
-from examples.checkpointing.checkpoint import DevitoCheckpoint, CheckpointOperator
-from pyrevolve import Revolver
 
 
 class AcousticWaveSolver(object):
@@ -71,7 +71,8 @@ class AcousticWaveSolver(object):
                             kernel=self.kernel, space_order=self.space_order,
                             **self._kwargs)
 
-    def forward(self, src=None, rec=None, u=None, vp=None, save=None, **kwargs):
+    def forward(self, src=None, rec=None, u=None, vp=None, save=None, compression=None,
+                out_of_core=None, **kwargs):
         """
         Forward modelling function that creates the necessary
         data objects for running a forward modelling operator.
@@ -88,6 +89,15 @@ class AcousticWaveSolver(object):
             The time-constant velocity.
         save : int or Buffer, optional
             The entire (unrolled) wavefield.
+        compression : Codec or str, optional
+            With ``save``, compress each time slice of the wavefield as soon as
+            it is computed. The returned wavefield is then a CompressedStorage,
+            which can be fed to ``gradient``.
+        out_of_core : bool or str, optional
+            With ``save``, back the wavefield by a memory-mapped file, in the
+            given directory if a str or else in the current working directory,
+            and write back each time slice to disk as soon as it is no longer
+            needed. Useful when the wavefield doesn't fit in memory.
 
         Returns
         -------
@@ -100,19 +110,79 @@ class AcousticWaveSolver(object):
                               time_range=self.geometry.time_axis,
                               coordinates=self.geometry.rec_positions)
 
+        # Pick vp from model unless explicitly provided
+        vp = vp or self.model.vp
+
+        if save and compression is not None:
+            return self._forward_compressed(src, rec, vp, compression, **kwargs)
+        if save and out_of_core:
+            return self._forward_outofcore(src, rec, vp, out_of_core, **kwargs)
+
         # Create the forward wavefield if not provided
         u = u or TimeFunction(name='u', grid=self.model.grid,
                               save=self.geometry.nt if save else None,
                               time_order=2, space_order=self.space_order)
 
-        # Pick vp from model unless explicitly provided
-        vp = vp or self.model.vp
-
         # Execute operator and return wavefield and receiver data
         summary = self.op_fwd(save).apply(src=src, rec=rec, u=u, vp=vp,
                                           dt=kwargs.pop('dt', self.dt), **kwargs)
         return rec, u, summary
 
+    def _forward_compressed(self, src, rec, vp, compression, **kwargs):
+        """
+        Forward modelling, compressing each time slice of the wavefield as soon
+        as it has been computed.
+
+        The buffered forward operator is run one timestep at a time, with the
+        runtime arguments computed only once.
+        """
+        if isinstance(compression, str):
+            compression = codec_registry[compression]()
+
+        u = TimeFunction(name='u', grid=self.model.grid,
+                         time_order=2, space_order=self.space_order)
+        nbuffers = u._time_size
+
+        call = self.op_fwd(save=False).prepare(src=src, rec=rec, u=u, vp=vp,
+                                               dt=kwargs.pop('dt', self.dt), **kwargs)
+        time_m, time_M = call.args['time_m'], call.args['time_M']
+
+        storage = CompressedStorage(u._data[0].shape, u.dtype, compression)
+        # The initial condition
+        storage[time_m - 1] = u._data[(time_m - 1) % nbuffers]
+
+        def store(i):
+            # Compress the time slice computed by the previous timestep
+            storage[i] = u._data[i % nbuffers]
+
+        summary = call.stepwise(store)
+        storage[time_M + 1] = u._data[(time_M + 1) % nbuffers]
+
+        return rec, storage, summary
+
+    def _forward_outofcore(self, src, rec, vp, out_of_core, **kwargs):
+        """
+        Forward modelling, with the wavefield backed by a memory-mapped file.
+
+        The forward operator is run one timestep at a time, so that the time
+        slices the time loop has moved past are written back to disk while the
+        next timesteps are computed.
+        """
+        path = out_of_core if isinstance(out_of_core, str) else None
+        u = TimeFunction(name='u', grid=self.model.grid, save=self.geometry.nt,
+                         time_order=2, space_order=self.space_order,
+                         allocator=MmapAllocator(path))
+        streamer = MmapStreamer(u)
+
+        call = self.op_fwd(save=True).prepare(src=src, rec=rec, u=u, vp=vp,
+                                              dt=kwargs.pop('dt', self.dt), **kwargs)
+        try:
+            summary = call.stepwise(streamer.advance)
+        finally:
+            streamer.close()
+
+        return rec, u, summary
+
     def adjoint(self, rec, srca=None, v=None, vp=None, **kwargs):
         """
         Adjoint modelling function that creates the necessary
@@ -162,14 +232,20 @@ class AcousticWaveSolver(object):
         ----------
         rec : SparseTimeFunction
             Receiver data.
-        u : TimeFunction
-            Full wavefield `u` (created with save=True).
+        u : TimeFunction or CompressedStorage
+            Full wavefield `u` (created with save=True). If backed by a
+            memory-mapped file, its time slices are prefetched from disk
+            ahead of the (backward) time loop.
         v : TimeFunction, optional
             Stores the computed wavefield.
         grad : Function, optional
             Stores the gradient field.
         vp : Function or float, optional
             The time-constant velocity.
+        checkpointing : bool or int, optional
+            If True, recompute the forward wavefield through optimal
+            checkpointing rather than reading it from `u`. If an int, the
+            memory budget, in bytes, for the checkpoints. Defaults to False.
 
         Returns
         -------
@@ -189,22 +265,73 @@ class AcousticWaveSolver(object):
         if checkpointing:
             u = TimeFunction(name='u', grid=self.model.grid,
                              time_order=2, space_order=self.space_order)
-            cp = DevitoCheckpoint([u])
-            n_checkpoints = None
-            wrap_fw = CheckpointOperator(self.op_fwd(save=False), src=self.geometry.src,
-                                         u=u, vp=vp, dt=dt)
-            wrap_rev = CheckpointOperator(self.op_grad(save=False), u=u, v=v,
-                                          vp=vp, rec=rec, dt=dt, grad=grad)
+            memory = None if checkpointing is True else checkpointing
+            cp = Checkpointer(self.op_fwd(save=False), self.op_grad(save=False), [u],
+                              rec.data.shape[0]-2, memory=memory,
+                              fwd_args=dict(src=self.geometry.src, u=u, vp=vp, dt=dt),
+                              rev_args=dict(u=u, v=v, vp=vp, rec=rec, dt=dt, grad=grad))
 
             # Run forward
-            wrp = Revolver(cp, wrap_fw, wrap_rev, n_checkpoints, rec.data.shape[0]-2)
-            wrp.apply_forward()
-            summary = wrp.apply_reverse()
+            cp.apply_forward()
+            summary = cp.apply_reverse()
+        elif isinstance(u, CompressedStorage):
+            summary = self._gradient_compressed(rec, u, v, grad, vp, dt, **kwargs)
+        elif u._allocator.is_Mmap:
+            summary = self._gradient_outofcore(rec, u, v, grad, vp, dt, **kwargs)
         else:
             summary = self.op_grad().apply(rec=rec, grad=grad, v=v, u=u, vp=vp,
                                            dt=dt, **kwargs)
         return grad, summary
 
+    def _gradient_compressed(self, rec, storage, v, grad, vp, dt, **kwargs):
+        """
+        Gradient computation reading the forward wavefield from a
+        CompressedStorage.
+
+        The buffered gradient operator is run one timestep at a time, backwards,
+        and before each timestep the time slices of the forward wavefield it
+        reads are decompressed into the buffer.
+        """
+        u = TimeFunction(name='u', grid=self.model.grid,
+                         time_order=2, space_order=self.space_order)
+        nbuffers = u._time_size
+
+        call = self.op_grad(save=False).prepare(rec=rec, grad=grad, v=v, u=u, vp=vp,
+                                                dt=dt, **kwargs)
+
+        loaded = {}
+
+        def load(i):
+            # Decompress the time slices read by this timestep, unless still
+            # in the buffer from the previous timestep
+            for j in range(i - 1, i + 2):
+                if loaded.get(j % nbuffers) != j:
+                    u._data[j % nbuffers] = storage[j]
+                    loaded[j % nbuffers] = j
+
+        return call.stepwise(load, backward=True)
+
+    def _gradient_outofcore(self, rec, u, v, grad, vp, dt, **kwargs):
+        """
+        Gradient computation reading the forward wavefield from a memory-mapped
+        file.
+
+        The gradient operator is run one timestep at a time, backwards, so that
+        the time slices of the forward wavefield read next are prefetched from
+        disk while the current timestep is computed.
+        """
+        streamer = MmapStreamer(u)
+
+        call = self.op_grad().prepare(rec=rec, grad=grad, v=v, u=u, vp=vp, dt=dt,
+                                      **kwargs)
+        try:
+            summary = call.stepwise(lambda i: streamer.advance(i, direction=-1),
+                                    backward=True)
+        finally:
+            streamer.close()
+
+        return summary
+
     def born(self, dmin, src=None, rec=None, u=None, U=None, vp=None, **kwargs):
         """
         Linearized Born modelling function that creates the necessary
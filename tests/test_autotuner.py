@@ -1,3 +1,5 @@
+import tempfile
+
 import pytest
 import numpy as np
 from unittest.mock import patch
@@ -131,6 +133,95 @@ def test_mixed_blocking_nthreads():
     assert 'nthreads' in op._state['autotuning'][0]['tuned']
 
 
+@switchconfig(autotuning_db=1)
+def test_tuning_db(monkeypatch, tmpdir):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmpdir))
+
+    grid = Grid(shape=(96, 96, 96))
+    f = TimeFunction(name='f', grid=grid)
+
+    op = Operator(Eq(f.forward, f + 1.), dle=('advanced', {'openmp': False}))
+    op.apply(time=0, autotune=True)
+    assert op._state['autotuning'][0]['runs'] == 6
+    tuned = op._state['autotuning'][0]['tuned']
+
+    # Now the tuned arguments are fetched from the database, also by new Operators
+    op.apply(time=0, autotune=True)
+    assert op._state['autotuning'][1]['runs'] == 0
+    assert op._state['autotuning'][1]['tuned'] == tuned
+    op1 = Operator(Eq(f.forward, f + 1.), dle=('advanced', {'openmp': False}))
+    op1.apply(time=0, autotune=True)
+    assert op1._state['autotuning'][0]['runs'] == 0
+
+    # A different problem size only warm-starts autotuning
+    grid = Grid(shape=(60, 60, 60))
+    f = TimeFunction(name='f', grid=grid)
+    op2 = Operator(Eq(f.forward, f + 1.), dle=('advanced', {'openmp': False}))
+    op2.apply(time=0, autotune=True)
+    assert 0 < op2._state['autotuning'][0]['runs'] < 6
+
+
+@skipif('nompi')
+@pytest.mark.parallel(mode=2)
+@switchconfig(autotuning_db=1)
+def test_tuning_db_w_mpi(monkeypatch, tmpdir):
+    """Make sure that either all MPI ranks fetch the tuned arguments from the
+    database or none does, since in `runtime` mode autotuning is collective."""
+    grid = Grid(shape=(32, 32, 32))
+    rank = grid.distributor.myrank
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmpdir.join(str(rank)).ensure(dir=True)))
+
+    f = TimeFunction(name='f', grid=grid, space_order=2)
+
+    op = Operator(Eq(f.forward, f.laplace + 1.), dle=('advanced', {'openmp': False}))
+    op.apply(time=50, autotune=('basic', 'runtime'))
+    assert op._state['autotuning'][0]['runs'] > 0
+
+    # Only one MPI rank misses now
+    if rank == 0:
+        for i in tmpdir.join(str(rank)).visit('*.json'):
+            i.remove()
+    op.apply(time=50, autotune=('basic', 'runtime'))
+    assert op._state['autotuning'][1]['runs'] > 0
+
+
+def test_search_descent():
+    grid = Grid(shape=(96, 96, 96))
+    f = TimeFunction(name='f', grid=grid)
+
+    op = Operator(Eq(f.forward, f + 1.), dle=('advanced', {'openmp': False}))
+    op.apply(time=0, autotune='aggressive')
+    exhaustive = op._state['autotuning'][0]['runs']
+
+    with patch.dict(options, {'strategy': 'descent'}):
+        op.apply(time=0, autotune='aggressive')
+    assert 0 < op._state['autotuning'][1]['runs'] < exhaustive
+    assert len(op._state['autotuning'][1]['tuned']) == 2
+
+    # Both the model-guided and the exhaustive search obey the budget
+    for strategy in ['descent', 'exhaustive']:
+        with patch.dict(options, {'strategy': strategy, 'budget-runs': 2}):
+            op.apply(time=0, autotune='aggressive')
+        assert op._state['autotuning'][-1]['runs'] == 2
+
+
+def test_parallel_knobs():
+    grid = Grid(shape=(96, 96, 96))
+    f = TimeFunction(name='f', grid=grid)
+
+    op = Operator(Eq(f.forward, f + 1.),
+                  dle=('advanced', {'openmp': True, 'par-tunable': True}))
+
+    # The OpenMP schedule is only tuned in aggressive mode
+    op.apply(time=0, autotune=True)
+    assert 'sched_kind' not in op._state['autotuning'][0]['tuned']
+
+    op.apply(time=0, autotune='aggressive')
+    assert op._state['autotuning'][0]['runs'] > 0
+    assert op._state['autotuning'][1]['tuned']['sched_kind'] in [1, 2, 3]
+    assert 'sched_chunk' in op._state['autotuning'][1]['tuned']
+
+
 def test_tti_aggressive():
     from test_dse import TestTTI
     wave_solver = TestTTI().tti_operator(dse='aggressive')
@@ -272,6 +363,23 @@ def test_hierarchical_blocking():
     assert len(op._state['autotuning'][1]['tuned']) == 4
 
 
+def test_temporal_blocking():
+    grid = Grid(shape=(64, 64, 64))
+    u = TimeFunction(name='u', grid=grid, space_order=2)
+
+    op = Operator(Eq(u.forward, u.laplace + 1.),
+                  dle=('advanced', {'openmp': False, 'blocktime': True}))
+    op.apply(time_M=0, autotune=True)
+
+    # The time tiles are tuned along with the space blocks, and never exceed
+    # the timesteps per run
+    assert op._state['autotuning'][0]['runs'] == 10
+    assert op._state['autotuning'][0]['tpr'] == options['squeezer'] + 1
+    tuned = op._state['autotuning'][0]['tuned']
+    assert len(tuned) == 3
+    assert tuned['time0_blk0_size'] in (2, 4)
+
+
 @switchconfig(platform='cpu64-dummy')  # To fix the core count
 def test_multiple_threads():
     """
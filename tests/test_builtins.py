@@ -4,8 +4,9 @@ from scipy.ndimage import gaussian_filter
 from scipy import misc
 
 from conftest import skipif
-from devito import Grid, Function
-from devito.builtins import assign, gaussian_smooth, initialize_function
+from devito import Constant, Grid, Function, Operator, TimeFunction, norm, inner
+from devito.builtins import (BuiltinCache, assign, gaussian_smooth,
+                             initialize_function, _cache)
 from devito.data import LEFT, RIGHT
 from devito.tools import as_tuple
 from devito.types import SubDomain
@@ -221,3 +222,80 @@ class TestInitializeFunction(object):
         else:
             assert np.all(a[::-1, 3:6] - np.array(f.data[12:18, 9:12]) == 0)
             assert np.all(a[3:6, ::-1] - np.array(f.data[9:12, 12:18]) == 0)
+
+
+class TestBuiltinCache(object):
+    """
+    Class for testing the reuse of the Operators built by the builtins
+    """
+
+    def test_lru(self):
+        cache = BuiltinCache(maxsize=2)
+        cache.fetch('a', lambda: 1)
+        cache.fetch('b', lambda: 2)
+        # Hit, so `a` becomes the most recently used
+        assert cache.fetch('a', lambda: 3) == 1
+        cache.fetch('c', lambda: 4)
+        assert list(cache) == ['a', 'c']
+
+    def test_norm_reuse(self):
+        grid = Grid(shape=(4, 4))
+        f = TimeFunction(name='f', grid=grid)
+        g = TimeFunction(name='g', grid=grid)
+        f.data[:] = 1.
+        g.data[:] = 2.
+
+        assert np.isclose(norm(f), np.sqrt(32))
+        ncached = len(_cache)
+
+        # Structurally identical Functions reuse the cached Operator
+        assert np.isclose(norm(g), np.sqrt(128))
+        assert np.isclose(inner(f, g), 64)
+        assert np.isclose(inner(f, g), 64)
+        assert len(_cache) == ncached + 1
+
+        # The cached Operators don't keep any data alive
+        for v in _cache.values():
+            if isinstance(v, tuple) and isinstance(v[0], Operator):
+                assert all(p._data is None for p in v[1])
+
+    def test_assign_reuse(self):
+        grid = Grid(shape=(4, 4))
+        f = Function(name='f', grid=grid)
+        g = Function(name='g', grid=grid)
+
+        assign(f, 1)
+        ncached = len(_cache)
+
+        # A new Function, but structurally identical
+        f1 = Function(name='f', grid=grid)
+        assign(f1, 1)
+        assert len(_cache) == ncached
+        assert np.all(f.data == 1)
+        assert np.all(f1.data == 1)
+
+        assign(g, f + 1)
+        assert np.all(g.data == 2)
+
+        # The Constants are rebound at each call
+        assign(f, Constant(name='c', value=3.))
+        assert np.all(f.data == 3)
+        assign(f, Constant(name='c', value=5.))
+        assert np.all(f.data == 5)
+
+    def test_gaussian_smooth_reuse(self):
+        a = np.arange(64, dtype=np.float32).reshape((8, 8))
+        b = np.arange(64, 0, -1, dtype=np.float32).reshape((8, 8))
+
+        ref_a = gaussian_smooth(a.copy(), sigma=1)
+        ncached = len(_cache)
+
+        # The smoothing Operator is reused, with fresh work Functions
+        ref_b = gaussian_smooth(b.copy(), sigma=1)
+        assert len(_cache) == ncached
+        assert np.all(gaussian_smooth(a.copy(), sigma=1) == ref_a)
+        assert not np.all(ref_a == ref_b)
+
+        for v in _cache.values():
+            if isinstance(v, tuple) and isinstance(v[0], Operator):
+                assert all(p._data is None for p in v[1])
@@ -6,6 +6,7 @@ import numpy as np
 
 from conftest import skipif
 from devito import Grid, TimeFunction, Operator, Function, Eq, switchconfig, Constant
+from devito.checkpointing import Checkpointer, revolve, revolve_cost
 from examples.checkpointing.checkpoint import DevitoCheckpoint, CheckpointOperator
 from examples.seismic.acoustic.acoustic_example import acoustic_setup
 
@@ -245,3 +246,83 @@ def test_index_alignment():
     wrp.apply_reverse()
     assert(np.allclose(v.data[0, :, :], 0))
     assert(np.allclose(prod.data, final_value))
+
+
+@pytest.mark.parametrize('nsnaps', [1, 2, 3, 5])
+def test_revolve_schedule(nsnaps):
+    """
+    Test that the revolve schedule reverses all steps, in order, from the
+    correct forward state, never exceeding the number of snapshots, and at
+    the optimal cost.
+    """
+    def optimal(n, s, cache={}):
+        # Dynamic programming over the position of the first snapshot
+        if (n, s) not in cache:
+            if n == 1:
+                cache[n, s] = 1
+            elif s == 0:
+                cache[n, s] = n*(n + 1)//2
+            else:
+                cache[n, s] = min(j + optimal(n - j, s - 1) + optimal(j, s)
+                                  for j in range(1, n))
+        return cache[n, s]
+
+    for nsteps in range(1, 40):
+        state = 0
+        snaps = []
+        reversed_steps = []
+        cost = 0
+        for action in revolve(nsteps, nsnaps):
+            if action.type == 'advance':
+                assert state == action.start
+                state = action.end
+                cost += action.end - action.start
+            elif action.type == 'takeshot':
+                assert state == action.start
+                snaps.append(action.start)
+                assert len(snaps) <= nsnaps
+            elif action.type == 'restore':
+                assert snaps[-1] == action.start
+                state = action.start
+            elif action.type == 'free':
+                assert snaps.pop() == action.start
+            elif action.type == 'reverse':
+                assert state == action.start
+                state = action.end
+                cost += 1
+                reversed_steps.append(action.start)
+        assert not snaps
+        assert reversed_steps == list(range(nsteps - 1, -1, -1))
+        assert cost == revolve_cost(nsteps, nsnaps)
+        assert cost == optimal(nsteps, min(nsnaps, nsteps) - 1)
+
+
+@pytest.mark.parametrize('nsnaps,disk', [(1, 0), (2, 0), (3, 1), (None, 1)])
+def test_index_alignment_native(nsnaps, disk):
+    """
+    As in ``test_index_alignment``, but with the native Checkpointer, with
+    snapshots held in RAM as well as on disk.
+    """
+    const = Constant(name="constant")
+    grid = Grid(shape=(2, 2))
+    nt = 7
+
+    u = TimeFunction(name='u', grid=grid)
+    v = TimeFunction(name='v', grid=grid)
+    prod = Function(name="prod", grid=grid)
+
+    fwd_op = Operator(Eq(u.forward, u + 1.*const))
+    rev_op = Operator([Eq(v, v.forward - 1.*const), Eq(prod, prod + u * v)])
+
+    snapsize = u._data_allocated[0].nbytes
+    cp = Checkpointer(fwd_op, rev_op, [u], nt, fwd_args={'constant': 1},
+                      rev_args={'constant': 1}, nsnaps=nsnaps, disk=disk*snapsize)
+    assert cp.pool.ndisk == disk
+
+    cp.apply_forward()
+    assert np.allclose(u.data[nt % 2], nt)
+
+    v.data[nt % 2] = nt
+    cp.apply_reverse()
+    assert np.allclose(v.data[0], 0)
+    assert np.allclose(prod.data, sum(n**2 for n in range(nt)))
@@ -1,13 +1,20 @@
+from threading import Barrier, Thread, local
+from types import SimpleNamespace
+
 import pytest
 import numpy as np
 
 from conftest import skipif
 from devito import (Grid, Function, TimeFunction, SparseTimeFunction, Dimension, # noqa
                     Eq, Operator, ALLOC_GUARD, ALLOC_FLAT, configuration, switchconfig)
-from devito.data import LEFT, RIGHT, Decomposition, loc_data_idx, convert_index
+from devito.data import (LEFT, RIGHT, Data, Decomposition, loc_data_idx, convert_index,
+                         box_intersect, box_flip, box_to_idx, mpi_alltoallv,
+                         CompressedStorage, QuantizeCodec, ShuffleCodec)
+from devito.data.data import index_by_index
 from devito.tools import as_tuple
 from devito.types import Scalar
-from devito.data.allocators import ExternalAllocator
+from devito.data.allocators import ExternalAllocator, MmapAllocator
+from devito.data.streaming import MmapStreamer
 
 pytestmark = skipif('ops')
 
@@ -220,7 +227,9 @@ class TestLocDataIDX(object):
     @pytest.mark.parametrize('idx, expected', [
         ('(slice(10, None, -1), slice(11, None, -3))',
          '(slice(0, 11, 1), slice(2, 12, 3))'),
-        ('(2, 5)', '(slice(2, 3, 1), slice(5, 6, 1))')
+        ('(2, 5)', '(slice(2, 3, 1), slice(5, 6, 1))'),
+        ('(slice(6, 0, -4), slice(9, 2, -2))', '(slice(2, 7, 4), slice(3, 10, 2))'),
+        ('(slice(7, None, -2), slice(2, 5, -1))', '(slice(1, 8, 2), slice(0, 0, 1))')
     ])
     def test_loc_data_idx(self, idx, expected):
         """
@@ -234,6 +243,136 @@ class TestLocDataIDX(object):
         assert result == expected
 
 
+class ThreadedComm(object):
+
+    """
+    A stand-in for an MPI communicator, with the MPI ranks emulated by threads.
+    Only the collectives used to redistribute Data are supported.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._barrier = Barrier(size)
+        self._slots = [None]*size
+        self._tls = local()
+
+    def run(self, func):
+        """Run ``func(rank)`` on all ranks, and return the per-rank results."""
+        results = [None]*self.size
+        errors = []
+
+        def target(rank):
+            self._tls.rank = rank
+            try:
+                results[rank] = func(rank)
+            except BaseException as e:
+                errors.append(e)
+                self._barrier.abort()
+
+        threads = [Thread(target=target, args=(i,)) for i in range(self.size)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def Get_rank(self):
+        return self._tls.rank
+
+    def Get_size(self):
+        return self.size
+
+    def allgather(self, obj):
+        self._slots[self.Get_rank()] = obj
+        self._barrier.wait()
+        retval = list(self._slots)
+        self._barrier.wait()
+        return retval
+
+    def Alltoallv(self, sendspec, recvspec):
+        rank = self.Get_rank()
+        recvbuf, (rcount, rdisp) = recvspec
+        for r, (sendbuf, (scount, sdisp)) in enumerate(self.allgather(sendspec)):
+            assert scount[rank] == rcount[r]
+            recvbuf[rdisp[r]:rdisp[r] + rcount[r]] = \
+                sendbuf[sdisp[rank]:sdisp[rank] + scount[rank]]
+        self._barrier.wait()
+
+
+class TestDataRedistribution(object):
+
+    """
+    Test the redistribution of Data across MPI ranks, in serial, through a
+    ThreadedComm.
+    """
+
+    def test_boxes(self):
+        assert box_intersect(((0, 4), (2, 6)), ((4, 8), (0, 3))) is None
+        assert box_intersect(((0, 4), (2, 6)), None) is None
+        assert box_flip(((0, 3), (1, 2)), (5, 4), (True, True)) == ((2, 5), (2, 3))
+        assert box_to_idx(((2, 5), (2, 3)), ((1, 5), (0, 4))) == \
+            (slice(1, 4), slice(2, 3))
+
+    def test_mpi_alltoallv(self):
+        comm = ThreadedComm(3)
+
+        def func(rank):
+            # Rank `r` sends to rank `q` a `(r+1, q+1)` block, except to itself
+            sendblocks = [None if q == rank else np.full((rank+1, q+1), 10*rank+q)
+                          for q in range(comm.size)]
+            recvshapes = [None if r == rank else (r+1, rank+1)
+                          for r in range(comm.size)]
+            return mpi_alltoallv(comm, sendblocks, recvshapes, np.int32)
+
+        for rank, values in enumerate(comm.run(func)):
+            for r, v in enumerate(values):
+                if r == rank:
+                    assert v is None
+                else:
+                    assert v.dtype == np.int32
+                    assert np.all(v == np.full((r+1, rank+1), 10*r+rank))
+
+    @pytest.mark.parametrize('items0, items1', [
+        ([range(3), range(3, 8)], [range(4), range(4, 8)]),
+        ([range(8), range(8, 8)], [range(1), range(1, 8)]),
+    ])
+    @pytest.mark.parametrize('idx', [
+        np.s_[::-1, ::-1], np.s_[::-2, 6:0:-1], np.s_[7:0:-3, 1:7:2], np.s_[5:6, ::-2]
+    ])
+    def test_getitem(self, items0, items1, idx):
+        """
+        Test that a view with negative steps of a Data distributed over a 2x2
+        topology is the same as that of the corresponding replicated array.
+        """
+        a = np.arange(64, dtype=np.float32).reshape(8, 8)
+        coords = [(0, 0), (0, 1), (1, 0), (1, 1)]
+        comm = ThreadedComm(len(coords))
+
+        def block(decomposition):
+            # The block of the global array held by this rank
+            return tuple(slice(0, 0) if i.loc_empty else
+                         slice(i.loc_abs_min, i.loc_abs_max + 1) for i in decomposition)
+
+        def func(rank):
+            decomposition = (Decomposition(items0, coords[rank][0]),
+                             Decomposition(items1, coords[rank][1]))
+            local = a[block(decomposition)]
+            data = Data(local.shape, np.float32, decomposition=decomposition,
+                        modulo=(False, False), distributor=SimpleNamespace(comm=comm))
+            data._local[:] = local
+
+            view = Data.__getitem__.__wrapped__(data, idx, index_by_index)
+            return np.array(view._local), a[idx][block(view._decomposition)]
+
+        sizes = 0
+        for result, expected in comm.run(func):
+            assert np.all(result == expected)
+            sizes += result.size
+        assert sizes == a[idx].size
+
+
 class TestMetaData(object):
 
     """
@@ -459,6 +598,46 @@ class TestDecomposition(object):
         assert d.reshape((1, 3, 10, 11, 14)) == Decomposition([[0], [1], [], [2, 3]], 2)
 
 
+class TestCompression(object):
+
+    @pytest.mark.parametrize('compressor', ['zlib', 'bz2', 'lzma'])
+    @pytest.mark.parametrize('dtype', [np.float32, np.float64])
+    def test_shuffle_lossless(self, compressor, dtype):
+        codec = ShuffleCodec(compressor)
+        array = np.sin(np.linspace(0, 10, 1200, dtype=dtype)).reshape(30, 40)
+
+        decoded = codec.decode(codec.encode(array), array.shape, array.dtype)
+        assert decoded.dtype == dtype
+        assert np.all(decoded == array)
+
+    @pytest.mark.parametrize('tolerance', [1e-1, 1e-3, 1e-6])
+    def test_quantize_error_bound(self, tolerance):
+        codec = QuantizeCodec(tolerance)
+        array = np.sin(np.linspace(0, 10, 1200)).reshape(30, 40)
+
+        decoded = codec.decode(codec.encode(array), array.shape, array.dtype)
+        assert np.all(np.abs(decoded - array) <= tolerance)
+
+    def test_unknown_compressor(self):
+        with pytest.raises(ValueError):
+            ShuffleCodec('foo')
+
+    def test_storage(self):
+        storage = CompressedStorage((30, 40), np.float32, QuantizeCodec(1e-3))
+        for i in range(4):
+            storage[i] = np.full((30, 40), i, dtype=np.float32)
+
+        assert len(storage) == 4
+        assert storage.times == (0, 1, 2, 3)
+        assert np.all(storage[2] == 2.)
+        assert storage.nbytes < storage.nbytes_uncompressed
+        assert storage.ratio > 1
+        assert storage.timings['encode'] > 0
+
+        with pytest.raises(ValueError):
+            storage[4] = np.zeros((3, 4), dtype=np.float32)
+
+
 @skipif(['yask', 'nompi'])
 class TestDataDistributed(object):
 
@@ -723,6 +902,50 @@ class TestDataDistributed(object):
         else:
             assert np.all(r3 == [[0]])
 
+    @pytest.mark.parallel(mode=4)
+    @pytest.mark.parametrize('idx', [
+        np.s_[7:0:-2, 6:1:-2], np.s_[::-2, 1::2], np.s_[6::-4, ::-1], np.s_[3:4:-2, :]
+    ])
+    def test_neg_steps(self, idx):
+        # Negative steps other than -1, possibly with an explicit stop
+        grid = Grid(shape=(8, 8))
+        f = Function(name='f', grid=grid, space_order=0, dtype=np.int32)
+        a = np.arange(64, dtype=np.int32).reshape(grid.shape)
+        f.data[:] = a
+
+        result = f.data[idx]
+
+        # Each rank holds a block of the global view, as given by its decomposition
+        block = tuple(slice(0, 0) if i.loc_empty else
+                      slice(i.loc_abs_min, i.loc_abs_max + 1)
+                      for i in result._decomposition)
+        assert np.all(np.array(result) == a[idx][block])
+        assert grid.distributor.comm.allreduce(result.size) == a[idx].size
+
+    @pytest.mark.parallel(mode=4)
+    @pytest.mark.parametrize('idx0, idx1', [
+        (np.s_[2:10, 2:10], np.s_[::-1, ::-1]),
+        (np.s_[10:2:-2, 1:9:2], np.s_[::2, 1::2]),
+        (np.s_[3, 4:12], np.s_[6, :]),
+        (np.s_[9:1:-2, 1:9:2], np.s_[6::-2, ::-2]),
+    ])
+    def test_setitem_distributed(self, idx0, idx1):
+        # Assignment from a distributed Data over a different decomposition
+        grid0 = Grid(shape=(12, 12))
+        g = Function(name='g', grid=grid0, space_order=0, dtype=np.int32)
+        grid1 = Grid(shape=(8, 8))
+        f = Function(name='f', grid=grid1, space_order=0, dtype=np.int32)
+        a = np.arange(64, dtype=np.int32).reshape(grid1.shape)
+        f.data[:] = a
+
+        g.data[idx0] = f.data[idx1]
+
+        expected = np.zeros(grid0.shape, dtype=np.int32)
+        expected[idx0] = a[idx1]
+        block = tuple(slice(i.loc_abs_min, i.loc_abs_max + 1)
+                      for i in g.data._decomposition)
+        assert np.all(np.array(g.data) == expected[block])
+
     @pytest.mark.parallel(mode=4)
     def test_setitem(self):
         # __setitem__ mpi slicing tests
@@ -1321,6 +1544,32 @@ def test_external_allocator():
     assert(np.array_equal(f.data, numpy_array))
 
 
+@skipif(['yask', 'ops'])
+def test_mmap_allocator(tmpdir):
+    grid = Grid(shape=(40, 40))
+    nt = 10
+    u = TimeFunction(name='u', grid=grid, save=nt, space_order=2,
+                     allocator=MmapAllocator(str(tmpdir)))
+    assert np.all(u.data == 0)
+
+    # The backing file is unlinked straight away
+    assert not tmpdir.listdir()
+
+    op = Operator(Eq(u.forward, u + 1))
+
+    streamer = MmapStreamer(u, lookahead=2)
+    op.prepare(time_m=0, time_M=nt-2).stepwise(streamer.advance)
+    streamer.wait()
+    assert streamer.nwritten == nt - 2
+    assert streamer.nprefetched == nt - 1
+
+    # The slices written back, and dropped from RAM, are read back from disk
+    for i in range(nt - 1, -1, -1):
+        streamer.advance(i, direction=-1)
+        assert np.all(u.data[i] == i)
+    streamer.close()
+
+
 if __name__ == "__main__":
     configuration['mpi'] = True
     TestDataDistributed().test_misc_data()
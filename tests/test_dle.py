@@ -262,6 +262,82 @@ def test_cache_blocking_unsupported():
     assert len(trees) == 2
 
 
+class TestTemporalBlocking(object):
+
+    def _run(self, shape, dle, space_order=4, **kwargs):
+        grid = Grid(shape=shape)
+        u = TimeFunction(name='u', grid=grid, time_order=2, space_order=space_order)
+        m = Function(name='m', grid=grid)
+        src = SparseTimeFunction(name='src', grid=grid, npoint=3, nt=20)
+        rec = SparseTimeFunction(name='rec', grid=grid, npoint=4, nt=20)
+
+        m.data[:] = 1.
+        src.data[:] = np.linspace(-1., 1., src.data.size).reshape(src.data.shape)
+        for i in range(grid.dim):
+            src.coordinates.data[:, i] = np.linspace(0.1, 0.9, 3)
+            rec.coordinates.data[:, i] = np.linspace(0.05, 0.95, 4)
+
+        h = grid.spacing_symbols[0]
+        eqns = [Eq(u.forward, 2*u - u.backward + 0.1*h**2*u.laplace/m)]
+        eqns += src.inject(field=u.forward, expr=src)
+        eqns += rec.interpolate(expr=u.forward)
+
+        op = Operator(eqns, dle=dle)
+        op.apply(time_M=18, **kwargs)
+
+        return op, u, rec
+
+    @pytest.mark.parametrize('shape,blockshape', [
+        ((31, 33), (1, 8)),
+        ((31, 33), (4, 5)),
+        ((31, 33), (7, 31)),
+        ((15, 17, 19), (3, 4)),
+        ((15, 17, 19), (18, 8)),
+    ])
+    def test_basic(self, shape, blockshape):
+        _, u0, rec0 = self._run(shape, 'noop')
+        op, u1, rec1 = self._run(shape, ('advanced', {'blocktime': True}),
+                                 time0_blk0_size=blockshape[0],
+                                 x0_blk0_size=blockshape[1])
+
+        # The time loop is tiled, and so is the outermost space loop
+        trees = [i for i in retrieve_iteration_tree(op) if i[0].dim.is_Time]
+        assert trees[-1][0].dim.name == 'time0_blk0'
+        assert trees[-1][1].dim.name == 'x0_blk0'
+
+        assert np.equal(u0.data, u1.data).all()
+        # The interpolation sums may be reassociated by the compiler
+        assert np.allclose(rec0.data, rec1.data, atol=1e-6)
+
+    @pytest.mark.parametrize('dle', [
+        ('advanced', {'blocktime': True, 'blockinner': True, 'openmp': True}),
+        (('tblocking', 'blocking'), {'blocktime': True})
+    ])
+    def test_variants(self, dle):
+        _, u0, rec0 = self._run((15, 17, 19), 'noop')
+        _, u1, rec1 = self._run((15, 17, 19), dle, time0_blk0_size=3)
+
+        assert np.equal(u0.data, u1.data).all()
+        assert np.allclose(rec0.data, rec1.data, atol=1e-6)
+
+    def test_unsupported(self):
+        """
+        Test that a time loop with intra-timestep dependences across distinct
+        loop nests isn't temporally blocked.
+        """
+        grid = Grid(shape=(4, 4, 4))
+
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+        v = TimeFunction(name='v', grid=grid, space_order=2)
+
+        eqns = [Eq(u.forward, v.laplace),
+                Eq(v.forward, u.forward.dx)]
+
+        op = Operator(eqns, dle=('advanced', {'blocktime': True}))
+
+        assert 'time0_blk0' not in [d.name for d in op.dimensions]
+
+
 class TestNodeParallelism(object):
 
     @pytest.mark.parametrize('exprs,expected', [
@@ -481,6 +557,35 @@ class TestNestedParallelism(object):
                                                   'schedule(dynamic,1) '
                                                   'num_threads(nthreads_nested)')
 
+    @patch("devito.passes.iet.openmp.Ompizer.COLLAPSE_NCORES", 1)
+    @patch("devito.passes.iet.openmp.Ompizer.COLLAPSE_WORK", 0)
+    def test_tunable(self):
+        grid = Grid(shape=(3, 3, 3))
+
+        u = TimeFunction(name='u', grid=grid)
+
+        op = Operator(Eq(u.forward, u + 1),
+                      dle=('advanced', {'openmp': True, 'par-tunable': True,
+                                        'par-collapse': 1}))
+
+        # Does it produce the right result, regardless of the schedule
+        op.apply(t_M=9)
+        assert np.all(u.data[0] == 10)
+        u.data[:] = 0.
+        op.apply(t_M=9, sched_kind=1, sched_chunk=0, nthreads_nested=1)
+        assert np.all(u.data[0] == 10)
+
+        # The schedule is a runtime argument; nested parallelism is always
+        # introduced, but its degree is a runtime argument too
+        assert op.arguments(t_M=9)['sched_kind'] == 2
+        assert op.arguments(t_M=9)['sched_chunk'] == 1
+        iterations = FindNodes(Iteration).visit(op._func_table['bf0'])
+        assert iterations[0].pragmas[0].value == 'omp for collapse(1) schedule(runtime)'
+        assert iterations[2].pragmas[0].value == ('omp parallel for collapse(1) '
+                                                  'schedule(runtime) '
+                                                  'num_threads(nthreads_nested)')
+        assert 'omp_set_schedule(sched_kind,sched_chunk)' in str(op)
+
     @patch("devito.passes.clusters.aliases.MIN_COST_ALIAS", 1)
     @patch("devito.passes.iet.openmp.Ompizer.NESTED", 0)
     @patch("devito.passes.iet.openmp.Ompizer.COLLAPSE_NCORES", 10000)
@@ -4,6 +4,7 @@ from numpy import linalg
 
 from conftest import skipif
 from devito import Function, info
+from devito.data import QuantizeCodec, ShuffleCodec
 from examples.seismic.acoustic.acoustic_example import smooth, acoustic_setup as setup
 from examples.seismic import Receiver
 
@@ -54,6 +55,56 @@ class TestGradient(object):
         gradient2, _ = wave.gradient(residual, u0, vp=v0, checkpointing=False)
         assert np.allclose(gradient.data, gradient2.data)
 
+    @pytest.mark.parametrize('codec', [ShuffleCodec(), QuantizeCodec(1e-6)])
+    def test_gradient_compression(self, codec, shape=(70, 80), space_order=4):
+        """
+        This test ensures that the FWI gradient computed out of a compressed
+        forward wavefield matches the one computed out of the full wavefield,
+        exactly (up to the summation order) if the codec is lossless.
+        """
+        spacing = tuple(10. for _ in shape)
+        wave = setup(shape=shape, spacing=spacing, kernel='OT2',
+                     space_order=space_order, nbl=40)
+
+        rec, u, _ = wave.forward(save=True)
+        rec1, u1, _ = wave.forward(save=True, compression=codec)
+        assert np.allclose(rec.data, rec1.data)
+        assert u1.ratio > 1
+        for i in u1.times:
+            if codec.lossless:
+                assert np.all(u1[i] == u._data[i])
+            else:
+                # Up to floating-point rounding
+                bound = codec.tolerance + np.spacing(np.abs(u._data[i]))
+                assert np.all(np.abs(u1[i] - u._data[i]) <= bound)
+
+        gradient, _ = wave.gradient(rec, u)
+        gradient1, _ = wave.gradient(rec, u1)
+        rtol = 1e-5 if codec.lossless else 1e-3
+        assert np.allclose(gradient.data, gradient1.data, rtol=rtol,
+                           atol=rtol*np.abs(gradient.data).max())
+
+    def test_gradient_outofcore(self, tmpdir, shape=(70, 80), space_order=4):
+        """
+        This test ensures that the FWI gradient computed out of a forward
+        wavefield backed by a memory-mapped file matches the one computed out
+        of the in-memory wavefield.
+        """
+        spacing = tuple(10. for _ in shape)
+        wave = setup(shape=shape, spacing=spacing, kernel='OT2',
+                     space_order=space_order, nbl=40)
+
+        rec, u, _ = wave.forward(save=True)
+        rec1, u1, _ = wave.forward(save=True, out_of_core=str(tmpdir))
+        assert u1._allocator.is_Mmap
+        assert np.allclose(rec.data, rec1.data)
+        assert np.allclose(u.data, u1.data)
+
+        gradient, _ = wave.gradient(rec, u)
+        gradient1, _ = wave.gradient(rec, u1)
+        assert np.allclose(gradient.data, gradient1.data, rtol=1e-5,
+                           atol=1e-5*np.abs(gradient.data).max())
+
     @pytest.mark.parametrize('space_order', [4])
     @pytest.mark.parametrize('kernel', ['OT2'])
     @pytest.mark.parametrize('shape', [(70, 80)])
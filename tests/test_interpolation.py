@@ -5,7 +5,7 @@ import pytest
 
 from conftest import skipif
 from devito import (Grid, Operator, Dimension, SparseFunction, SparseTimeFunction,
-                    Function, TimeFunction,
+                    Function, TimeFunction, Eq, Stream, inner, norm, switchconfig,
                     PrecomputedSparseFunction, PrecomputedSparseTimeFunction)
 from devito.symbolics import FLOAT
 from examples.seismic import (demo_model, TimeAxis, RickerSource, Receiver,
@@ -170,6 +170,196 @@ def test_precomputed_interpolation_time():
         assert np.allclose(sf.data[it, :], it)
 
 
+@pytest.mark.parametrize('shape', [(11, 11), (11, 13, 9)])
+def test_precompute_interpolation(shape):
+    """
+    Test that precomputing the interpolation indices and weights doesn't change
+    the outcome of interpolation and injection, also after the coordinates
+    have changed.
+    """
+    grid = Grid(shape=shape, extent=tuple(i - 1. for i in shape),
+                origin=tuple(.5 for _ in shape))
+
+    rng = np.random.RandomState(0)
+    coords = rng.uniform(.5, min(shape) - .5, size=(10, len(shape)))
+    data = rng.rand(*((2,) + shape))
+
+    results = []
+    for precompute in [False, True]:
+        u = TimeFunction(name='u', grid=grid)
+        u.data[:] = data
+        rec = SparseTimeFunction(name='rec', grid=grid, npoint=10, nt=3,
+                                 coordinates=coords, precompute=precompute)
+        src = SparseTimeFunction(name='src', grid=grid, npoint=10, nt=3,
+                                 coordinates=coords[::-1], precompute=precompute)
+        src.data[:] = 1.
+
+        op = Operator(src.inject(field=u.forward, expr=src) + rec.interpolate(u))
+        assert ('floor' in str(op)) is not precompute
+
+        op.apply(time_M=1)
+        results.append((rec.data.copy(), u.data.copy()))
+
+        rec.coordinates.data[:] = coords[::-1]
+        src.coordinates.data[:] = coords
+        u.data[:] = data
+        op.apply(time_M=1)
+        results.append((rec.data.copy(), u.data.copy()))
+
+    for (rec0, u0), (rec1, u1) in zip(results[:2], results[2:]):
+        assert np.allclose(rec0, rec1, rtol=1e-5)
+        assert np.allclose(u0, u1, rtol=1e-5)
+    assert not np.allclose(results[0][0], results[1][0])
+
+
+def test_precompute_alias():
+    """
+    Test that an Operator using precomputed interpolation indices and weights,
+    hence not the coordinates, may be run on another SparseTimeFunction, and
+    that the builtins may be used on such SparseTimeFunctions.
+    """
+    grid = Grid(shape=(11, 11), extent=(10., 10.))
+
+    u = TimeFunction(name='u', grid=grid)
+    u.data[:] = np.arange(11)[:, None]
+
+    coords = [(2.5, 4.), (7.25, 6.)]
+    rec = SparseTimeFunction(name='rec', grid=grid, npoint=2, nt=3,
+                             coordinates=coords, precompute=True)
+    rec2 = SparseTimeFunction(name='rec2', grid=grid, npoint=2, nt=3,
+                              coordinates=coords[::-1], precompute=True)
+
+    op = Operator(rec.interpolate(u))
+    op.apply(time_M=1)
+    op.apply(time_M=1, rec=rec2)
+
+    assert np.allclose(rec.data[:2], [2.5, 7.25])
+    assert np.allclose(rec2.data[:2], [7.25, 2.5])
+    assert np.isclose(norm(rec), np.sqrt(2*(2.5**2 + 7.25**2)), rtol=1e-5)
+    assert np.isclose(inner(rec, rec), 2*(2.5**2 + 7.25**2), rtol=1e-5)
+
+
+@pytest.mark.parametrize('shape', [(21, 21), (21, 19, 17)])
+@switchconfig(openmp=True)
+def test_binned_injection(shape, monkeypatch):
+    """
+    Test that injecting binned sparse points, without atomic updates, gives
+    the same outcome as the atomic injection, also after the coordinates
+    have changed.
+    """
+    # Enough bins to keep all threads busy
+    monkeypatch.setenv('OMP_NUM_THREADS', '2')
+
+    grid = Grid(shape=shape, extent=tuple(i - 1. for i in shape))
+
+    rng = np.random.RandomState(0)
+    coords = rng.uniform(0., min(shape) - 1., size=(400, len(shape)))
+    data = rng.rand(3, 400)
+
+    results = []
+    for binning in [False, True]:
+        u = TimeFunction(name='u', grid=grid)
+        src = SparseTimeFunction(name='src', grid=grid, npoint=400, nt=3,
+                                 coordinates=coords, binning=binning)
+        src.data[:] = data
+
+        op = Operator(src.inject(field=u.forward, expr=src))
+        assert ('bin_perm' in str(op)) is binning
+
+        op.apply(time_M=1)
+        results.append(u.data.copy())
+
+        src.coordinates.data[:] = coords[::-1]
+        u.data[:] = 0.
+        op.apply(time_M=1)
+        results.append(u.data.copy())
+
+        if binning:
+            # The bins have actually been used, and they're consistent
+            colors = src._bin_colors.data
+            assert colors[-1] > 0
+            assert np.all(np.diff(colors) >= 0)
+            assert src._bin_ptr.data[colors[-1]] == 400
+            assert np.all(np.sort(src._bin_perm.data) == np.arange(400))
+
+    for u0, u1 in zip(results[:2], results[2:]):
+        assert np.allclose(u0, u1, rtol=1e-5)
+
+
+@pytest.mark.parametrize('interpolation, r, tol', [
+    ('linear', None, 5e-3),
+    ('lagrange', 1, 5e-3),
+    ('lagrange', 2, 1e-4),
+    ('lagrange', 3, 1e-6),
+    ('sinc', 4, 2e-3),
+])
+def test_interpolation_schemes(interpolation, r, tol):
+    """
+    Test the accuracy of the interpolation schemes, and that injection is the
+    adjoint of interpolation, also for points near the boundary.
+    """
+    grid = Grid(shape=(41, 41), extent=(1., 1.))
+    f = Function(name='f', grid=grid, space_order=4)
+    xx, yy = np.meshgrid(*[np.linspace(0., 1., 41)]*2, indexing='ij')
+    f.data[:] = np.sin(2*np.pi*xx)*np.cos(3*np.pi*yy)
+
+    rng = np.random.RandomState(0)
+    coords = rng.uniform(.05, .95, size=(20, 2))
+    coords[:2] = [(.001, .5), (.999, .999)]
+    exact = np.sin(2*np.pi*coords[:, 0])*np.cos(3*np.pi*coords[:, 1])
+
+    sf = SparseFunction(name='sf', grid=grid, npoint=20, coordinates=coords,
+                        interpolation=interpolation, r=r)
+    Operator(sf.interpolate(f)).apply()
+    assert np.allclose(sf.data[2:], exact[2:], atol=tol)
+
+    # Dot-product test
+    g = Function(name='g', grid=grid, space_order=4)
+    d = rng.rand(20).astype(np.float32)
+    sf.data[:] = d
+    Operator(sf.inject(field=g, expr=sf)).apply()
+    sf.data[:] = 0.
+    Operator(sf.interpolate(f)).apply()
+    assert np.isclose(np.dot(sf.data, d), np.sum(f.data*g.data), rtol=1e-5)
+
+
+@pytest.mark.parametrize('chunk', [1, 7, 64])
+def test_streamed_receivers(chunk, tmpdir):
+    """
+    Test that streaming the receivers to disk, in chunks of timesteps, gives
+    the same traces as keeping them in memory.
+    """
+    grid = Grid(shape=(21, 21), extent=(1., 1.))
+    nt = 40
+
+    coords = np.random.RandomState(0).uniform(0., 1., size=(7, 2))
+    path = str(tmpdir.join('rec.bin'))
+
+    traces = []
+    for stream in [None, Stream(path, chunk=chunk)]:
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+        u.data[0, 10, 10] = 1.
+        src = SparseTimeFunction(name='src', grid=grid, npoint=1, nt=nt,
+                                 coordinates=[(.3, .6)])
+        src.data[:] = 1.
+        rec = SparseTimeFunction(name='rec', grid=grid, npoint=7, nt=nt,
+                                 coordinates=coords, stream=stream)
+        assert rec.nt == nt
+        assert rec.data.shape[0] == min(nt, chunk if stream else nt)
+
+        eqns = [Eq(u.forward, u + 1e-4*u.laplace)]
+        eqns += src.inject(field=u.forward, expr=src)
+        eqns += rec.interpolate(u)
+        Operator(eqns).apply(time_M=nt - 2)
+
+        if stream is None:
+            traces.append(rec.data[:nt - 1])
+        else:
+            traces.append(np.fromfile(path, dtype=np.float32).reshape(nt - 1, 7))
+
+    assert np.allclose(traces[0], traces[1], rtol=1e-6)
+
+
 @pytest.mark.parametrize('shape, coords', [
     ((11, 11), [(.05, .9), (.01, .8)]),
     ((11, 11, 11), [(.05, .9), (.01, .8), (0.07, 0.84)])
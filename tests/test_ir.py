@@ -709,6 +709,36 @@ class TestDependenceAnalysis(object):
         # Sanity check: we did find all of the expected dependences
         assert len(expected) == 0
 
+    @pytest.mark.parametrize('exprs', [
+        ['Eq(ti0[x,y,z], ti1[x,y,z])',
+         'Eq(ti1[x,y,z], ti0[x,y,z])'],
+        ['Eq(ti0[x,y,z], ti0[x,y,z])',
+         'Eq(ti1[x,y,z], ti0[x,y-1,z] + ti0[x,y-1,z])',
+         'Eq(ti3[x,y,z], ti0[x-2,y,z])'],
+        ['Eq(ti3[x+1,y,z], ti1[x,y,z])',
+         'Eq(ti3[x+1,y,z], ti3[x,y,z])',
+         'Eq(ti0[x,y,z], ti3[fa[x],y,z])'],
+    ])
+    def test_merge(self, exprs, ti0, ti1, ti3, fa):
+        """
+        Tests that merging the Scopes of subsequences of equations yields the
+        same dependences as the Scope of the whole sequence.
+        """
+        exprs = [LoweredEq(i) for i in EVAL(exprs, ti0.base, ti1.base, ti3.base, fa)]
+
+        scope = Scope(exprs)
+        merged = Scope.merge(*[Scope(i) for i in exprs])
+
+        assert merged.exprs == scope.exprs
+        for i in range(len(exprs)):
+            assert merged.a_query(i) == scope.a_query(i)
+        for i in ['flow', 'anti', 'output']:
+            deps = getattr(scope, 'd_%s' % i)
+            mdeps = getattr(merged, 'd_%s' % i)
+            assert mdeps == deps
+            assert ({(d.source.timestamp, d.sink.timestamp, d.distance) for d in mdeps}
+                    == {(d.source.timestamp, d.sink.timestamp, d.distance) for d in deps})
+
 
 class TestIETConstruction(object):
 
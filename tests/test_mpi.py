@@ -6,11 +6,12 @@ from cached_property import cached_property
 from conftest import skipif
 from devito import (Grid, Constant, Function, TimeFunction, SparseFunction,
                     SparseTimeFunction, Dimension, ConditionalDimension, SubDimension,
-                    Eq, Inc, NODE, Operator, norm, inner, configuration, switchconfig,
-                    generic_derivative)
+                    Eq, Inc, NODE, Operator, Stream, norm, inner, configuration,
+                    switchconfig, generic_derivative)
 from devito.data import LEFT, RIGHT
 from devito.ir.iet import Call, Conditional, Iteration, FindNodes, retrieve_iteration_tree
 from devito.mpi import MPI
+from devito.mpi.distributed import compute_dims
 from examples.seismic.acoustic import acoustic_setup
 
 pytestmark = skipif(['yask', 'ops', 'nompi'], whole_module=True)
@@ -48,6 +49,34 @@ class TestDistributor(object):
         }
         assert f.shape == expected[distributor.nprocs][distributor.myrank]
 
+    @pytest.mark.parallel(mode=[4])
+    def test_partitioning_custom(self):
+        grid = Grid(shape=(10, 12), topology=((3, 7), 2))
+        f = Function(name='f', grid=grid)
+
+        distributor = grid.distributor
+        assert distributor.topology == (2, 2)
+        expected = [(3, 6), (3, 6), (7, 6), (7, 6)]
+        assert f.shape == expected[distributor.myrank]
+
+    @pytest.mark.parallel(mode=[4])
+    def test_partitioning_custom_invalid(self):
+        with pytest.raises(ValueError):
+            Grid(shape=(10, 12), topology=(2, 1))
+        with pytest.raises(ValueError):
+            Grid(shape=(10, 12), topology=((3, 6), 2))
+
+    @pytest.mark.parametrize('nprocs,shape,nodes,expected', [
+        (4, (15, 15), None, (2, 2)),
+        (9, (9, 9), None, (3, 3)),
+        (8, (1000, 1000, 400), None, (4, 2, 1)),
+        (6, (2, 100), None, (1, 6)),
+        (16, (1000, 1000, 400), None, (4, 4, 1)),
+        (16, (1000, 1000, 400), [i // 4 for i in range(16)], (2, 4, 2)),
+    ])
+    def test_compute_dims(self, nprocs, shape, nodes, expected):
+        assert compute_dims(nprocs, len(shape), shape, nodes) == expected
+
     @pytest.mark.parallel(mode=9)
     def test_neighborhood_horizontal_2d(self):
         grid = Grid(shape=(3, 3))
@@ -356,6 +385,15 @@ class TestSparseFunction(object):
         expected = np.array(expected[grid.distributor.myrank])
         assert np.all(sf.data == expected)
 
+    @pytest.mark.parallel(mode=2)
+    def test_no_stream(self):
+        """Test that streaming a SparseTimeFunction is rejected with MPI."""
+        grid = Grid(shape=(4, 4))
+
+        with pytest.raises(ValueError):
+            SparseTimeFunction(name='rec', grid=grid, npoint=2, nt=10,
+                               stream=Stream('rec.bin', chunk=4))
+
     @pytest.mark.parallel(mode=4)
     def test_scatter_gather(self):
         """
@@ -404,6 +442,33 @@ class TestSparseFunction(object):
         assert len(sf.data) == 1
         assert np.all(sf.data == data[sf.local_indices]*2)
 
+    @pytest.mark.parallel(mode=4)
+    def test_scatter_gather_plan(self):
+        """
+        Test that the communication plan of a SparseFunction is reused across
+        scatters/gathers, unless the coordinates change.
+        """
+        grid = Grid(shape=(4, 4), extent=(4.0, 4.0))
+
+        coords = np.array([(3., 3.), (3., 1.), (1., 3.), (1., 1.)])
+        sf = SparseFunction(name='sf', grid=grid, npoint=len(coords), coordinates=coords)
+        sf.data[:] = np.array([3, 2, 1, 0])
+
+        plan = sf._dist_plan
+        loc_coords = sf._dist_scatter()[sf.coordinates]
+        sf._dist_gather(sf._dist_scatter()[sf], loc_coords)
+        assert sf._dist_plan is plan
+
+        # Now each MPI rank owns, both physically and logically, one point
+        sf.coordinates.data[:] = coords[::-1]
+        assert sf._dist_plan is not plan
+        # The outdated plan has been explicitly released
+        assert plan.graph is None
+        loc_data = sf._dist_scatter()[sf]
+        assert len(loc_data) == 1
+        sf._dist_gather(loc_data*2, sf._dist_scatter()[sf.coordinates])
+        assert np.all(sf.data == loc_data*2)
+
     @pytest.mark.parallel(mode=4)
     def test_sparse_coords(self):
         grid = Grid(shape=(21, 31, 21), extent=(20, 30, 20))
@@ -452,6 +517,25 @@ class TestOperatorSimple(object):
         else:
             assert np.all(f.data_ro_domain[0] == 7.)
 
+    @pytest.mark.parallel(mode=[2, 4])
+    @pytest.mark.parametrize('mode', ['comm', 'node'])
+    def test_jit_broadcast(self, mode):
+        grid = Grid(shape=(32,))
+        x = grid.dimensions[0]
+        t = grid.stepping_dim
+
+        f = TimeFunction(name='f', grid=grid)
+        f.data_with_halo[:] = 1.
+
+        @switchconfig(jit_broadcast=mode)
+        def build_and_run():
+            op = Operator(Eq(f.forward, f[t, x-1] + f[t, x+1] + 1))
+            assert op._jit_comm() is not None
+            op.apply(time=1)
+        build_and_run()
+
+        assert np.all(f.data_ro_domain[1] == 3.)
+
     @pytest.mark.parallel(mode=[2])
     def test_trivial_eq_1d_asymmetric(self):
         grid = Grid(shape=(32,))
@@ -493,7 +577,7 @@ class TestOperatorSimple(object):
             assert np.all(f.data_ro_domain[-1, :-time_M] == 31.)
 
     @pytest.mark.parallel(mode=[(4, 'basic'), (4, 'diag'), (4, 'overlap'),
-                                (4, 'overlap2'), (4, 'full')])
+                                (4, 'overlap2'), (4, 'full'), (4, 'persistent')])
     def test_trivial_eq_2d(self):
         grid = Grid(shape=(8, 8,))
         x, y = grid.dimensions
@@ -529,7 +613,7 @@ class TestOperatorSimple(object):
             assert np.all(f.data_ro_domain[0, -1:, :-1] == side)
 
     @pytest.mark.parallel(mode=[(8, 'basic'), (8, 'diag'), (8, 'overlap'),
-                                (8, 'overlap2'), (8, 'full')])
+                                (8, 'overlap2'), (8, 'full'), (8, 'persistent')])
     def test_trivial_eq_3d(self):
         grid = Grid(shape=(8, 8, 8))
         x, y, z = grid.dimensions
@@ -570,7 +654,7 @@ class TestOperatorSimple(object):
         # 4) interior
         assert np.all(f.data_ro_domain[0, 1:-1, 1:-1, 1:-1] == interior)
 
-    @pytest.mark.parallel(mode=[(4, 'basic'), (4, 'diag')])
+    @pytest.mark.parallel(mode=[(4, 'basic'), (4, 'diag'), (4, 'persistent')])
     def test_multiple_eqs_funcs(self):
         grid = Grid(shape=(12,))
         x = grid.dimensions[0]
@@ -1085,6 +1169,102 @@ class TestOperatorAdvanced(object):
 
         assert np.all(sf.data == [1.5, 2.5, 2.5, 3.5][grid.distributor.myrank])
 
+    @pytest.mark.parallel(mode=4)
+    @pytest.mark.parametrize('opt', ['precompute', 'binning'])
+    def test_sparse_precomputed_data(self, opt):
+        """
+        Test that the data derived from the coordinates upon scattering the
+        sparse points, that is the precomputed interpolation indices and weights
+        or the sparse point bins, doesn't change the outcome of injection and
+        interpolation, also after the coordinates have changed.
+        """
+        shape = (16, 16)
+        grid = Grid(shape=shape, extent=(15., 15.))
+
+        rng = np.random.RandomState(0)
+        coords = rng.uniform(0., 15., size=(20, 2))
+        data = rng.rand(*((2,) + shape))
+
+        results = []
+        for enabled in [False, True]:
+            u = TimeFunction(name='u', grid=grid)
+            u.data[:] = data
+            rec = SparseTimeFunction(name='rec', grid=grid, npoint=20, nt=3,
+                                     coordinates=coords, **{opt: enabled})
+            src = SparseTimeFunction(name='src', grid=grid, npoint=20, nt=3,
+                                     coordinates=coords[::-1], **{opt: enabled})
+            src.data[:] = 1.
+
+            op0 = Operator(src.inject(field=u.forward, expr=src),
+                           dle=('advanced', {'openmp': True}))
+            op1 = Operator(rec.interpolate(u), dle=('advanced', {'openmp': True}))
+
+            op0.apply(time_M=1)
+            op1.apply(time_M=1)
+            results.append((np.array(rec.data), np.array(u.data)))
+
+            rec.coordinates.data[:] = coords[::-1]
+            src.coordinates.data[:] = coords
+            u.data[:] = data
+            op0.apply(time_M=1)
+            op1.apply(time_M=1)
+            results.append((np.array(rec.data), np.array(u.data)))
+
+        for (rec0, u0), (rec1, u1) in zip(results[:2], results[2:]):
+            assert np.allclose(rec0, rec1, rtol=1e-5)
+            assert np.allclose(u0, u1, rtol=1e-5)
+
+    @pytest.mark.parallel(mode=4)
+    @pytest.mark.parametrize('interpolation,r,so', [
+        ('lagrange', 2, 2),
+        ('sinc', 2, 2),
+        ('sinc', 4, 8)
+    ])
+    def test_windowed_interpolation(self, interpolation, r, so):
+        """
+        Test that interpolating and injecting with a support spanning several MPI
+        ranks give the same results as in serial.
+        """
+        shape = (24, 24)
+
+        rng = np.random.RandomState(0)
+        coords = rng.uniform(0., 23., size=(30, 2))
+        data = rng.rand(*shape)
+
+        results = []
+        for comm in [MPI.COMM_SELF, MPI.COMM_WORLD]:
+            grid = Grid(shape=shape, extent=(23., 23.), comm=comm)
+            f = Function(name='f', grid=grid, space_order=so)
+            f.data[:] = data
+            g = Function(name='g', grid=grid, space_order=so)
+            sf = SparseFunction(name='sf', grid=grid, npoint=30, coordinates=coords,
+                                interpolation=interpolation, r=r)
+
+            Operator(sf.interpolate(f)).apply()
+            Operator(sf.inject(field=g, expr=sf)).apply()
+            results.append((sf, g))
+
+        (sf0, g0), (sf1, g1) = results
+        assert np.allclose(sf1.data, sf0.data[sf1.local_indices], rtol=1e-5)
+        assert np.allclose(g1.data, g0.data[g1.local_indices], rtol=1e-5)
+
+    @pytest.mark.parallel(mode=4)
+    def test_windowed_interpolation_shallow_halo(self):
+        """
+        Test that interpolating with a support deeper than the halo is rejected,
+        since the MPI rank owning a sparse point couldn't compute its value.
+        """
+        grid = Grid(shape=(16, 16))
+        f = Function(name='f', grid=grid, space_order=2)
+        sf = SparseFunction(name='sf', grid=grid, npoint=1, coordinates=[(.5, .5)],
+                            interpolation='sinc', r=4)
+
+        with pytest.raises(ValueError):
+            Operator(sf.interpolate(f))
+
+        # Injection doesn't need the whole support within the halo
+        Operator(sf.inject(field=f, expr=sf))
+
     @pytest.mark.parallel(mode=2)
     def test_subsampling(self):
         grid = Grid(shape=(40,))
@@ -1422,6 +1602,35 @@ class TestOperatorAdvanced(object):
 
         assert (np.isclose(norm(f), 17.24904, atol=1e-4, rtol=0))
 
+    @pytest.mark.parallel(mode=[(4, 'deep')])
+    def test_deep_halo(self):
+        """
+        Test that exchanging deep halos once every few timesteps yields the
+        same results as the `basic` mode, which exchanges them at each timestep.
+        """
+        grid = Grid(shape=(16, 16))
+
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+        eqn = Eq(u.forward, u + 0.1*u.laplace)
+        op0 = Operator(eqn, dle=('advanced', {'mpi': 'basic'}))
+        op1 = Operator(eqn)
+
+        steps = [i for i in op1.input if i.name == 'halo_steps']
+        assert len(steps) == 1
+        assert steps[0].max_value > 1
+
+        u.data[:] = 0.
+        u.data[0, 6:10, 6:10] = 1.
+        op0.apply(time_M=9)
+        expected = np.array(u.data[0])
+        assert not np.allclose(expected, 0.)
+
+        for halo_steps in range(1, steps[0].max_value + 1):
+            u.data[:] = 0.
+            u.data[0, 6:10, 6:10] = 1.
+            op1.apply(time_M=9, halo_steps=halo_steps)
+            assert np.allclose(u.data[0], expected, atol=1e-6, rtol=0)
+
     @pytest.mark.parallel(mode=[(4, 'basic'), (4, 'overlap2', True)])
     @patch("devito.passes.clusters.aliases.MIN_COST_ALIAS", 1)
     def test_aliases(self):
@@ -1595,6 +1804,28 @@ class TestOperatorAdvanced(object):
         assert np.all(u.data[1, -1:] == 1.)
         assert np.all(u.data[1, :, 1:] == 1.)
 
+    @pytest.mark.parallel(mode=[(2, 'basic'), (2, 'overlap')])
+    @switchconfig(profiling='imbalance')
+    def test_profiling_imbalance(self):
+        grid = Grid(shape=(12, 12))
+
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+
+        op = Operator(Eq(u.forward, u.dx + 1.))
+        summary = op.apply(time_M=4)
+
+        # One entry per rank
+        assert set(summary.halo) == set(summary)
+        assert all(v.halo > 0 for v in summary.halo.values())
+        if configuration['mpi'] == 'overlap':
+            assert all(v.remainder > 0 for v in summary.halo.values())
+        else:
+            assert all(v.remainder == 0 for v in summary.halo.values())
+
+        assert list(summary.ranks) == ['section0']
+        assert len(summary.ranks['section0'].times) == grid.distributor.nprocs
+        assert summary.ranks['section0'].ratio >= 1
+
 
 def gen_serial_norms(shape, so):
     """
@@ -1693,7 +1924,8 @@ class TestIsotropicAcoustic(object):
 
     @pytest.mark.parametrize('nd', [1, 2, 3])
     @pytest.mark.parallel(mode=[(4, 'basic'), (4, 'diag', True), (4, 'overlap', True),
-                                (4, 'overlap2', True), (4, 'full', True)])
+                                (4, 'overlap2', True), (4, 'full', True),
+                                (4, 'persistent', True)])
     def test_adjoint_F(self, nd):
         self.run_adjoint_F(nd)
 
@@ -1,16 +1,25 @@
+import os
+
 import numpy as np
 import pytest
+from collections import OrderedDict
 from itertools import permutations
 
 from conftest import skipif
 from devito import (Grid, Eq, Operator, Constant, Function, TimeFunction,
                     SparseFunction, SparseTimeFunction, Dimension, error, SpaceDimension,
                     NODE, CELL, dimensions, configuration, TensorFunction,
-                    TensorTimeFunction, VectorFunction, VectorTimeFunction)
+                    TensorTimeFunction, VectorFunction, VectorTimeFunction, switchconfig)
 from devito.ir.equations import ClusterizedEq
 from devito.ir.iet import (Callable, Conditional, Expression, Iteration, FindNodes,
                            IsPerfectIteration, retrieve_iteration_tree)
 from devito.ir.support import Any, Backward, Forward
+from devito.operator.buildcache import build_cache_key
+from devito.operator.profiling import (ImbalanceProfiler, PerfEventProfiler, Profiler,
+                                       create_profile, perf_event_open_group,
+                                       PERF_TYPE_SOFTWARE,
+                                       PERF_COUNT_SW_TASK_CLOCK,
+                                       PERF_COUNT_SW_PAGE_FAULTS)
 from devito.passes.iet import DataManager
 from devito.symbolics import ListInitializer, indexify, retrieve_indexed
 from devito.tools import flatten, powerset
@@ -960,6 +969,71 @@ class TestArguments(object):
         except:
             assert False
 
+    def test_prepared_call(self):
+        """
+        Test that a prepared call, with patched arguments, behaves as `apply`.
+        """
+        grid = Grid(shape=(11, 11))
+        c = Constant(name='c', value=1.)
+        u = TimeFunction(name='u', grid=grid, space_order=2, save=10)
+        src = SparseTimeFunction(name='src', grid=grid, npoint=1, nt=10,
+                                 coordinates=[(.5, .5)], precompute=True)
+        src.data[:] = 1.
+
+        op = Operator([Eq(u.forward, u + c*u.laplace*1e-3)] +
+                      src.inject(field=u.forward, expr=src))
+        op.apply(time_M=4)
+        ref = u.data.copy()
+
+        u.data[:] = 0.
+        call = op.prepare(time_M=2)
+        call()
+        call(time_m=3, time_M=4)
+        assert np.all(u.data == ref)
+
+        # Patch a Constant and a Function; in-place changes are also seen
+        u1 = TimeFunction(name='u', grid=grid, space_order=2, save=10)
+        src.coordinates.data[:] = [(.2, .3)]
+        call(time_m=0, c=2., u=u1)
+        assert np.all(u.data == ref)
+        u.data[:] = 0.
+        op.apply(time_M=4, c=2.)
+        assert np.all(u1.data == u.data)
+
+        # Patching a Function of different shape is forbidden, and leaves the
+        # bound arguments untouched
+        u2 = TimeFunction(name='u', grid=grid, space_order=2, save=3)
+        bound = call.args['u']
+        with pytest.raises(ValueError) as e:
+            call(time_m=1, u=u2)
+        assert 'Patching `u` requires `time_size=3`' in str(e.value)
+        assert call.args['u'] is bound
+        assert call.args['time_m'] == 0
+
+    @pytest.mark.parametrize('backward', [False, True])
+    def test_prepared_call_stepwise(self, backward):
+        """
+        Test that a prepared call run one timestep at a time behaves as `apply`.
+        """
+        grid = Grid(shape=(11, 11))
+        u = TimeFunction(name='u', grid=grid, space_order=2, save=10)
+        eq = Eq(u.backward, u + u.laplace*1e-3) if backward else \
+            Eq(u.forward, u + u.laplace*1e-3)
+        u.data[:] = np.random.rand(*u.shape)
+        init = u.data.copy()
+
+        op = Operator(eq)
+        op.apply(time_m=1, time_M=8)
+        ref = u.data.copy()
+
+        u.data[:] = init
+        timesteps = []
+        call = op.prepare(time_m=1, time_M=8)
+        call.stepwise(timesteps.append, backward=backward)
+        assert np.all(u.data == ref)
+        assert timesteps == (list(range(8, 0, -1)) if backward else list(range(1, 9)))
+        assert call.args['time_m'] == 1 and call.args['time_M'] == 8
+
     @skipif('nompi')
     @pytest.mark.parallel(mode=1)
     def test_new_distributor(self):
@@ -1675,3 +1749,213 @@ class TestLoopScheduling(object):
         assert tree[0].dim is time
         assert tree[1].dim is x
         assert tree[2].dim is y
+
+
+class TestJITCompilation(object):
+
+    def test_compile_async(self):
+        grid = Grid(shape=(4, 4))
+        f = Function(name='f', grid=grid)
+        g = Function(name='g', grid=grid)
+
+        op0 = Operator(Eq(f, f + 1))
+        op1 = Operator(Eq(g, f + 2))
+
+        futures = [op.compile_async() for op in [op0, op1]]
+        # Idempotent
+        assert op0.compile_async() is futures[0]
+
+        op0.apply()
+        assert futures[0].done()
+        op1.apply()
+        assert futures[1].done()
+
+        assert np.all(f.data == 1)
+        assert np.all(g.data == 3)
+        assert op0._profiler.py_timers['jit-compile'] > 0
+
+    def test_compile_async_after_jit(self):
+        grid = Grid(shape=(4, 4))
+        f = Function(name='f', grid=grid)
+
+        op = Operator(Eq(f, f + 1))
+        op.apply()
+
+        future = op.compile_async()
+        assert future.done()
+        op.apply()
+        assert np.all(f.data == 2)
+
+
+class TestBuildCache(object):
+
+    @pytest.fixture
+    def nobuild(self, monkeypatch):
+        """Upon a build-cache hit, the lowering pipeline must not be executed."""
+        def _build(cls, expressions, **kwargs):
+            raise AssertionError("Expected a build-cache hit")
+        return lambda: monkeypatch.setattr(Operator, '_build', classmethod(_build))
+
+    @switchconfig(build_cache=1)
+    def test_hit(self, nobuild):
+        grid = Grid(shape=(4, 4))
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+        c = Constant(name='c', value=1.)
+
+        op0 = Operator(Eq(u.forward, u + c))
+        op0.apply(time_M=1)
+
+        # Same symbolic input, different data
+        u1 = TimeFunction(name='u', grid=grid, space_order=2)
+        c1 = Constant(name='c', value=2.)
+
+        nobuild()
+        op1 = Operator(Eq(u1.forward, u1 + c1))
+        op1.apply(time_M=1)
+
+        assert str(op0) == str(op1)
+        assert np.all(u.data[0] == 2.)
+        assert np.all(u1.data[0] == 4.)
+
+    @switchconfig(build_cache=1)
+    def test_hit_sparse(self, nobuild):
+        grid = Grid(shape=(4, 4), extent=(3., 3.))
+        u = TimeFunction(name='u', grid=grid)
+        coordinates = np.array([(0.5, 0.5), (2.5, 2.5)])
+
+        sf0 = SparseTimeFunction(name='sf', grid=grid, npoint=2, nt=3,
+                                 coordinates=coordinates)
+        op0 = Operator(sf0.interpolate(u))
+
+        sf1 = SparseTimeFunction(name='sf', grid=grid, npoint=2, nt=3,
+                                 coordinates=coordinates)
+        u.data[:] = 1.
+
+        nobuild()
+        op1 = Operator(sf1.interpolate(u))
+        op1.apply(time_M=1)
+
+        assert str(op0) == str(op1)
+        assert np.all(sf0.data == 0.)
+        assert np.all(sf1.data[:2] == 1.)
+
+    def test_key(self):
+        grid = Grid(shape=(4, 4))
+        u0 = TimeFunction(name='u', grid=grid, space_order=2)
+        u1 = TimeFunction(name='u', grid=grid, space_order=4)
+        v = TimeFunction(name='v', grid=grid, space_order=2)
+
+        cls = Operator
+        key = build_cache_key(cls, Eq(u0.forward, u0.laplace))
+
+        # Numerical data must not impact the key
+        u0.data[:] = 1.
+        assert key == build_cache_key(cls, Eq(u0.forward, u0.laplace))
+
+        # While the symbolic metadata must do
+        assert key != build_cache_key(cls, Eq(u1.forward, u1.laplace))
+        assert key != build_cache_key(cls, Eq(v.forward, v.laplace))
+        assert key != build_cache_key(cls, Eq(u0.forward, u0.laplace), name='Foo')
+
+
+class TestProfiling(object):
+
+    @pytest.fixture
+    def swevents(self, monkeypatch):
+        """
+        Hardware counters are often unavailable (e.g., in virtual machines), so
+        software counters are used in their place.
+        """
+        events = OrderedDict([
+            ('cycles', (PERF_TYPE_SOFTWARE, PERF_COUNT_SW_TASK_CLOCK)),
+            ('llc-misses', (PERF_TYPE_SOFTWARE, PERF_COUNT_SW_PAGE_FAULTS))
+        ])
+        monkeypatch.setattr(PerfEventProfiler, '_events', events)
+
+        # Even the software counters may be blocked (e.g., by `perf_event_paranoid`
+        # or by a seccomp profile)
+        try:
+            for fd in perf_event_open_group(events.values()):
+                os.close(fd)
+        except OSError as e:
+            pytest.skip("Couldn't open the counters (%s)" % e)
+
+    @switchconfig(profiling='perf', openmp=False)
+    def test_perf_counters(self, swevents):
+        grid = Grid(shape=(64, 64))
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+        v = TimeFunction(name='v', grid=grid, space_order=2)
+
+        op = Operator([Eq(u.forward, u.laplace + 1.),
+                       Eq(v.forward, v + u.forward)])
+
+        assert isinstance(op._profiler, PerfEventProfiler)
+        assert str(op).count('PERF_EVENT_IOC_ENABLE') == len(op._profiler._sections)
+
+        summary = op.apply(time_M=20)
+        assert set(summary.counters) == set(summary)
+        assert all(i.cycles > 0 for i in summary.counters.values())
+
+        # The counters are reset at each run
+        counters = op._profiler.timer.counters
+        summary = op.apply(time_M=0)
+        assert all(i['cycles'] > 0 for i in counters.read().values())
+        op._profiler.timer.reset()
+        assert all(i['cycles'] == 0 for i in counters.read().values())
+
+    @switchconfig(profiling='perf')
+    def test_perf_unavailable(self, monkeypatch):
+        # An unknown counter type
+        monkeypatch.setattr(PerfEventProfiler, '_events',
+                            OrderedDict([('cycles', (1000, 0))]))
+        profiler = create_profile('timers')
+        assert type(profiler) is Profiler
+
+    @switchconfig(profiling='perf', openmp=True)
+    def test_perf_openmp(self, swevents):
+        # The counters wouldn't account for the OpenMP threads
+        profiler = create_profile('timers')
+        assert type(profiler) is Profiler
+
+    @switchconfig(profiling='perf', openmp=False)
+    def test_perf_openmp_operator(self, swevents):
+        grid = Grid(shape=(64, 64))
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+
+        op = Operator(Eq(u.forward, u.laplace + 1.), dle=('advanced', {'openmp': True}))
+
+        assert isinstance(op._profiler, PerfEventProfiler)
+
+        summary = op.apply(time_M=2)
+        assert len(summary) > 0
+        assert not summary.counters
+
+    @switchconfig(profiling='imbalance', openmp=True)
+    def test_imbalance_threads(self):
+        grid = Grid(shape=(64, 64))
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+        sf = SparseTimeFunction(name='sf', grid=grid, npoint=20, nt=21)
+        sf.coordinates.data[:] = np.linspace(0., 1., 20)[:, None]
+
+        op = Operator([Eq(u.forward, u.laplace + 1.)] +
+                      sf.inject(field=u.forward, expr=sf))
+
+        assert isinstance(op._profiler, ImbalanceProfiler)
+        assert 'omp_get_thread_num()' in str(op)
+
+        summary = op.apply(time_M=20, nthreads=2, nthreads_nonaffine=2)
+        assert set(summary.threads) == set(summary)
+        for v in summary.threads.values():
+            assert 0 < len(v.times) <= 2
+            assert v.ratio >= 1
+            assert v.histogram[0].sum() == len(v.times)
+        assert set(summary.imbalance) == set(summary)
+
+        # No MPI, hence no halo exchanges
+        assert not summary.halo
+        assert not summary.ranks
+
+        # The timers are reset at each run
+        imbalance = op._profiler.timer.imbalance
+        op._profiler.timer.reset()
+        assert all(imbalance.threads(i).size == 0 for i in imbalance.sections)